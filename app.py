@@ -2,29 +2,41 @@
 # VEDIC ASTROLOGY DASHBOARD - FLASK WEB APP
 # =============================================================================
 
-from flask import Flask, render_template, request, jsonify, session, send_file
-from vedic_astrology_modular import VedicChartCalculator, display_chart_analysis
-from vedic_astrology_engine import (
-    get_dasha_info, get_julian_day,
+from flask import Flask, Response, render_template, request, jsonify, session, send_file, stream_with_context
+from vedic_astrology_modular import (
+    display_chart_analysis,
+    get_dasha_info, get_dasha_tree, get_julian_day,
     calculate_sthana_bala, calculate_dig_bala, calculate_kala_bala,
     calculate_cheshta_bala, calculate_naisargika_bala, calculate_drik_bala,
     NAKSHATRAS, NAKSHATRA_LORDS
 )
-from transit_calculator import TransitCalculator
+from ephemeris_table import EphemerisSnapshot, get_snapshot, resolve_ayanamsa
+from julian_day import date_julian_day
+from transit_calculator import NATAL_SECTIONS, TRANSIT_PLANETS, TransitCalculator
+from transit_snapshots import transit_snapshots
+from transit_alerts import transit_alerts
 from compatibility_analyzer import CompatibilityAnalyzer
 from cache_manager import cache_manager
+from chart_index import chart_index
+from chart_similarity import chart_similarity
+from chart_service import chart_service
+from rectification import sweep_birth_times
 from pdf_generator import pdf_generator
 from keep_alive import start_keep_alive, stop_keep_alive
 import json
 from typing import Optional, Dict, Any
 import datetime
+import itertools
 import os
+import re
 
 app = Flask(__name__)
 app.secret_key = 'your_secret_key_here'  # Set a strong secret key for session
 
-# Initialize calculators
-chart_calculator = VedicChartCalculator()
+# Chart IDs are the cache keys of /api/calculate_chart (MD5 hex digests)
+CHART_ID = re.compile(r'[0-9a-f]{32}')
+
+# Initialize calculators (charts run in the chart service's worker processes)
 transit_calculator = TransitCalculator()
 compatibility_analyzer = CompatibilityAnalyzer()
 
@@ -45,7 +57,8 @@ def calculate_chart():
             'time': data['time'],
             'latitude': float(data['latitude']),
             'longitude': float(data['longitude']),
-            'timezone': float(data['timezone'])
+            'timezone': float(data['timezone']),
+            'ayanamsa': resolve_ayanamsa(data.get('ayanamsa'))
         }
         
         # Generate cache key
@@ -56,9 +69,11 @@ def calculate_chart():
         if cached_result:
             return jsonify({
                 'success': True,
+                'chart_id': cache_key,
                 'chart': cached_result['chart'],
                 'dasha': cached_result['dasha'],
-                'transits': cached_result['transits'],
+                # Entries cached before transits stopped embedding the natal chart still carry it
+                'transits': {k: v for k, v in cached_result['transits'].items() if k != 'birth_chart'},
                 'birth_details': birth_details,
                 'cached': True
             })
@@ -67,23 +82,18 @@ def calculate_chart():
         session['birth_details'] = birth_details
         
         # Calculate chart
-        chart = chart_calculator.calculate_chart(**birth_details)
+        chart = chart_service.calculate_chart(**birth_details)
         
         # Calculate dasha using new engine
         moon_longitude = chart['planets']['Moon']['longitude']
         dasha_info = get_dasha_info(
             moon_longitude=moon_longitude,
-            birth_date=data['date']
+            birth_date=data['date'],
+            ayanamsa=birth_details['ayanamsa']
         )
         
-        # Calculate transits
-        transit_info = transit_calculator.calculate_current_transits(
-            date=data['date'],
-            time=data['time'],
-            latitude=float(data['latitude']),
-            longitude=float(data['longitude']),
-            timezone=float(data['timezone'])
-        )
+        # Transits over the natal chart just calculated
+        transit_info = transit_calculator.calculate_chart_transits(chart)
         
         # Cache the result
         result_data = {
@@ -92,9 +102,12 @@ def calculate_chart():
             'transits': transit_info
         }
         cache_manager.set(cache_key, result_data)
+        chart_index.add(cache_key, chart)
+        chart_similarity.add(cache_key, chart)
         
         return jsonify({
             'success': True,
+            'chart_id': cache_key,
             'chart': chart,
             'dasha': dasha_info,
             'transits': transit_info,
@@ -108,6 +121,167 @@ def calculate_chart():
             'error': str(e)
         }), 400
 
+def _natal_chart(data: Dict[str, Any]):
+    """The natal chart a transit request names, and its birth details when given as such.
+
+    The chart is named by ``chart_id`` (as returned by /api/calculate_chart),
+    given whole as ``chart``, or given as birth details (taken from the
+    chart cache when present).
+    """
+    if 'chart_id' in data:
+        chart_id = str(data['chart_id'])
+        cached_result = cache_manager.get(chart_id) if CHART_ID.fullmatch(chart_id) else None
+        if not isinstance(cached_result, dict) or 'chart' not in cached_result:
+            raise ValueError(f"Unknown or expired chart_id: {chart_id}")
+        return cached_result['chart'], None
+    if 'chart' in data:
+        return data['chart'], None
+    birth_details = {
+        'date': data['date'],
+        'time': data['time'],
+        'latitude': float(data['latitude']),
+        'longitude': float(data['longitude']),
+        'timezone': float(data['timezone']),
+        'ayanamsa': resolve_ayanamsa(data.get('ayanamsa'))
+    }
+    cached_result = cache_manager.get(cache_manager.generate_cache_key(birth_details))
+    chart = cached_result['chart'] if cached_result else \
+        chart_service.calculate_chart(**birth_details, sections=NATAL_SECTIONS)
+    return chart, birth_details
+
+@app.route('/api/transits', methods=['POST'])
+def chart_transits():
+    """API endpoint for transits over a natal chart that is already calculated.
+
+    The natal chart is named by ``chart_id``, given whole as ``chart``, or
+    given as birth details (see _natal_chart). Only the transit chart,
+    analysis and planet windows are returned, for ``transit_date``
+    (default today).
+    """
+    try:
+        data = request.get_json()
+        chart, birth_details = _natal_chart(data)
+        if birth_details is None:
+            transit_info = transit_calculator.calculate_chart_transits(chart, data.get('transit_date'))
+        else:
+            transit_info = transit_calculator.calculate_chart_transits(
+                chart, data.get('transit_date'), birth_details['latitude'], birth_details['longitude'],
+                birth_details['timezone'], birth_details['ayanamsa'])
+
+        return jsonify({
+            'success': True,
+            'transits': transit_info
+        })
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/api/transit_series', methods=['POST'])
+def transit_series():
+    """API endpoint streaming transits over a natal chart for a date range.
+
+    The natal chart is named as for /api/transits. ``start_date`` and
+    ``end_date`` bound the range, stepped every ``step_hours`` (default
+    24) from ``transit_time`` (default '12:00'). The response is newline-delimited
+    JSON: a header line with the range, the natal houses of the planets and
+    the effects of each planet in each transit house, then one line per
+    step (``output`` 'rows') or per planet's stay in a house ('intervals').
+    """
+    try:
+        data = request.get_json()
+        chart, birth_details = _natal_chart(data)
+        timezone = data.get('timezone') if birth_details is None else birth_details['timezone']
+        ayanamsa = data.get('ayanamsa') if birth_details is None else birth_details['ayanamsa']
+        series_range = {
+            'start_date': data['start_date'],
+            'end_date': data['end_date'],
+            'time': data.get('transit_time', '12:00'),
+            'step_hours': float(data.get('step_hours', 24.0)),
+            'output': data.get('output', 'rows')
+        }
+        series = transit_calculator.iter_transit_series(
+            chart, **series_range, timezone=None if timezone is None else float(timezone), ayanamsa=ayanamsa)
+        header = {
+            'success': True,
+            'range': series_range,
+            'birth_houses': {name: chart['planets'][name]['house'] for name in TRANSIT_PLANETS},
+            'effects': transit_calculator.transit_effects_table(chart)
+        }
+
+        def lines():
+            yield json.dumps(header) + '\n'
+            for item in series:
+                yield json.dumps(item) + '\n'
+
+        return Response(stream_with_context(lines()), mimetype='application/x-ndjson')
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/api/alerts/subscribe', methods=['POST'])
+def subscribe_alerts():
+    """API endpoint subscribing a natal chart to transit alerts.
+
+    The natal chart is named as for /api/transits; a whole ``chart`` also
+    needs a ``subscriber`` ID (otherwise the chart ID is used). Returns the
+    subscriber ID and how many upcoming alerts were stored.
+    """
+    try:
+        data = request.get_json()
+        chart, birth_details = _natal_chart(data)
+        if data.get('subscriber'):
+            subscriber = str(data['subscriber'])
+        elif 'chart_id' in data:
+            subscriber = str(data['chart_id'])
+        elif birth_details is not None:
+            subscriber = cache_manager.generate_cache_key(birth_details)
+        else:
+            raise ValueError("Give a subscriber ID with a whole chart")
+        timezone = data.get('timezone') if birth_details is None else birth_details['timezone']
+        alerts = transit_alerts.subscribe(subscriber, chart, None if timezone is None else float(timezone),
+                                          None if birth_details is None else birth_details['ayanamsa'])
+
+        return jsonify({
+            'success': True,
+            'subscriber': subscriber,
+            'alerts': alerts
+        })
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/api/alerts/due', methods=['POST'])
+def due_alerts():
+    """API endpoint for the transit alerts due in the next ``hours`` (default 24),
+    optionally of one ``subscriber`` and of some ``kinds``. With ``mark_sent``
+    the returned alerts are marked sent, so they are not returned again."""
+    try:
+        data = request.get_json() or {}
+        # With mark_sent the alerts are claimed, so two callers never both get one
+        read = transit_alerts.claim if data.get('mark_sent') else transit_alerts.due
+        alerts = read(float(data.get('hours', 24)), chart_id=data.get('subscriber'),
+                      kinds=data.get('kinds'), limit=data.get('limit'))
+
+        return jsonify({
+            'success': True,
+            'alerts': alerts
+        })
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
 @app.route('/api/compatibility', methods=['POST'])
 def calculate_compatibility():
     """API endpoint to calculate compatibility"""
@@ -130,7 +304,9 @@ def calculate_compatibility():
             'timezone': float(data['person2']['timezone'])
         }
         
-        compatibility = compatibility_analyzer.analyze_compatibility(person1, person2)
+        compatibility = compatibility_analyzer.analyze_compatibility(
+            person1, person2, ayanamsa=resolve_ayanamsa(data.get('ayanamsa'))
+        )
         
         return jsonify({
             'success': True,
@@ -143,6 +319,205 @@ def calculate_compatibility():
             'error': str(e)
         }), 400
 
+@app.route('/api/dasha_tree', methods=['POST'])
+def dasha_tree():
+    """API endpoint to drill into dasha periods down to prana dasha.
+
+    ``system`` picks the dasha system (Vimshottari by default). With
+    ``path`` (lords from the mahadasha down) it returns that period's
+    subperiods; with ``level``, ``start_date`` and ``end_date`` it returns
+    the periods of that level overlapping the dates (at most ``limit``).
+    """
+    try:
+        data = request.get_json()
+        birth_details = {
+            'date': data['date'],
+            'time': data['time'],
+            'latitude': float(data['latitude']),
+            'longitude': float(data['longitude']),
+            'timezone': float(data['timezone']),
+            'ayanamsa': resolve_ayanamsa(data.get('ayanamsa'))
+        }
+        cache_key = cache_manager.generate_cache_key(birth_details)
+        cached_result = cache_manager.get(cache_key)
+        chart = cached_result['chart'] if cached_result else \
+            chart_service.calculate_chart(**birth_details, sections={'planets'})
+        tree = get_dasha_tree(chart['planets']['Moon']['longitude'], data['date'], data.get('system'))
+
+        if 'level' in data:
+            limit = int(data.get('limit', 1000))
+            periods = list(itertools.islice(tree.iter_level(
+                data['level'], date_julian_day(data['start_date']), date_julian_day(data['end_date']) + 1), limit + 1))
+            return jsonify({
+                'success': True,
+                'system': tree.timeline.system.name,
+                'periods': periods[:limit],
+                'truncated': len(periods) > limit
+            })
+
+        return jsonify({
+            'success': True,
+            'system': tree.timeline.system.name,
+            'path': data.get('path', []),
+            'periods': tree.children(data.get('path', []))
+        })
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/api/search_charts', methods=['POST'])
+def search_charts():
+    """API endpoint to find indexed charts by yoga, dosha, placement and nakshatra"""
+    try:
+        data = request.get_json()
+        limit = data.get('limit')
+
+        ids = chart_index.search(data['query'], int(limit) if limit is not None else None)
+
+        return jsonify({
+            'success': True,
+            'count': chart_index.count(data['query']),
+            'ids': ids
+        })
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/api/similar_charts', methods=['POST'])
+def similar_charts():
+    """API endpoint to find the indexed charts most like a birth chart"""
+    try:
+        data = request.get_json()
+        birth_details = {
+            'date': data['date'],
+            'time': data['time'],
+            'latitude': float(data['latitude']),
+            'longitude': float(data['longitude']),
+            'timezone': float(data['timezone']),
+            'ayanamsa': resolve_ayanamsa(data.get('ayanamsa'))
+        }
+        cache_key = cache_manager.generate_cache_key(birth_details)
+        cached_result = cache_manager.get(cache_key)
+        chart = cached_result['chart'] if cached_result else chart_service.calculate_chart(**birth_details)
+
+        neighbours = chart_similarity.nearest(chart, k=int(data.get('k', 10)),
+                                              metric=data.get('metric', 'euclidean'), exclude=[cache_key])
+
+        # Charts close enough to be the same birth (euclidean distance)
+        duplicates = [chart_id for chart_id, _ in chart_similarity.within(chart) if chart_id != cache_key]
+
+        return jsonify({
+            'success': True,
+            'similar': [{'id': chart_id, 'distance': round(distance, 6)} for chart_id, distance in neighbours],
+            'duplicates': duplicates
+        })
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/api/transit_events', methods=['POST'])
+def transit_events():
+    """API endpoint to find exact ingress and nakshatra/pada crossing times"""
+    try:
+        data = request.get_json()
+
+        query = {
+            'transit_events': True,
+            'start_date': data['start_date'],
+            'end_date': data['end_date'],
+            'timezone': float(data.get('timezone', 0.0)),
+            'ayanamsa': resolve_ayanamsa(data.get('ayanamsa')),
+            'kinds': data.get('kinds'),
+            'grahas': data.get('grahas')
+        }
+
+        # The events depend only on the range, so one cached result serves
+        # every user; the prefix keeps the key out of the chart_id namespace
+        cache_key = 'events-' + cache_manager.generate_cache_key(query)
+        events = cache_manager.get(cache_key)
+        cached = events is not None
+        if not cached:
+            events = transit_calculator.calculate_transit_events(
+                query['start_date'], query['end_date'], query['timezone'], query['ayanamsa'],
+                query['kinds'], query['grahas']
+            )
+            cache_manager.set(cache_key, events)
+
+        return jsonify({
+            'success': True,
+            'events': events,
+            'cached': cached
+        })
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/api/planet_windows', methods=['POST'])
+def planet_windows():
+    """API endpoint to find retrograde stations and combustion windows"""
+    try:
+        data = request.get_json()
+
+        windows = transit_calculator.calculate_planet_windows(
+            data['start_date'],
+            data['end_date'],
+            float(data.get('timezone', 0.0)),
+            data.get('planets')
+        )
+
+        return jsonify({
+            'success': True,
+            'windows': windows
+        })
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/api/rectify_birth_time', methods=['POST'])
+def rectify_birth_time():
+    """API endpoint to sweep a window of candidate birth times"""
+    try:
+        data = request.get_json()
+
+        rectification = chart_service.run(
+            sweep_birth_times,
+            date=data['date'],
+            start_time=data['start_time'],
+            end_time=data['end_time'],
+            latitude=float(data['latitude']),
+            longitude=float(data['longitude']),
+            timezone=float(data['timezone']),
+            resolution=float(data.get('resolution', 60)),
+            ayanamsa=resolve_ayanamsa(data.get('ayanamsa')),
+            include_steps=bool(data.get('include_steps', False))
+        )
+
+        return jsonify({
+            'success': True,
+            'rectification': rectification
+        })
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
 @app.route('/chart')
 def chart_page():
     """Birth chart analysis page"""
@@ -180,26 +555,23 @@ def calculate_shadbala():
             'time': data['time'],
             'latitude': float(data['latitude']),
             'longitude': float(data['longitude']),
-            'timezone': float(data['timezone'])
+            'timezone': float(data['timezone']),
+            'ayanamsa': resolve_ayanamsa(data.get('ayanamsa'))
         }
         
         # Calculate chart
-        chart = chart_calculator.calculate_chart(**birth_details)
+        chart = chart_service.calculate_chart(**birth_details, sections={'lagna', 'planets'})
+        
+        # The chart's ephemeris snapshot, shared by every planet below
+        jd = get_julian_day(birth_details['date'], birth_details['time'], birth_details['timezone'])
+        snapshot = get_snapshot(jd, birth_details['ayanamsa'])
         
         # Calculate detailed Shadbala for each planet
         detailed_shadbala = {}
         for planet_name, planet_data in chart['planets'].items():
             if planet_name in ['Sun', 'Moon', 'Mercury', 'Venus', 'Mars', 'Jupiter', 'Saturn']:
                 # Get detailed Shadbala analysis
-                shadbala_analysis = calculate_detailed_shadbala(
-                    chart['birth_info']['date'], 
-                    chart['birth_info']['time'],
-                    float(chart['birth_info']['latitude']),
-                    float(chart['birth_info']['longitude']),
-                    float(chart['birth_info']['timezone']),
-                    planet_name,
-                    planet_data
-                )
+                shadbala_analysis = calculate_detailed_shadbala(snapshot, planet_name, planet_data)
                 detailed_shadbala[planet_name] = shadbala_analysis
         
         return jsonify({
@@ -215,18 +587,14 @@ def calculate_shadbala():
             'error': str(e)
         }), 400
 
-def calculate_detailed_shadbala(date: str, time: str, latitude: float, 
-                               longitude: float, timezone: float, 
-                               planet_name: str, planet_data: Dict) -> Dict[str, Any]:
+def calculate_detailed_shadbala(snapshot: EphemerisSnapshot, planet_name: str,
+                               planet_data: Dict) -> Dict[str, Any]:
     """Calculate detailed Shadbala analysis with tick marks for each principle"""
     
-    # Get Julian Day
-    jd = get_julian_day(date, time, timezone)
-    
     # Calculate all six Shadbala components
     sthana = calculate_sthana_bala(planet_name, planet_data['sign'], planet_data['house'])
     dig = calculate_dig_bala(planet_data['sign'], planet_data.get('asc_rasi', 'Mesha'))
-    kala = calculate_kala_bala(jd, planet_name)
+    kala = calculate_kala_bala(snapshot.jd, planet_name, snapshot)
     cheshta = calculate_cheshta_bala(planet_name, planet_data.get('speed', 0))
     naisargika = calculate_naisargika_bala(planet_name)
     drik = calculate_drik_bala(planet_name, planet_data['house'])
@@ -325,11 +693,12 @@ def calculate_cosmic_connections():
         'time': data['time'],
         'latitude': float(data['latitude']),
         'longitude': float(data['longitude']),
-        'timezone': float(data['timezone'])
+        'timezone': float(data['timezone']),
+        'ayanamsa': resolve_ayanamsa(data.get('ayanamsa'))
     }
     
     # Calculate chart
-    chart = chart_calculator.calculate_chart(**birth_details)
+    chart = chart_service.calculate_chart(**birth_details, sections={'lagna', 'planets', 'houses'})
     
     # Get cosmic connections analysis
     cosmic_data = analyze_cosmic_connections(chart)
@@ -360,19 +729,11 @@ def analyze_cosmic_connections(chart):
         'Purva Bhadrapada': 'Jupiter', 'Uttara Bhadrapada': 'Saturn', 'Revati': 'Mercury'
     }
     
-    # Add nakshatra lords and pada to planet data
+    # Add nakshatra lords to planet data (the chart's pada comes from
+    # classify_longitudes on the unrounded longitude)
     for planet, pdata in planets.items():
         nakshatra = pdata.get('nakshatra', '')
-        longitude = pdata.get('longitude', 0)
         
-        # Calculate pada
-        if longitude > 0:
-            nakshatra_degree = (longitude % (360 / 27))  # Degree within nakshatra
-            pada = int(nakshatra_degree / (360 / 27 / 4)) + 1  # 4 padas per nakshatra
-            pdata['pada'] = pada
-        else:
-            pdata['pada'] = 0
-            
         # Add nakshatra lord
         if nakshatra in nakshatra_lords:
             pdata['nakshatra_lord'] = nakshatra_lords[nakshatra]
@@ -577,7 +938,8 @@ def generate_chart_pdf():
             'time': data['time'],
             'latitude': float(data['latitude']),
             'longitude': float(data['longitude']),
-            'timezone': float(data['timezone'])
+            'timezone': float(data['timezone']),
+            'ayanamsa': resolve_ayanamsa(data.get('ayanamsa'))
         }
         
         cache_key = cache_manager.generate_cache_key(birth_details)
@@ -586,7 +948,7 @@ def generate_chart_pdf():
         if cached_result:
             chart_data = cached_result['chart']
         else:
-            chart_data = chart_calculator.calculate_chart(**birth_details)
+            chart_data = chart_service.calculate_chart(**birth_details, sections={'planets', 'houses', 'yogas'})
         
         # Prepare data for PDF
         pdf_data = {
@@ -629,7 +991,8 @@ def generate_dasha_pdf():
             'time': data['time'],
             'latitude': float(data['latitude']),
             'longitude': float(data['longitude']),
-            'timezone': float(data['timezone'])
+            'timezone': float(data['timezone']),
+            'ayanamsa': resolve_ayanamsa(data.get('ayanamsa'))
         }
         
         cache_key = cache_manager.generate_cache_key(birth_details)
@@ -639,9 +1002,10 @@ def generate_dasha_pdf():
             chart_data = cached_result['chart']
             dasha_data = cached_result['dasha']
         else:
-            chart_data = chart_calculator.calculate_chart(**birth_details)
+            chart_data = chart_service.calculate_chart(**birth_details, sections={'planets'})
             moon_longitude = chart_data['planets']['Moon']['longitude']
-            dasha_data = get_dasha_info(moon_longitude=moon_longitude, birth_date=data['date'])
+            dasha_data = get_dasha_info(moon_longitude=moon_longitude, birth_date=data['date'],
+                                        ayanamsa=birth_details['ayanamsa'])
         
         # Prepare data for PDF
         pdf_data = {
@@ -680,7 +1044,8 @@ def generate_shadbala_pdf():
             'time': data['time'],
             'latitude': float(data['latitude']),
             'longitude': float(data['longitude']),
-            'timezone': float(data['timezone'])
+            'timezone': float(data['timezone']),
+            'ayanamsa': resolve_ayanamsa(data.get('ayanamsa'))
         }
         
         # Calculate shadbala (this would need to be implemented)
@@ -720,7 +1085,8 @@ def generate_cosmic_connections_pdf():
             'time': data['time'],
             'latitude': float(data['latitude']),
             'longitude': float(data['longitude']),
-            'timezone': float(data['timezone'])
+            'timezone': float(data['timezone']),
+            'ayanamsa': resolve_ayanamsa(data.get('ayanamsa'))
         }
         
         # Convert planets dictionary to list format for PDF generation
@@ -738,7 +1104,7 @@ def generate_cosmic_connections_pdf():
             cosmic_data = cached_result['cosmic_connections']
         else:
             # Calculate cosmic connections
-            chart = chart_calculator.calculate_chart(**birth_details)
+            chart = chart_service.calculate_chart(**birth_details, sections={'lagna', 'planets', 'houses'})
             cosmic_data = analyze_cosmic_connections(chart)
             # Cache the result
             if cached_result:
@@ -900,7 +1266,9 @@ def cache_stats():
         return jsonify({
             'success': True,
             'cache_files': file_count,
-            'cache_dir': cache_dir
+            'cache_dir': cache_dir,
+            'transit_snapshots': transit_snapshots.stats(),
+            'transit_alerts': transit_alerts.stats()
         })
     except Exception as e:
         return jsonify({
@@ -913,5 +1281,6 @@ if __name__ == '__main__':
     # The service will auto-detect the Render URL from environment variables
     print("🚀 Starting Vedic Astrology Dashboard...")
     start_keep_alive()  # Will auto-detect Render URL if available
+    transit_alerts.start()  # Keep the alert horizon extended in the background
     
     app.run(debug=True, host='0.0.0.0', port=5050) 
\ No newline at end of file
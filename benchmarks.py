@@ -0,0 +1,509 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmarks for the chart engine
+
+Run all with ``python benchmarks.py`` or pick some by name, e.g.
+``python benchmarks.py ayanamsa``.
+"""
+
+import sys
+import time
+from typing import Callable, Dict, List
+from sample_births import random_births
+
+BENCHMARKS: Dict[str, Callable[[], None]] = {}
+
+def benchmark(fn: Callable[[], None]) -> Callable[[], None]:
+    """Register a benchmark under its function name (minus the ``bench_`` prefix)"""
+    BENCHMARKS[fn.__name__[len('bench_'):]] = fn
+    return fn
+
+def best_of(fn: Callable[[], object], repeat: int = 3) -> float:
+    """Fastest of ``repeat`` runs, in seconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+@benchmark
+def bench_ayanamsa(n: int = 2000) -> None:
+    """Charts per second for each ayanamsa, against the Lahiri path"""
+    from ephemeris_table import AYANAMSAS, get_snapshot
+    from vedic_astrology_modular import VedicChartCalculator
+
+    births: List[Dict] = random_births(n, seed=8)
+    calculator = VedicChartCalculator()
+    print(f"Ayanamsa throughput ({n} charts, snapshot cache cleared before each run)")
+    print(f"{'ayanamsa':<14}{'single/s':>12}{'batch/s':>12}{'vs lahiri':>12}")
+    baseline = None
+    for name in AYANAMSAS:
+        def single():
+            get_snapshot.cache_clear()
+            for birth in births:
+                calculator.calculate_chart(**birth, ayanamsa=name)
+        single_rate = n / best_of(single)
+        batch_rate = n / best_of(lambda: calculator.calculate_charts(births, ayanamsa=name))
+        baseline = baseline or single_rate
+        print(f"{name:<14}{single_rate:>12,.0f}{batch_rate:>12,.0f}{single_rate / baseline:>11.2f}x")
+
+@benchmark
+def bench_julian_day(n: int = 20000) -> None:
+    """Julian Day conversion: the original strptime path against julian_day.py"""
+    import datetime
+    import swisseph as swe
+    from julian_day import get_julian_day, get_julian_days, julian_day, julian_days_from_timestamps
+
+    def strptime_julian_day(date_str, time_str, timezone_offset):
+        local_dt = datetime.datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H:%M")
+        utc_dt = local_dt - datetime.timedelta(hours=timezone_offset)
+        return swe.julday(utc_dt.year, utc_dt.month, utc_dt.day, utc_dt.hour + utc_dt.minute / 60.0)
+
+    births = random_births(n, seed=9)
+    args = [(b['date'], b['time'], b['timezone']) for b in births]
+    components = [tuple(map(int, b['date'].split('-'))) + tuple(map(int, b['time'].split(':')))
+                  + (0, b['timezone']) for b in births]
+    timestamps = [float(k * 3600) for k in range(n)]
+
+    def uncached():
+        get_julian_day.cache_clear()
+        for a in args:
+            get_julian_day(*a)
+
+    repeated = args[:1000] * (n // 1000)  # e.g. the same births and transit dates again
+    columns = [list(col) for col in zip(*args)]
+    cases = [
+        ('strptime (original)', lambda: [strptime_julian_day(*a) for a in args]),
+        ('get_julian_day', uncached),
+        ('get_julian_day, repeated', lambda: [get_julian_day(*a) for a in repeated]),
+        ('julian_day (numeric)', lambda: [julian_day(*c) for c in components]),
+        ('get_julian_days (array)', lambda: get_julian_days(*columns)),
+        ('timestamps (array)', lambda: julian_days_from_timestamps(timestamps)),
+    ]
+    print(f"Julian day conversion ({n} instants)")
+    print(f"{'path':<26}{'us/call':>10}{'speedup':>10}")
+    baseline = None
+    for name, fn in cases:
+        per_call = best_of(fn) / n * 1e6
+        baseline = baseline or per_call
+        print(f"{name:<26}{per_call:>10.2f}{baseline / per_call:>9.1f}x")
+
+@benchmark
+def bench_rectification() -> None:
+    """Birth time sweep: one calculate_chart per step against sweep_birth_times"""
+    import datetime
+    from rectification import sweep_birth_times, _chart_state
+    from vedic_astrology_modular import VedicChartCalculator
+
+    calculator = VedicChartCalculator()
+    place = (12.97, 77.59, 5.5)
+
+    def naive(start_time, hours, resolution):
+        start = datetime.datetime.strptime(f"1990-05-17 {start_time}", "%Y-%m-%d %H:%M")
+        states = []
+        for k in range(int(hours * 3600 / resolution) + 1):
+            moment = start + datetime.timedelta(seconds=k * resolution)
+            chart = calculator.calculate_chart(moment.strftime("%Y-%m-%d"), moment.strftime("%H:%M:%S"),
+                                               *place, as_model=True)
+            states.append(_chart_state(chart))
+        return states
+
+    print("Birth time rectification (Bangalore, 1990-05-17)")
+    print(f"{'window':<22}{'steps':>8}{'naive ms':>11}{'sweep ms':>11}{'speedup':>10}")
+    for start_time, end_time, hours, resolution in [('06:00', '08:00', 2, 60), ('06:00', '08:00', 2, 10),
+                                                    ('00:00', '00:00', 24, 60)]:
+        sweep = best_of(lambda: sweep_birth_times('1990-05-17', start_time, end_time, *place,
+                                                  resolution=resolution, calculator=calculator))
+        slow = best_of(lambda: naive(start_time, hours, resolution), repeat=1)
+        steps = int(hours * 3600 / resolution) + 1
+        print(f"{f'{hours} h @ {resolution} s':<22}{steps:>8}{slow * 1e3:>11.1f}{sweep * 1e3:>11.1f}"
+              f"{slow / sweep:>9.1f}x")
+
+@benchmark
+def bench_timeline() -> None:
+    """Hourly chart timeline: calculate_chart per step against chart_timeline"""
+    import datetime
+    import tracemalloc
+    from vedic_astrology_modular import VedicChartCalculator
+
+    calculator = VedicChartCalculator()
+    place = (28.61, 77.21, 5.5)
+
+    def naive(days):
+        start = datetime.datetime(2000, 1, 1)
+        for k in range(days * 24 + 1):
+            moment = start + datetime.timedelta(hours=k)
+            calculator.calculate_chart(moment.strftime("%Y-%m-%d"), moment.strftime("%H:%M"), *place)
+
+    def timeline(years):
+        return sum(1 for _ in calculator.chart_timeline('2000-01-01', '00:00', f'{2000 + years}-01-01', '00:00',
+                                                        *place))
+
+    print("Hourly chart timeline (Delhi)")
+    naive_rate = (30 * 24 + 1) / best_of(lambda: naive(30), repeat=1)
+    print(f"{'calculate_chart per step, 30 days':<38}{naive_rate:>10,.0f} steps/s")
+    for years in (1, 5):
+        steps = int((datetime.datetime(2000 + years, 1, 1) - datetime.datetime(2000, 1, 1)).total_seconds() // 3600) + 1
+        elapsed = best_of(lambda: timeline(years), repeat=1)
+        tracemalloc.start()
+        timeline(years)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{f'chart_timeline, {years} year(s)':<38}{steps / elapsed:>10,.0f} steps/s"
+              f"{steps / elapsed / naive_rate:>8.1f}x  peak {peak / 1e6:.1f} MB")
+
+@benchmark
+def bench_transit_events() -> None:
+    """Ingress/nakshatra/pada crossings over 10 years: hourly sampling against root finding"""
+    from ephemeris_table import calc_sidereal_batch
+    from chart_model import PADA_SPAN
+    from julian_day import get_julian_day
+    from transit_events import _block_events, find_transit_events
+
+    def hourly_sampling(days):
+        start = get_julian_day('2015-01-01', '00:00', 0.0)
+        previous, changes = None, 0
+        for day in range(days):
+            padas = (calc_sidereal_batch([start + day + k / 24 for k in range(24)])[0] // PADA_SPAN).tolist()
+            for row in padas:
+                changes += previous is not None and sum(a != b for a, b in zip(row, previous))
+                previous = row
+        return changes
+
+    def search():
+        _block_events.cache_clear()
+        return find_transit_events('2015-01-01', '2024-12-31')
+
+    print("Transit events, 2015-2024 (all grahas, sign/nakshatra/pada)")
+    sampled = best_of(lambda: hourly_sampling(365), repeat=1) * 3653 / 365
+    found = best_of(search, repeat=1)
+    cached = best_of(lambda: find_transit_events('2015-01-01', '2024-12-31', 5.5))
+    events = len(find_transit_events('2015-01-01', '2024-12-31', kinds=['pada'])['events'])
+    print(f"{'hourly sampling (to the hour)':<36}{sampled:>9.2f} s  (1 year measured, x10)")
+    print(f"{'root finding (to ~0.01 s)':<36}{found:>9.2f} s  {sampled / found:>6.1f}x  {events} crossings")
+    print(f"{'root finding, cached blocks':<36}{cached:>9.2f} s  {sampled / cached:>6.1f}x")
+
+@benchmark
+def bench_planet_windows() -> None:
+    """Retrograde/combustion windows for transit reports: daily scanning against the shared index"""
+    from ephemeris_table import calc_sidereal_batch
+    from julian_day import get_julian_day
+    from planet_windows import COMBUSTION_ORBS, WINDOW_PLANETS, PlanetWindowIndex, _elongation, transit_windows
+    from chart_model import CHART_GRAHAS
+
+    report_jd = get_julian_day('2024-06-15', '12:00', 5.5)
+    columns = [CHART_GRAHAS.index(name) for name in WINDOW_PLANETS]
+
+    def daily_scan():
+        # Current windows to the day, scanning 200 days either side of the report
+        longitudes, speeds = calc_sidereal_batch([report_jd + day for day in range(-200, 201)])
+        return [[(speeds[k, i] < 0, _elongation(longitudes[k, i], longitudes[k, 0]) <
+                  COMBUSTION_ORBS[name][bool(speeds[k, i] < 0)]) for name, i in zip(WINDOW_PLANETS, columns)]
+                for k in range(len(longitudes))]
+
+    def build(years):
+        index = PlanetWindowIndex()
+        index.ensure(report_jd - years * 182.6, report_jd + years * 182.6)
+        return index
+
+    print("Planet windows for one transit report (Mercury-Saturn, retrograde and combustion)")
+    scanned = best_of(daily_scan, repeat=3)
+    built = best_of(lambda: build(10), repeat=1)
+    transit_windows(report_jd)
+    lookup = best_of(lambda: transit_windows(report_jd), repeat=1000)
+    print(f"{'daily scan (to the day)':<36}{scanned * 1e3:>9.2f} ms")
+    print(f"{'index build, per year (to ~0.01 s)':<36}{built * 1e3 / 10:>9.2f} ms")
+    print(f"{'index lookup':<36}{lookup * 1e3:>9.3f} ms  {scanned / lookup:>8.0f}x")
+
+@benchmark
+def bench_transit_snapshots(n: int = 2000) -> None:
+    """The transit chart for many users on one day: a chart per user against the shared snapshot"""
+    import random
+    from chart_service import ChartService
+    from transit_snapshots import TransitSnapshotStore
+    from vedic_astrology_modular import VedicChartCalculator
+    from planet_windows import transit_windows
+    from julian_day import get_julian_day
+
+    rng = random.Random(5)
+    places = [(rng.uniform(-60, 65), rng.uniform(-180, 180)) for _ in range(n)]
+    calculator = VedicChartCalculator()
+    pool = ChartService(workers=2)
+    pool.calculate_chart('2024-06-15', '12:00', 0.0, 0.0, 5.5, sections={'planets'})  # start the workers
+
+    def per_user():
+        for latitude, longitude in places:
+            calculator.calculate_chart('2024-06-15', '12:00', latitude, longitude, 5.5, sections={'planets'})
+            transit_windows(get_julian_day('2024-06-15', '12:00', 5.5), 5.5)
+
+    def on_workers():
+        for latitude, longitude in places[:200]:
+            pool.calculate_chart('2024-06-15', '12:00', latitude, longitude, 5.5, sections={'planets'})
+
+    def shared():
+        store = TransitSnapshotStore(prefetch_days=0)
+        for latitude, longitude in places:
+            snapshot = store.get('2024-06-15', '12:00', 5.5)
+            snapshot.transit_chart(latitude, longitude)
+            snapshot.planet_windows()
+
+    print(f"Midday transit chart and planet windows for {n:,} users")
+    scratch = best_of(per_user, repeat=3) / n
+    pooled = best_of(on_workers, repeat=1) / 200
+    snapshots = best_of(shared, repeat=3) / n
+    pool.shutdown()
+    print(f"{'chart per user, on a worker':<36}{pooled * 1e6:>9.0f} us")
+    print(f"{'chart per user, in process':<36}{scratch * 1e6:>9.0f} us")
+    print(f"{'shared snapshot':<36}{snapshots * 1e6:>9.0f} us  {scratch / snapshots:>6.1f}x")
+
+@benchmark
+def bench_transit_series(days: int = 365) -> None:
+    """A year of daily transit analysis over one natal chart, one report per day against one series"""
+    import datetime
+    from chart_service import ChartService
+    from transit_calculator import TransitCalculator
+    from transit_snapshots import TransitSnapshotStore
+    from vedic_astrology_modular import VedicChartCalculator
+
+    chart = VedicChartCalculator().calculate_chart('1979-08-23', '17:20', 12.97, 77.59, 5.5)
+    dates = [(datetime.date(2025, 1, 1) + datetime.timedelta(days=k)).isoformat() for k in range(days)]
+    service = ChartService(workers=0)
+
+    def per_day():
+        calculator = TransitCalculator(service, TransitSnapshotStore(prefetch_days=0))
+        for date in dates:
+            calculator.calculate_chart_transits(chart, date)
+
+    def series(end_date, step_hours, output):
+        calculator = TransitCalculator(service, TransitSnapshotStore(prefetch_days=0))
+        return lambda: sum(1 for _ in calculator.iter_transit_series(
+            chart, dates[0], end_date, step_hours=step_hours, output=output))
+
+    print(f"Transit analysis over one natal chart from {dates[0]}")
+    daily = best_of(per_day, repeat=1)
+    rows = best_of(series(dates[-1], 24.0, 'rows'), repeat=3)
+    print(f"{f'{days} daily reports':<36}{daily:>9.2f} s")
+    print(f"{f'{days} daily rows':<36}{rows:>9.2f} s  {daily / rows:>6.1f}x")
+    print(f"{'10 years daily, intervals':<36}{best_of(series('2034-12-31', 24.0, 'intervals'), repeat=1):>9.2f} s")
+    print(f"{'10 years hourly, intervals':<36}{best_of(series('2034-12-31', 1.0, 'intervals'), repeat=1):>9.2f} s")
+
+@benchmark
+def bench_transit_scores(n: int = 1_000_000) -> None:
+    """One day's transits against a subscriber base: a report per chart against one batch score"""
+    import numpy as np
+    from chart_service import ChartService
+    from transit_calculator import TRANSIT_PLANETS, TransitCalculator, natal_array
+    from transit_snapshots import TransitSnapshotStore
+    from vedic_astrology_modular import VedicChartCalculator
+
+    rng = np.random.default_rng(24)
+    calculator = TransitCalculator(ChartService(workers=0), TransitSnapshotStore(prefetch_days=0))
+    charts = [VedicChartCalculator().calculate_chart(f'19{70 + k % 25}-0{1 + k % 9}-1{k % 10}', '06:30',
+                                                     12.97, 77.59, 5.5) for k in range(200)]
+    natal = np.column_stack([rng.integers(0, 12, n), rng.integers(1, 13, (n, len(TRANSIT_PLANETS)))]).astype(np.int8)
+    calculator.score_transits(natal[:1], '2024-06-15', timezone=5.5)  # snapshot and effect tables
+
+    def per_chart():
+        for chart in charts:
+            calculator.get_transit_summary(calculator.calculate_chart_transits(chart, '2024-06-15')['transit_analysis'])
+
+    print(f"Transit summaries for {n:,} natal charts on one day")
+    reports = best_of(per_chart, repeat=3) / len(charts)
+    scored = best_of(lambda: calculator.score_transits(natal, '2024-06-15', timezone=5.5).counts(), repeat=3)
+    summaries = best_of(lambda: list(calculator.score_transits(natal[:10000], '2024-06-15', timezone=5.5).summaries()),
+                        repeat=3) / 10000
+    print(f"{'report per chart (projected)':<36}{reports * n:>9.2f} s")
+    print(f"{'batch score and counts':<36}{scored:>9.2f} s  {reports * n / scored:>6.0f}x")
+    print(f"{'batch summaries (projected)':<36}{summaries * n:>9.2f} s")
+    print(f"{'natal array':<36}{natal.nbytes / 1e6:>9.2f} MB  ({natal_array(charts[:1]).shape[1]} bytes per chart)")
+
+@benchmark
+def bench_transit_alerts(n: int = 100_000) -> None:
+    """Alert precomputation for a subscriber base, and due() against the filled table"""
+    import tempfile
+    import time
+    import numpy as np
+    from julian_day import get_julian_day
+    from transit_alerts import TransitAlertScheduler
+    from transit_calculator import TRANSIT_PLANETS
+
+    rng = np.random.default_rng(25)
+    natal = np.column_stack([rng.integers(0, 12, n), rng.integers(1, 13, (n, len(TRANSIT_PLANETS)))]).astype(np.int8)
+    ids = [f'user{k}' for k in range(n)]
+    start = get_julian_day('2027-01-01', '00:00', 0.0)
+    with tempfile.TemporaryDirectory() as directory:
+        scheduler = TransitAlertScheduler(f'{directory}/alerts.sqlite3', horizon_days=90)
+        began = time.perf_counter()
+        scheduler.subscribe_array(ids, natal, 5.5, now_jd=start)
+        subscribed = time.perf_counter() - began
+        began = time.perf_counter()
+        scheduler.extend(now_jd=start + 30)
+        extended = time.perf_counter() - began
+        alerts = scheduler.stats()['alerts']
+        # Every ingress alerts every subscriber, so ask just before each one
+        queries = [alert['jd'] - 0.01 for alert in scheduler.due(24 * 120, start, chart_id='user0', kinds=['house'])]
+        due = best_of(lambda: [scheduler.due(1, jd, limit=100) for jd in queries], repeat=3) / len(queries)
+        scheduler.close()
+
+    print(f"Transit alerts for {n:,} subscribers ({alerts:,} alerts over 120 days)")
+    print(f"{'subscribe, 90-day horizon':<36}{subscribed:>9.2f} s")
+    print(f"{'extend by 30 days':<36}{extended:>9.2f} s")
+    print(f"{'due in the next hour (100 alerts)':<36}{due * 1e3:>9.2f} ms")
+
+@benchmark
+def bench_yogas(n: int = 1_000_000) -> None:
+    """All yoga rules over a million charts: per chart against one batch of bitmasks"""
+    import numpy as np
+    from vedic_astrology_modular import YOGA_RULES, YOGAS
+
+    rng = np.random.default_rng(1)
+    signs = rng.integers(0, 12, (n, 9))
+    houses = (signs - rng.integers(0, 12, (n, 1))) % 12 + 1
+    strengths, house_strengths = rng.uniform(0, 10, (n, 9)), rng.uniform(0, 12, (n, 12))
+    sample = 20000
+    rows = list(zip(signs[:sample].tolist(), houses[:sample].tolist(),
+                    strengths[:sample].tolist(), house_strengths[:sample].tolist()))
+
+    print(f"{len(YOGA_RULES)} yoga rules over {n:,} charts")
+    single = best_of(lambda: [YOGAS.evaluate(*row) for row in rows], repeat=1) * n / sample
+    batch = best_of(lambda: YOGAS.evaluate_batch(signs, houses, strengths, house_strengths), repeat=3)
+    print(f"{'compiled, chart by chart':<36}{single:>9.2f} s  (20,000 measured)")
+    print(f"{'compiled, one batch of bitmasks':<36}{batch:>9.2f} s  {single / batch:>6.0f}x  "
+          f"{n / batch / 1e6:.1f}M charts/s")
+
+@benchmark
+def bench_dasha(n: int = 20_000) -> None:
+    """Active dashas on many dates: scanning date strings against the numeric timeline; every
+    period of a lifetime in each dasha system"""
+    import datetime
+    import numpy as np
+    from vedic_astrology_modular import (
+        DASHA_SYSTEMS, DashaTree, calculate_antardasha_periods, calculate_birth_nakshatra,
+        calculate_mahadasha_periods, dasha_timeline, get_active_dashas, get_dasha_info
+    )
+
+    def strptime_lookup(periods, date):
+        """The lookup get_dasha_info used: parse every period's dates, scanning in order"""
+        for period in periods:
+            start = datetime.datetime.strptime(period['start_date'], "%Y-%m-%d").date()
+            end = datetime.datetime.strptime(period['end_date'], "%Y-%m-%d").date()
+            if start <= date <= end:
+                return period
+        return None
+
+    birth = datetime.date(1970, 3, 1)
+    days = np.random.default_rng(4).integers(0, 100 * 365, n).tolist()
+    dates = [(birth + datetime.timedelta(days=d)).isoformat() for d in days]
+    mahadashas = calculate_mahadasha_periods(calculate_birth_nakshatra(200.0), birth)
+
+    def scanned():
+        for date in dates:
+            day = datetime.datetime.strptime(date, "%Y-%m-%d").date()
+            mahadasha = strptime_lookup(mahadashas, day)
+            start = datetime.datetime.strptime(mahadasha['start_date'], "%Y-%m-%d").date()
+            strptime_lookup(calculate_antardasha_periods(mahadasha['dasha'], mahadasha['years'], start), day)
+
+    scan = best_of(scanned, repeat=1)
+    timeline = best_of(lambda: get_active_dashas(200.0, '1970-03-01', dates), repeat=3)
+    single = best_of(lambda: [get_dasha_info(200.0, '1970-03-01', date) for date in dates[:2000]], repeat=1) / 2000
+    print(f"Mahadasha and antardasha on {n:,} dates")
+    print(f"{'strptime scan, date by date':<36}{scan:>9.2f} s")
+    print(f"{'numeric timeline, one call':<36}{timeline:>9.3f} s  {scan / timeline:>6.0f}x")
+    print(f"{'get_dasha_info, one date':<36}{single * 1e6:>9.0f} us")
+
+    # Every period of a lifetime, per system, streamed from a fresh tree
+    print("Full lifespan, periods per level")
+    for system in DASHA_SYSTEMS:
+        for level in ('antardasha', 'prana'):
+            def lifespan():
+                tree = DashaTree(dasha_timeline(200.0, '1970-03-01', system))  # nothing expanded yet
+                return sum(1 for _ in tree.iter_level(level, 0.0, float('inf')))
+            count = lifespan()
+            print(f"{f'{system}, {count:,} {level}s':<36}{best_of(lifespan, repeat=1):>9.3f} s")
+
+@benchmark
+def bench_chart_index(n: int = 2_000_000) -> None:
+    """Boolean chart search: scanning chart dicts against the inverted index"""
+    import os
+    import tempfile
+    import numpy as np
+    from chart_index import ChartIndex
+    from vedic_astrology_modular import GRAHAS, NAKSHATRAS, RASIS, YOGAS
+
+    rng = np.random.default_rng(2)
+    nakshatras = rng.integers(0, 27, (n, 9))
+    signs = nakshatras * 4 // 9
+    asc_signs = rng.integers(0, 12, n)
+    houses = (signs - asc_signs[:, None]) % 12 + 1
+    masks = YOGAS.evaluate_batch(signs, houses, rng.uniform(0, 10, (n, 9)), rng.uniform(0, 12, (n, 12)))
+    ids = [f"{k:032x}" for k in range(n)]
+    queries = ['yoga:Gajakesari AND nakshatra:Moon=Rohini', 'house:Venus=7 AND NOT dosha:Kuja',
+               '(yoga:Hamsa OR yoga:Malavya) AND NOT (lagna:Mesha OR lagna:Vrischika)']
+
+    sample = 20000
+    dicts = [{'yogas': YOGAS.flags(mask),
+              'planets': {g: {'sign': RASIS[s], 'house': h, 'nakshatra': NAKSHATRAS[k]}
+                          for g, s, h, k in zip(GRAHAS, srow, hrow, krow)}}
+             for mask, srow, hrow, krow in zip(masks[:sample].tolist(), signs[:sample].tolist(),
+                                               houses[:sample].tolist(), nakshatras[:sample].tolist())]
+    scanned = best_of(lambda: [c for c in dicts if c['yogas']['Gajakesari']
+                               and c['planets']['Moon']['nakshatra'] == 'Rohini'], repeat=1) * n / sample
+
+    with tempfile.TemporaryDirectory() as directory:
+        index = ChartIndex(directory)
+        start = time.perf_counter()
+        index.add_arrays(ids, signs, houses, nakshatras, asc_signs, masks)
+        built = time.perf_counter() - start
+        size = os.path.getsize(os.path.join(directory, 'index.npz'))
+        start = time.perf_counter()
+        ChartIndex(directory)
+        loaded = time.perf_counter() - start
+        print(f"Chart search over {n:,} charts")
+        print(f"{'scan chart dicts (in memory)':<44}{scanned * 1e3:>9.1f} ms  (20,000 measured)")
+        print(f"{'index build + snapshot':<44}{built:>9.2f} s   {size / 1e6:.0f} MB on disk, load {loaded:.2f} s")
+        for query in queries:
+            elapsed = best_of(lambda: index.search(query), repeat=5)
+            print(f"{query[:42]:<44}{elapsed * 1e3:>9.1f} ms  {scanned / elapsed:>6.0f}x  "
+                  f"{index.count(query):,} charts")
+
+@benchmark
+def bench_chart_similarity(n: int = 1_000_000, queries: int = 200) -> None:
+    """Top-10 similar charts: scanning every feature vector against the k-d tree"""
+    import numpy as np
+    from chart_similarity import DISTANCE_METRICS, ChartSimilarityIndex, chart_feature_rows
+    from ephemeris_table import calc_sidereal_batch
+    from vedic_astrology_modular import YOGAS, _batch_strengths
+
+    # Births spread over 1950-2010: graha positions interpolated from a
+    # two-day grid, lagnas uniform
+    rng = np.random.default_rng(6)
+    knots = np.arange(2433282.5, 2455197.5, 2.0)
+    knot_lons, knot_speeds = calc_sidereal_batch(knots)
+    knot_lons = np.degrees(np.unwrap(np.radians(knot_lons), axis=0))
+    jds = rng.uniform(knots[0], knots[-1], n + queries)
+    planet_lons = np.column_stack([np.interp(jds, knots, knot_lons[:, p]) % 360.0 for p in range(9)])
+    speeds = np.column_stack([np.interp(jds, knots, knot_speeds[:, p]) for p in range(9)])
+    asc_lons = rng.uniform(0, 360, n + queries)
+    signs, asc_signs = (planet_lons // 30).astype(np.int64), (asc_lons // 30).astype(np.int64)
+    houses = (signs - asc_signs[:, None]) % 12 + 1
+    _, strengths, _, house_strengths = _batch_strengths(signs, houses, asc_signs, speeds)
+    masks = YOGAS.evaluate_batch(signs, houses, strengths, house_strengths)
+
+    index = ChartSimilarityIndex()
+    start = time.perf_counter()
+    index.add_arrays([f"{k:032x}" for k in range(n)], planet_lons[:n], asc_lons[:n], houses[:n], masks[:n])
+    built = time.perf_counter() - start
+    targets = chart_feature_rows(planet_lons[n:], asc_lons[n:], houses[n:], masks[n:])
+    vectors = index._vectors[:n]
+
+    print(f"Top-10 similar charts among {n:,} ({queries} queries, tree built in {built:.1f} s)")
+    for metric, norm in DISTANCE_METRICS.items():
+        scan = best_of(lambda: [np.argpartition(np.linalg.norm(vectors - target * index._scale, ord=norm, axis=1), 10)[:10]
+                                for target in targets[:5]], repeat=1) / 5
+        tree = best_of(lambda: [index.nearest(target, k=10, metric=metric) for target in targets], repeat=1) / queries
+        print(f"{metric:<12}{'scan':>8}{scan * 1e3:>9.1f} ms   {'tree':>6}{tree * 1e3:>8.2f} ms  {scan / tree:>6.0f}x")
+
+if __name__ == "__main__":
+    for name in sys.argv[1:] or BENCHMARKS:
+        BENCHMARKS[name]()
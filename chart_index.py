@@ -0,0 +1,440 @@
+# =============================================================================
+# CHART INDEX
+# Persistent inverted index of charts by yoga, dosha, placement and nakshatra
+# =============================================================================
+
+import json
+import os
+import re
+import threading
+import numpy as np
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from vedic_astrology_modular import GRAHAS, RASIS, NAKSHATRAS, YOGAS
+
+# Index terms. Yoga rules whose key ends in '_Dosha' are indexed as doshas
+# under the rest of the key (Kuja_Dosha -> 'dosha:Kuja'):
+#   lagna:<rasi>  sign:<graha>=<rasi>  house:<graha>=<1-12>
+#   nakshatra:<graha>=<nakshatra>  yoga:<key>  dosha:<name>
+DOSHA_SUFFIX = '_Dosha'
+
+def _yoga_term(key: str) -> str:
+    return f"dosha:{key[:-len(DOSHA_SUFFIX)]}" if key.endswith(DOSHA_SUFFIX) else f"yoga:{key}"
+
+INDEX_TERMS = (
+    [f"lagna:{rasi}" for rasi in RASIS] +
+    [f"sign:{graha}={rasi}" for graha in GRAHAS for rasi in RASIS] +
+    [f"house:{graha}={house}" for graha in GRAHAS for house in range(1, 13)] +
+    [f"nakshatra:{graha}={nakshatra}" for graha in GRAHAS for nakshatra in NAKSHATRAS] +
+    [_yoga_term(key) for key in YOGAS.keys]
+)
+_TERM_INDEX = {term: i for i, term in enumerate(INDEX_TERMS)}
+_SIGN_BASE = len(RASIS)
+_HOUSE_BASE = _SIGN_BASE + len(GRAHAS) * 12
+_NAKSHATRA_BASE = _HOUSE_BASE + len(GRAHAS) * 12
+_YOGA_BASE = _NAKSHATRA_BASE + len(GRAHAS) * len(NAKSHATRAS)
+_YOGA_NAME_KEYS = dict(zip(YOGAS.names, YOGAS.keys))
+
+# The log of added charts is folded into the snapshot after this many entries
+COMPACT_LOG_ENTRIES = 10000
+
+def chart_terms(chart: Dict[str, Any]) -> List[str]:
+    """Index terms of a chart dict (either output shape)"""
+    planets = chart['planets']
+    lagna = chart['lagna']
+    terms = [f"lagna:{lagna.get('sign', lagna.get('rasi'))}"]
+    for graha in GRAHAS:
+        planet = planets[graha]
+        terms += [f"sign:{graha}={planet.get('sign', planet.get('rasi'))}",
+                  f"house:{graha}={planet['house']}",
+                  f"nakshatra:{graha}={planet['nakshatra']}"]
+    yogas = chart.get('yogas', {})
+    present = [key for key, flag in yogas.items() if flag] if isinstance(yogas, dict) else \
+        [_YOGA_NAME_KEYS.get(name, name) for name in yogas]
+    # Yogas no longer in YOGA_RULES (e.g. in charts cached earlier) are skipped
+    terms += [_yoga_term(key) for key in present if _yoga_term(key) in _TERM_INDEX]
+    return terms
+
+def _term_rows(signs: np.ndarray, houses: np.ndarray, nakshatras: np.ndarray,
+               asc_signs: np.ndarray) -> np.ndarray:
+    """(N, 28) term indices of the lagna and each graha's sign, house and nakshatra"""
+    grahas = np.arange(len(GRAHAS))
+    return np.hstack([
+        np.asarray(asc_signs)[:, None],
+        _SIGN_BASE + grahas * 12 + signs,
+        _HOUSE_BASE + grahas * 12 + houses - 1,
+        _NAKSHATRA_BASE + grahas * len(NAKSHATRAS) + nakshatras
+    ]).astype(np.int64)
+
+# =============================================================================
+# QUERIES
+# =============================================================================
+
+_TOKEN = re.compile(r"\s*(\(|\)|[^\s()]+)")
+
+def _parse_query(query: str) -> Any:
+    """Parse 'term AND (term OR NOT term)' into nested tuples.
+
+    AND binds tighter than OR; keywords are case-insensitive.
+    """
+    tokens = _TOKEN.findall(query)
+    position = 0
+
+    def peek() -> Optional[str]:
+        return tokens[position] if position < len(tokens) else None
+
+    def take() -> str:
+        nonlocal position
+        if position >= len(tokens):
+            raise ValueError(f"Incomplete query: {query!r}")
+        position += 1
+        return tokens[position - 1]
+
+    def either() -> Any:
+        node = both()
+        while (peek() or '').upper() == 'OR':
+            take()
+            node = ('or', node, both())
+        return node
+
+    def both() -> Any:
+        node = negation()
+        while (peek() or '').upper() == 'AND':
+            take()
+            node = ('and', node, negation())
+        return node
+
+    def negation() -> Any:
+        token = take()
+        if token.upper() == 'NOT':
+            return ('not', negation())
+        if token == '(':
+            node = either()
+            if take() != ')':
+                raise ValueError(f"Unbalanced parentheses in query: {query!r}")
+            return node
+        if token == ')' or token.upper() in ('AND', 'OR'):
+            raise ValueError(f"Unexpected {token!r} in query: {query!r}")
+        if token not in _TERM_INDEX:
+            raise ValueError(f"Unknown index term: {token}")
+        return ('term', _TERM_INDEX[token])
+
+    node = either()
+    if peek() is not None:
+        raise ValueError(f"Unexpected {peek()!r} in query: {query!r}")
+    return node
+
+# =============================================================================
+# INDEX
+# =============================================================================
+
+_POPCOUNT = np.array([bin(byte).count('1') for byte in range(256)], dtype=np.int64)
+
+def _unpack(words: np.ndarray) -> np.ndarray:
+    """One 0/1 byte per row of a bitmap"""
+    return np.unpackbits(words.astype('<u8').view(np.uint8), bitorder='little')
+
+def _set_rows(words: np.ndarray) -> np.ndarray:
+    """Rows whose bits are set in a bitmap, in order.
+
+    Takes the lowest set bit of every non-zero word at once, so it loops
+    only as often as the fullest word has bits.
+    """
+    index = np.flatnonzero(words)
+    remaining = words[index]
+    found = []
+    one = np.uint64(1)
+    while len(index):
+        lowest = remaining & (~remaining + one)
+        found.append(index * 64 + np.log2(lowest.astype(np.float64)).astype(np.int64))
+        remaining = remaining & (remaining - one)
+        keep = remaining != 0
+        index, remaining = index[keep], remaining[keep]
+    return np.sort(np.concatenate(found)) if found else np.zeros(0, dtype=np.int64)
+
+class ChartIndex:
+    """Inverted index from terms to the charts that have them.
+
+    Each term is a bitmap over chart rows (64 rows per uint64 word), so a
+    boolean query is a few word-wise AND/OR/NOT passes however many charts
+    are indexed. Charts are identified by caller-chosen IDs (the app uses
+    the chart's cache key); adding an ID again replaces its terms.
+
+    The index lives in ``directory``: a snapshot (``index.npz``) plus a log
+    of charts added since (``log.jsonl``), folded into the snapshot by
+    save() and, every COMPACT_LOG_ENTRIES charts, by a background thread.
+    A snapshot is written from a copy of the bitmaps, so searches wait only
+    for the copy. One process should write to a directory at a time.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # one snapshot written at a time
+        self._compacting = False
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._bits = np.zeros((len(INDEX_TERMS), 0), dtype=np.uint64)
+        self._alive = np.zeros(0, dtype=np.uint64)
+        self._logged = 0
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @property
+    def _snapshot_path(self) -> str:
+        return os.path.join(self.directory, 'index.npz')
+
+    @property
+    def _log_path(self) -> str:
+        return os.path.join(self.directory, 'log.jsonl')
+
+    @property
+    def _saving_log_path(self) -> str:
+        """The log entries a snapshot being written covers (kept until it is in place)"""
+        return os.path.join(self.directory, 'log.saving.jsonl')
+
+    def _reserve(self, rows: int) -> None:
+        """Grow the bitmaps to hold ``rows`` rows"""
+        words = (rows + 63) // 64
+        if words > self._bits.shape[1]:
+            capacity = max(words, 2 * self._bits.shape[1], 16)
+            bits = np.zeros((len(INDEX_TERMS), capacity), dtype=np.uint64)
+            bits[:, :self._bits.shape[1]] = self._bits
+            alive = np.zeros(capacity, dtype=np.uint64)
+            alive[:len(self._alive)] = self._alive
+            self._bits, self._alive = bits, alive
+
+    def _set_row(self, chart_id: str, terms: Iterable[int]) -> None:
+        row = self._rows.get(chart_id)
+        if row is None:
+            row = len(self._ids)
+            self._reserve(row + 1)
+            self._ids.append(chart_id)
+            self._rows[chart_id] = row
+        word, bit = row >> 6, np.uint64(1 << (row & 63))
+        self._bits[:, word] &= ~bit
+        self._bits[list(terms), word] |= bit
+        self._alive[word] |= bit
+
+    def _drop_row(self, chart_id: str) -> bool:
+        row = self._rows.pop(chart_id, None)
+        if row is None:
+            return False
+        word, bit = row >> 6, np.uint64(1 << (row & 63))
+        self._bits[:, word] &= ~bit
+        self._alive[word] &= ~bit
+        return True
+
+    def _append_log(self, entries: List[Dict[str, Any]]) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._log_path, 'a', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + '\n')
+        self._logged += len(entries)
+        if self._logged >= COMPACT_LOG_ENTRIES and not self._compacting:
+            self._compacting = True
+            threading.Thread(target=self._compact, name='chart-index-compact', daemon=True).start()
+
+    def _compact(self) -> None:
+        try:
+            self.save()
+        except Exception as e:
+            print(f"Chart index compaction failed: {e}")
+        finally:
+            with self._lock:
+                self._compacting = False
+
+    def add(self, chart_id: str, chart: Dict[str, Any]) -> None:
+        """Index (or re-index) one chart dict under ``chart_id``"""
+        terms = chart_terms(chart)
+        with self._lock:
+            self._set_row(chart_id, [_TERM_INDEX[term] for term in terms])
+            self._append_log([{'id': chart_id, 'terms': terms}])
+
+    def add_arrays(self, chart_ids: Sequence[str], signs: np.ndarray, houses: np.ndarray,
+                   nakshatras: np.ndarray, asc_signs: np.ndarray, yoga_masks: np.ndarray) -> None:
+        """Index many charts from batch arrays: (N, 9) sign indices, houses
+        1-12 and nakshatra indices in GRAHAS order, (N,) lagna sign indices
+        and YOGAS bitmasks. Writes a new snapshot rather than the log."""
+        if len(set(chart_ids)) != len(chart_ids):
+            raise ValueError("chart_ids has duplicates")
+        term_rows = _term_rows(signs, houses, nakshatras, asc_signs)
+        yoga_masks = np.asarray(yoga_masks, dtype=np.int64)
+        with self._lock:
+            existing = [k for k, chart_id in enumerate(chart_ids) if chart_id in self._rows] if self._rows else []
+            for k in existing:
+                yogas = [_YOGA_BASE + bit for bit in range(len(YOGAS.keys)) if yoga_masks[k] >> bit & 1]
+                self._set_row(chart_ids[k], term_rows[k].tolist() + yogas)
+            if len(existing) < len(chart_ids):
+                keep = np.ones(len(chart_ids), dtype=bool)
+                keep[existing] = False
+                fresh = np.flatnonzero(keep)
+                new_ids = [chart_ids[k] for k in fresh.tolist()] if existing else list(chart_ids)
+                start = len(self._ids)
+                self._ids.extend(new_ids)
+                self._rows.update(zip(new_ids, range(start, start + len(new_ids))))
+                self._reserve(len(self._ids))
+                self._or_rows(start, term_rows[fresh], yoga_masks[fresh])
+        self.save()
+
+    def _or_rows(self, start: int, term_rows: np.ndarray, yoga_masks: np.ndarray) -> None:
+        """Set the bits of consecutive new rows from ``start`` on, one term at a time"""
+        # Shift the rows so the first lands on its bit of word ``first``; the
+        # padding around them never matches a term
+        count, pad, first = len(term_rows), start & 63, start >> 6
+        width = pad + count + (-(pad + count) % 64)
+        rows = slice(pad, pad + count)
+        columns = np.full((term_rows.shape[1], width), len(INDEX_TERMS), dtype=np.uint16)
+        columns[:, rows] = term_rows.T
+        masks = np.zeros(width, dtype=np.int64)
+        masks[rows] = yoga_masks
+        present = np.zeros(width, dtype=bool)
+        present[rows] = True
+
+        def or_into(target: np.ndarray, matches: np.ndarray) -> None:
+            target[first:first + width // 64] |= np.packbits(matches, bitorder='little').view('<u8')
+
+        or_into(self._alive, present)
+        for values in columns:
+            for term in range(int(values[rows].min()), int(values[rows].max()) + 1):
+                or_into(self._bits[term], values == term)
+        for bit in range(len(YOGAS.keys)):
+            or_into(self._bits[_YOGA_BASE + bit], (masks >> bit) & 1 == 1)
+
+    def remove(self, chart_id: str) -> bool:
+        """Drop a chart from the index; False if it was not indexed"""
+        with self._lock:
+            if not self._drop_row(chart_id):
+                return False
+            self._append_log([{'id': chart_id, 'removed': True}])
+            return True
+
+    def _evaluate(self, node: Any, words: int) -> np.ndarray:
+        op = node[0]
+        if op == 'term':
+            return self._bits[node[1], :words]
+        if op == 'not':
+            return ~self._evaluate(node[1], words) & self._alive[:words]
+        combine = np.bitwise_and if op == 'and' else np.bitwise_or
+        return combine(self._evaluate(node[1], words), self._evaluate(node[2], words))
+
+    def _match(self, query: str) -> np.ndarray:
+        node = _parse_query(query)
+        words = (len(self._ids) + 63) // 64
+        return self._evaluate(node, words) & self._alive[:words]
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[str]:
+        """IDs of the charts matching ``query``, in the order they were indexed.
+
+        e.g. 'yoga:Gajakesari AND nakshatra:Moon=Rohini' or
+        'house:Venus=7 AND NOT dosha:Kuja'; see INDEX_TERMS for the terms.
+        """
+        with self._lock:
+            rows = _set_rows(self._match(query))
+            if limit is not None:
+                rows = rows[:limit]
+            return [self._ids[row] for row in rows.tolist()]
+
+    def count(self, query: str) -> int:
+        """Number of charts matching ``query``"""
+        with self._lock:
+            return int(_POPCOUNT[self._match(query).astype('<u8').view(np.uint8)].sum())
+
+    def save(self) -> None:
+        """Write a snapshot and clear the log. Searches and adds wait only while
+        the bitmaps are copied and the log is set aside, not for the write."""
+        with self._save_lock:
+            with self._lock:
+                words = (len(self._ids) + 63) // 64
+                ids = list(self._ids)
+                bits, alive = self._bits[:, :words].copy(), self._alive[:words].copy()
+                self._set_log_aside()
+            os.makedirs(self.directory, exist_ok=True)
+            temporary = self._snapshot_path + '.tmp.npz'
+            np.savez(temporary, terms=np.array(INDEX_TERMS),
+                     ids=np.array([chart_id.encode('utf-8') for chart_id in ids], dtype=bytes),
+                     bits=bits, alive=alive)
+            os.replace(temporary, self._snapshot_path)
+            if os.path.exists(self._saving_log_path):
+                os.remove(self._saving_log_path)
+
+    def _set_log_aside(self) -> None:
+        """Move the log's entries to the saving log (hold _lock); later entries start a new log"""
+        if os.path.exists(self._log_path):
+            if os.path.exists(self._saving_log_path):
+                # Left by a failed save: its entries are not in any snapshot yet
+                with open(self._log_path, 'r', encoding='utf-8') as f, \
+                        open(self._saving_log_path, 'a', encoding='utf-8') as saving:
+                    saving.write(f.read())
+                os.remove(self._log_path)
+            else:
+                os.replace(self._log_path, self._saving_log_path)
+        self._logged = 0
+
+    def _load(self) -> None:
+        if os.path.exists(self._snapshot_path):
+            with np.load(self._snapshot_path) as snapshot:
+                self._ids = [chart_id.decode('utf-8') for chart_id in snapshot['ids'].tolist()]
+                alive, bits = snapshot['alive'], snapshot['bits']
+                self._reserve(len(self._ids))
+                self._alive[:len(alive)] = alive
+                # Terms are matched by name, so a changed vocabulary keeps what it can
+                for i, term in enumerate(snapshot['terms'].tolist()):
+                    if term in _TERM_INDEX:
+                        self._bits[_TERM_INDEX[term], :len(alive)] = bits[i]
+            self._rows = {chart_id: row for row, (chart_id, present) in
+                          enumerate(zip(self._ids, _unpack(self._alive).tolist())) if present}
+        interrupted = os.path.exists(self._saving_log_path)
+        for path in (self._saving_log_path, self._log_path):
+            if not os.path.exists(path):
+                continue
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # a line cut short by a crash
+                    if entry.get('removed'):
+                        self._drop_row(entry['id'])
+                    else:
+                        self._set_row(entry['id'], [_TERM_INDEX[t] for t in entry['terms'] if t in _TERM_INDEX])
+                    self._logged += 1
+        if interrupted:
+            self.save()  # finish the save a crash interrupted
+
+    def index_cache(self, cache_dir: str) -> int:
+        """Index every chart result in a cache directory (by cache key); returns the count"""
+        added = 0
+        for chart_id, chart in cached_charts(cache_dir):
+            self.add(chart_id, chart)
+            added += 1
+        return added
+
+def cached_charts(cache_dir: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """(cache key, chart) for every chart result in a cache directory"""
+    for filename in sorted(os.listdir(cache_dir)) if os.path.isdir(cache_dir) else []:
+        if not filename.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(cache_dir, filename), 'r', encoding='utf-8') as f:
+                chart = json.load(f)['data']['chart']
+        except (json.JSONDecodeError, KeyError, TypeError):
+            continue  # not a chart result
+        if isinstance(chart, dict) and 'planets' in chart and 'lagna' in chart:
+            yield filename[:-len('.json')], chart
+
+# Global chart index instance
+chart_index = ChartIndex(os.environ.get('CHART_INDEX_DIR', 'chart_index'))
+
+print("✅ Chart index loaded!")
+
+if __name__ == "__main__":
+    import sys
+    from cache_manager import cache_manager
+    if sys.argv[1:] != ['rebuild']:
+        print("Usage: python chart_index.py rebuild   (index every chart in the cache directory)")
+        sys.exit(1)
+    count = chart_index.index_cache(cache_manager.cache_dir)
+    chart_index.save()
+    print(f"Indexed {count} cached charts in {chart_index.directory}")
@@ -0,0 +1,246 @@
+# =============================================================================
+# CHART SERVICE
+# Runs chart calculations in a pool of worker processes
+# =============================================================================
+
+import os
+import logging
+import threading
+import weakref
+import multiprocessing
+import swisseph as swe
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from ephemeris_table import DEFAULT_AYANAMSA, DEFAULT_SID_MODE, get_ephemeris_table, use_ephemeris_table
+from vedic_astrology_modular import VedicChartCalculator
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TASK_TIMEOUT = float(os.environ.get('CHART_TASK_TIMEOUT', 30))
+
+# Pool failures after which the service stays synchronous
+MAX_POOL_FAILURES = 3
+
+class ChartServiceBusy(RuntimeError):
+    """Raised when the service's queue of pending tasks is full"""
+
+class ChartTaskTimeout(TimeoutError):
+    """Raised when a task does not finish within its timeout"""
+
+# Per-process state, set up once by _init_worker (and lazily in the parent
+# for the synchronous fallback)
+_calculators: Dict[str, VedicChartCalculator] = {}
+
+def _init_worker(ephe_path: str, table_path: Optional[str]) -> None:
+    """Initialize Swiss Ephemeris state once per worker process"""
+    swe.set_ephe_path(ephe_path)
+    swe.set_sid_mode(DEFAULT_SID_MODE)
+    if table_path:
+        use_ephemeris_table(table_path)
+
+def _get_calculator(output: str) -> VedicChartCalculator:
+    calculator = _calculators.get(output)
+    if calculator is None:
+        calculator = _calculators[output] = VedicChartCalculator(output)
+    return calculator
+
+def _chart_task(birth: Dict[str, Any], output: str, sections: Optional[List[str]]) -> Dict[str, Any]:
+    """Worker entry point: calculate one chart"""
+    return _get_calculator(output).calculate_chart(**birth, sections=sections)
+
+class ChartService:
+    """Process pool for CPU-bound chart work.
+
+    Workers are started on first use and each initializes ephemeris state
+    once. At most ``max_pending`` tasks are queued or running at a time;
+    submitting beyond that waits up to ``queue_wait`` seconds and then raises
+    ChartServiceBusy. Results are awaited for at most ``task_timeout``
+    seconds (ChartTaskTimeout); a task still running at its timeout has its
+    pool stopped, so a stuck worker gives back its slot and the next
+    submission starts fresh workers (tasks caught in that pool rerun in the
+    calling thread). With ``workers=0``, or if the pool cannot be
+    started or breaks, tasks run synchronously in the calling thread; after
+    MAX_POOL_FAILURES broken pools the service stays synchronous.
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_pending: Optional[int] = None,
+                 task_timeout: float = DEFAULT_TASK_TIMEOUT, queue_wait: float = 1.0,
+                 start_method: str = 'spawn'):
+        if workers is None:
+            workers = int(os.environ.get('CHART_WORKERS', os.cpu_count() or 1))
+        self.workers = max(0, workers)
+        self.max_pending = max_pending or int(os.environ.get('CHART_QUEUE_SIZE', max(1, self.workers) * 4))
+        self.task_timeout = task_timeout
+        self.queue_wait = queue_wait
+        self.start_method = start_method
+        self._executor = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._calls = weakref.WeakKeyDictionary()  # future -> (executor, fn, args, kwargs), for the fallback
+        self._holding = set()  # pooled futures whose slot is not yet given back
+        self._stats = {'submitted': 0, 'completed': 0, 'synchronous': 0,
+                       'timeouts': 0, 'rejected': 0, 'pool_failures': 0, 'recycled': 0}
+        self._stats_lock = threading.Lock()  # counters are bumped from request and pool threads
+
+    def _count(self, name: str) -> int:
+        """Add one to a counter; returns its new value"""
+        with self._stats_lock:
+            self._stats[name] += 1
+            return self._stats[name]
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        """The worker pool, started on first use (None when running synchronously)"""
+        if self.workers == 0:
+            return None
+        with self._lock:
+            if self._executor is None:
+                table = get_ephemeris_table()
+                try:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context(self.start_method),
+                        initializer=_init_worker,
+                        initargs=(os.path.abspath('.'), table.path if table else None)
+                    )
+                except (OSError, ValueError, NotImplementedError) as e:
+                    logger.error(f"❌ Could not start chart workers, running synchronously: {e}")
+                    self.workers = 0
+                    return None
+                logger.info(f"🚀 Started {self.workers} chart worker processes")
+            return self._executor
+
+    def _run_inline(self, fn: Callable, args: tuple, kwargs: dict) -> Future:
+        """Synchronous fallback: run in the calling thread, wrapped in a finished Future"""
+        self._count('synchronous')
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def _pool_broken(self, executor: ProcessPoolExecutor, error: Exception) -> None:
+        """Drop a broken pool; the next submission starts a fresh one"""
+        with self._lock:
+            if self._executor is not executor:
+                return  # already dropped or recycled
+            self._executor = None
+        logger.error(f"❌ Chart worker pool failed: {error}")
+        if self._count('pool_failures') >= MAX_POOL_FAILURES and self.workers:
+            logger.error("❌ Chart workers keep failing, running synchronously from now on")
+            self.workers = 0
+        executor.shutdown(wait=False)
+
+    def _recycle(self, future: Future) -> None:
+        """Stop the pool running a timed-out task and give back its slot"""
+        executor = self._calls[future][0]
+        self._release(future)
+        with self._lock:
+            if self._executor is not executor:
+                return  # already dropped or recycled
+            self._executor = None
+        logger.warning("⚠️ Chart task overran its timeout, restarting the chart workers")
+        self._count('recycled')
+        # cancel() cannot stop a running task, so stop its worker; the pool's
+        # other futures then fail with BrokenProcessPool and give back their slots
+        for process in list(executor._processes.values()):
+            process.terminate()
+        executor.shutdown(wait=False)
+
+    def submit(self, fn: Callable, *args: Any, **kwargs: Any) -> Future:
+        """Queue fn(*args, **kwargs) on the pool (fn and its arguments must pickle)"""
+        executor = self._get_executor()
+        if executor is None:
+            return self._run_inline(fn, args, kwargs)
+        if not self._slots.acquire(timeout=self.queue_wait):
+            self._count('rejected')
+            raise ChartServiceBusy(f"Chart service queue is full ({self.max_pending} pending tasks)")
+        try:
+            future = executor.submit(fn, *args, **kwargs)
+        except (BrokenProcessPool, RuntimeError) as e:
+            self._slots.release()
+            self._pool_broken(executor, e)
+            return self._run_inline(fn, args, kwargs)
+        self._count('submitted')
+        self._calls[future] = (executor, fn, args, kwargs)
+        with self._lock:
+            self._holding.add(future)
+        future.add_done_callback(self._task_done)
+        return future
+
+    def _release(self, future: Future) -> None:
+        """Give back a pooled task's slot, once"""
+        with self._lock:
+            if future not in self._holding:
+                return
+            self._holding.discard(future)
+        self._slots.release()
+
+    def _task_done(self, future: Future) -> None:
+        self._release(future)
+        if not future.cancelled():
+            self._count('completed')
+
+    def result(self, future: Future, timeout: Optional[float] = None) -> Any:
+        """Wait for a submitted task, raising ChartTaskTimeout after the timeout"""
+        timeout = self.task_timeout if timeout is None else timeout
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            self._count('timeouts')
+            if not future.cancel() and not future.done():
+                self._recycle(future)
+            raise ChartTaskTimeout(f"Chart task did not finish within {timeout:.1f}s")
+        except BrokenProcessPool as e:
+            executor, fn, args, kwargs = self._calls[future]
+            self._pool_broken(executor, e)
+            return self._run_inline(fn, args, kwargs).result()
+
+    def run(self, fn: Callable, *args: Any, timeout: Optional[float] = None, **kwargs: Any) -> Any:
+        """Submit a task and wait for its result"""
+        return self.result(self.submit(fn, *args, **kwargs), timeout)
+
+    def submit_chart(self, date: str, time: str, latitude: float, longitude: float, timezone: float,
+                     output: str = 'modular', sections: Optional[Iterable[str]] = None,
+                     ayanamsa: str = DEFAULT_AYANAMSA) -> Future:
+        """Queue one chart calculation (see VedicChartCalculator.calculate_chart)"""
+        birth = {'date': date, 'time': time, 'latitude': latitude,
+                 'longitude': longitude, 'timezone': timezone, 'ayanamsa': ayanamsa}
+        return self.submit(_chart_task, birth, output, sorted(sections) if sections is not None else None)
+
+    def calculate_chart(self, date: str, time: str, latitude: float, longitude: float, timezone: float,
+                        output: str = 'modular', sections: Optional[Iterable[str]] = None,
+                        ayanamsa: str = DEFAULT_AYANAMSA, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Calculate one chart in a worker and wait for it"""
+        return self.result(self.submit_chart(date, time, latitude, longitude, timezone,
+                                             output, sections, ayanamsa), timeout)
+
+    def calculate_charts(self, births: Iterable[Dict[str, Any]], output: str = 'modular',
+                         sections: Optional[Iterable[str]] = None,
+                         timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Calculate several charts in parallel, returned in input order
+
+        Each birth may carry its own 'ayanamsa'.
+        """
+        futures = [self.submit_chart(**birth, output=output, sections=sections) for birth in births]
+        return [self.result(future, timeout) for future in futures]
+
+    def stats(self) -> Dict[str, Any]:
+        """Task counters and pool configuration"""
+        with self._stats_lock:
+            counters = dict(self._stats)
+        return {**counters, 'workers': self.workers, 'max_pending': self.max_pending,
+                'running': self._executor is not None}
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the worker processes (a later submission starts new ones)"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+# Global chart service instance
+chart_service = ChartService()
+
+print("✅ Chart service loaded!")
@@ -0,0 +1,452 @@
+# =============================================================================
+# CHART SIMILARITY
+# Nearest-neighbour search over chart feature vectors, for "charts like yours"
+# and duplicate birth detection
+# =============================================================================
+
+import heapq
+import json
+import os
+import threading
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+from vedic_astrology_modular import GRAHAS, YOGAS
+from chart_index import cached_charts
+
+# Feature groups in vector order: sin and cos of each graha's longitude and
+# of the lagna, the number of grahas in each house, and one 0/1 per yoga
+# rule. A group's weight scales its features, so it sets how much a
+# difference there moves the distance.
+FEATURE_GROUPS = ('planets', 'lagna', 'houses', 'yogas')
+FEATURE_SIZES = {'planets': 2 * len(GRAHAS), 'lagna': 2, 'houses': 12, 'yogas': len(YOGAS.keys)}
+FEATURE_WEIGHTS = {'planets': 1.0, 'lagna': 1.0, 'houses': 0.25, 'yogas': 0.5}
+
+# Distance metrics (Minkowski norms) that queries can use
+DISTANCE_METRICS = {'euclidean': 2, 'manhattan': 1, 'chebyshev': np.inf}
+
+# Charts closer than this (euclidean, default weights) are treated as the
+# same birth: about 3-4 minutes of birth time at one place
+DUPLICATE_DISTANCE = 0.02
+
+# Rows per tree leaf, and rows sampled to choose each split
+LEAF_SIZE = 32
+SPLIT_SAMPLE = 256
+
+# Charts added since the tree was built are scanned directly until there
+# are more than this many, and more than a sixteenth of the tree
+REBUILD_MIN_PENDING = 1024
+
+_YOGA_NAME_KEYS = dict(zip(YOGAS.names, YOGAS.keys))
+
+def chart_feature_rows(planet_lons: np.ndarray, asc_lons: np.ndarray, houses: np.ndarray,
+                       yoga_masks: np.ndarray) -> np.ndarray:
+    """(N, D) unweighted feature vectors from batch arrays: (N, 9) graha
+    longitudes and houses 1-12 in GRAHAS order, (N,) lagna longitudes and
+    YOGAS bitmasks"""
+    planet_radians = np.radians(np.asarray(planet_lons, dtype=float))
+    asc_radians = np.radians(np.asarray(asc_lons, dtype=float))
+    houses = np.asarray(houses)
+    n = len(houses)
+    occupancy = np.bincount((np.arange(n)[:, None] * 12 + houses - 1).ravel(), minlength=n * 12).reshape(n, 12)
+    yogas = (np.asarray(yoga_masks, dtype=np.int64)[:, None] >> np.arange(len(YOGAS.keys))) & 1
+    return np.hstack([np.sin(planet_radians), np.cos(planet_radians),
+                      np.sin(asc_radians)[:, None], np.cos(asc_radians)[:, None],
+                      occupancy, yogas])
+
+def chart_features(chart: Dict[str, Any]) -> np.ndarray:
+    """Unweighted feature vector of a chart dict (either output shape)"""
+    planets = [chart['planets'][graha] for graha in GRAHAS]
+    lagna = chart['lagna']
+    yogas = chart.get('yogas', {})
+    present = [key for key, flag in yogas.items() if flag] if isinstance(yogas, dict) else \
+        [_YOGA_NAME_KEYS.get(name, name) for name in yogas]
+    mask = sum(1 << YOGAS.keys.index(key) for key in present if key in YOGAS.keys)
+    return chart_feature_rows([[planet['longitude'] for planet in planets]],
+                              [lagna.get('degree', lagna.get('longitude'))],
+                              [[planet['house'] for planet in planets]], [mask])[0]
+
+def _kd_tree(points: np.ndarray, leaf_size: int) -> Tuple[np.ndarray, ...]:
+    """Order rows into a k-d tree with a bounding box per node.
+
+    Each node splits its rows at the median of their widest feature, as
+    judged from a sample of SPLIT_SAMPLE or so rows. Returns the tree
+    order of the rows, the rows in that order and, per node (parents
+    before children), its start and end in that order, its first child
+    (the second is next to it; -1 for leaves) and the per-feature minima
+    and maxima of its rows.
+    """
+    order = np.arange(len(points))
+    starts, ends, children = [0], [len(points)], [-1]
+    node = 0
+    while node < len(starts):
+        start, end = starts[node], ends[node]
+        if end - start > leaf_size:
+            rows = order[start:end]
+            sample = points[rows[::max(1, (end - start) // SPLIT_SAMPLE)]]
+            widest = int(np.argmax(sample.max(axis=0) - sample.min(axis=0)))
+            half = (end - start) // 2
+            order[start:end] = rows[np.argpartition(points[rows, widest], half)]
+            children[node] = len(starts)
+            starts += [start, start + half]
+            ends += [start + half, end]
+            children += [-1, -1]
+        node += 1
+
+    points = points[order]
+    # Boxes from the leaves up
+    lows = np.empty((len(starts), points.shape[1]), dtype=points.dtype)
+    highs = np.empty_like(lows)
+    for node in reversed(range(len(starts))):
+        first = children[node]
+        if first < 0:
+            block = points[starts[node]:ends[node]]
+            lows[node], highs[node] = block.min(axis=0), block.max(axis=0)
+        else:
+            lows[node] = np.minimum(lows[first], lows[first + 1])
+            highs[node] = np.maximum(highs[first], highs[first + 1])
+    return order, points, np.array(starts), np.array(ends), np.array(children), lows, highs
+
+def _norms(rows: np.ndarray, norm: float) -> np.ndarray:
+    """Minkowski norm of each row"""
+    if norm == 2:
+        return np.sqrt(np.einsum('ij,ij->i', rows, rows))
+    if norm == 1:
+        return np.abs(rows).sum(axis=1)
+    return np.abs(rows).max(axis=1)
+
+class ChartSimilarityIndex:
+    """Top-K nearest charts by weighted feature distance.
+
+    Charts are held by ID (the app uses the chart's cache key) as weighted
+    feature vectors in a k-d tree. A query walks the nodes nearest first
+    and skips every node whose bounding box is further than the current
+    K-th neighbour, so it reads a small part of the index. Charts
+    added after the tree is built are scanned directly until there are
+    enough to rebuild it, which a background thread does; adding an ID
+    again replaces its chart.
+
+    With ``path``, the index is kept in that .npz file plus a log of
+    charts added or removed since (``<name>.log.jsonl``), folded into the
+    file by save(), add_arrays(), index_cache() and each rebuild. An
+    existing file is loaded, with its own weights. One process should
+    write to a path at a time.
+    """
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None, leaf_size: int = LEAF_SIZE,
+                 path: Optional[str] = None):
+        unknown = set(weights or {}) - set(FEATURE_GROUPS)
+        if unknown:
+            raise ValueError(f"Unknown feature groups: {sorted(unknown)}")
+        self.leaf_size = leaf_size
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()  # one tree built at a time
+        self._rebuilding = False
+        self._set_weights(dict(FEATURE_WEIGHTS, **(weights or {})))
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._vectors = np.zeros((0, len(self._scale)), dtype=np.float32)
+        self._alive = np.zeros(0, dtype=bool)
+        self._tree_rows = 0
+        self._set_tree(*self._empty_tree())
+        self.path = path
+        if path is not None:
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @property
+    def _log_path(self) -> str:
+        return os.path.splitext(self.path)[0] + '.log.jsonl'
+
+    @property
+    def _saving_log_path(self) -> str:
+        """The log entries a file being written covers (kept until it is in place)"""
+        return os.path.splitext(self.path)[0] + '.log.saving.jsonl'
+
+    def _set_weights(self, weights: Dict[str, float]) -> None:
+        self.weights = weights
+        self._scale = np.concatenate([np.full(FEATURE_SIZES[group], weights[group])
+                                      for group in FEATURE_GROUPS])
+
+    def _empty_tree(self) -> Tuple[np.ndarray, ...]:
+        box = np.zeros((1, len(self._scale)), dtype=np.float32)
+        return np.zeros(1, dtype=np.int64), np.zeros(1, dtype=np.int64), np.full(1, -1), box, box
+
+    def _set_tree(self, starts: np.ndarray, ends: np.ndarray, children: np.ndarray,
+                  lows: np.ndarray, highs: np.ndarray) -> None:
+        self._starts, self._ends, self._children = starts.tolist(), ends.tolist(), children.tolist()
+        self._lows, self._highs = lows, highs
+
+    def _append(self, chart_ids: Sequence[str], features: np.ndarray) -> None:
+        """Add rows of unweighted features, retiring earlier rows with the same IDs"""
+        if len(set(chart_ids)) != len(chart_ids):
+            raise ValueError("chart_ids has duplicates")
+        replaced = [self._rows[chart_id] for chart_id in chart_ids if chart_id in self._rows] if self._rows else []
+        self._alive[replaced] = False
+        first = len(self._ids)
+        self._reserve(first + len(chart_ids))
+        self._ids.extend(chart_ids)
+        self._rows.update(zip(chart_ids, range(first, len(self._ids))))
+        self._vectors[first:len(self._ids)] = features * self._scale
+        self._alive[first:len(self._ids)] = True
+
+    def _drop_row(self, chart_id: str) -> bool:
+        row = self._rows.pop(chart_id, None)
+        if row is None:
+            return False
+        self._alive[row] = False
+        return True
+
+    def _append_log(self, entry: Dict[str, Any]) -> None:
+        if self.path is not None:
+            with open(self._log_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry) + '\n')
+
+    def _set_log_aside(self) -> None:
+        """Move the log's entries to the saving log (hold _lock); later entries start a new log"""
+        if os.path.exists(self._log_path):
+            if os.path.exists(self._saving_log_path):
+                # Left by a failed save: its entries are not in the file yet
+                with open(self._log_path, 'r', encoding='utf-8') as f, \
+                        open(self._saving_log_path, 'a', encoding='utf-8') as saving:
+                    saving.write(f.read())
+                os.remove(self._log_path)
+            else:
+                os.replace(self._log_path, self._saving_log_path)
+
+    def _load(self) -> None:
+        if os.path.exists(self.path):
+            self.load(self.path)
+        interrupted = os.path.exists(self._saving_log_path)
+        for log_path in (self._saving_log_path, self._log_path):
+            if not os.path.exists(log_path):
+                continue
+            with open(log_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # a line cut short by a crash
+                    if entry.get('removed'):
+                        self._drop_row(entry['id'])
+                    elif len(entry['features']) == len(self._scale):
+                        self._append([entry['id']], np.array([entry['features']]))
+        if interrupted:
+            self.save()  # finish the save a crash interrupted
+
+    def _reserve(self, rows: int) -> None:
+        """Grow the row arrays to hold ``rows`` rows"""
+        if rows > len(self._vectors):
+            capacity = max(rows, 2 * len(self._vectors), 64)
+            vectors = np.zeros((capacity, len(self._scale)), dtype=np.float32)
+            vectors[:len(self._vectors)] = self._vectors
+            alive = np.zeros(capacity, dtype=bool)
+            alive[:len(self._alive)] = self._alive
+            self._vectors, self._alive = vectors, alive
+
+    def _rebuild(self, path: Optional[str] = None) -> None:
+        """Drop retired rows and build the tree over every chart, writing it
+        to ``path`` if given. Queries and adds wait only while the live rows
+        are found and the new tree is swapped in, not for the build."""
+        with self._rebuild_lock:
+            logged = path is not None and path == self.path
+            with self._lock:
+                # Rows below count are not changed in place, only retired
+                count, ids, vectors = len(self._ids), self._ids, self._vectors
+                alive = np.flatnonzero(self._alive[:count])
+                if logged:
+                    self._set_log_aside()
+            if len(alive):
+                order, tree_vectors, *tree = _kd_tree(vectors[alive], self.leaf_size)
+            else:
+                order, tree_vectors, tree = alive, vectors[:0], self._empty_tree()
+            rows = alive[order]
+            tree_ids = [ids[row] for row in rows.tolist()]
+            if path is not None:
+                self._write(path, tree_ids, tree_vectors, tree)
+                if logged and os.path.exists(self._saving_log_path):
+                    os.remove(self._saving_log_path)
+            positions = dict(zip(tree_ids, range(len(tree_ids))))
+            # Room for the charts added during the build
+            spare = REBUILD_MIN_PENDING
+            new_vectors = np.zeros((len(rows) + spare, vectors.shape[1]), dtype=np.float32)
+            new_vectors[:len(rows)] = tree_vectors
+            with self._lock:
+                # Charts added, replaced or removed during the build
+                end = len(self._ids)
+                tree_alive = self._alive[rows]
+                for position in np.flatnonzero(~tree_alive).tolist():
+                    del positions[tree_ids[position]]
+                added = self._ids[count:end]
+                positions.update((chart_id, len(tree_ids) + k) for k, chart_id in enumerate(added)
+                                 if self._alive[count + k])
+                added_vectors, added_alive = self._vectors[count:end], self._alive[count:end]
+                self._vectors = new_vectors
+                self._alive = np.zeros(len(new_vectors), dtype=bool)
+                self._alive[:len(rows)] = tree_alive
+                self._reserve(len(rows) + len(added))
+                self._vectors[len(rows):len(rows) + len(added)] = added_vectors
+                self._alive[len(rows):len(rows) + len(added)] = added_alive
+                self._ids = tree_ids + added
+                self._rows = positions
+                self._tree_rows = len(tree_ids)
+                self._set_tree(*tree)
+
+    def _rebuild_in_background(self) -> None:
+        try:
+            self._rebuild(self.path)
+        except Exception as e:
+            print(f"Chart similarity rebuild failed: {e}")
+        finally:
+            with self._lock:
+                self._rebuilding = False
+
+    def add(self, chart_id: str, chart: Dict[str, Any]) -> None:
+        """Index (or re-index) one chart dict under ``chart_id``"""
+        features = chart_features(chart)[None, :]
+        with self._lock:
+            self._append([chart_id], features)
+            self._append_log({'id': chart_id, 'features': features[0].tolist()})
+            pending = len(self._ids) - self._tree_rows
+            if pending > max(REBUILD_MIN_PENDING, self._tree_rows // 16) and not self._rebuilding:
+                self._rebuilding = True
+                threading.Thread(target=self._rebuild_in_background, name='chart-similarity-rebuild',
+                                 daemon=True).start()
+
+    def add_arrays(self, chart_ids: Sequence[str], planet_lons: np.ndarray, asc_lons: np.ndarray,
+                   houses: np.ndarray, yoga_masks: np.ndarray) -> None:
+        """Index many charts from batch arrays (see chart_feature_rows) and
+        rebuild the tree, writing the index's file rather than the log"""
+        features = chart_feature_rows(planet_lons, asc_lons, houses, yoga_masks)
+        with self._lock:
+            self._append(list(chart_ids), features)
+        self._rebuild(self.path)
+
+    def index_cache(self, cache_dir: str) -> int:
+        """Index every chart result in a cache directory (by cache key); returns the count"""
+        chart_ids, features = [], []
+        for chart_id, chart in cached_charts(cache_dir):
+            try:
+                features.append(chart_features(chart))
+            except (KeyError, TypeError, ValueError):
+                continue  # a chart without longitudes
+            chart_ids.append(chart_id)
+        if chart_ids:
+            with self._lock:
+                self._append(chart_ids, np.array(features))
+        self._rebuild(self.path)
+        return len(chart_ids)
+
+    def remove(self, chart_id: str) -> bool:
+        """Drop a chart; returns False if it was not indexed"""
+        with self._lock:
+            if not self._drop_row(chart_id):
+                return False
+            self._append_log({'id': chart_id, 'removed': True})
+            return True
+
+    def _search(self, vector: np.ndarray, metric: str, k: Optional[int],
+                radius: Optional[float]) -> List[Tuple[str, float]]:
+        """The k nearest rows (all rows if None) no further than radius (any if None)"""
+        if metric not in DISTANCE_METRICS:
+            raise ValueError(f"Unknown metric: {metric} (choose from {', '.join(DISTANCE_METRICS)})")
+        norm = DISTANCE_METRICS[metric]
+        vector = np.asarray(vector, dtype=np.float64) * self._scale
+        bound = np.inf if radius is None else radius
+        found_distances, found_rows = np.zeros(0), np.zeros(0, dtype=np.int64)
+
+        def take(start: int, end: int) -> None:
+            nonlocal found_distances, found_rows, bound
+            distances = _norms(self._vectors[start:end] - vector, norm)
+            keep = self._alive[start:end] & (distances <= bound)
+            found_distances = np.concatenate([found_distances, distances[keep]])
+            found_rows = np.concatenate([found_rows, start + np.flatnonzero(keep)])
+            if k is not None and len(found_rows) >= k:
+                nearest = np.argpartition(found_distances, k - 1)[:k]
+                found_distances, found_rows = found_distances[nearest], found_rows[nearest]
+                bound = min(bound, found_distances.max())
+
+        with self._lock:
+            if len(self._ids) > self._tree_rows:
+                take(self._tree_rows, len(self._ids))
+            heap = [(0.0, 0)]
+            while heap:
+                lower, node = heapq.heappop(heap)
+                if lower > bound:
+                    break
+                first = self._children[node]
+                if first < 0:
+                    take(self._starts[node], self._ends[node])
+                    continue
+                # Distance from the query to each child's box
+                gaps = _norms(np.maximum(self._lows[first:first + 2] - vector, 0.0) +
+                              np.maximum(vector - self._highs[first:first + 2], 0.0), norm)
+                for child, gap in zip((first, first + 1), gaps.tolist()):
+                    if gap <= bound:
+                        heapq.heappush(heap, (gap, child))
+            order = np.lexsort((found_rows, found_distances))
+            return [(self._ids[row], distance) for row, distance in
+                    zip(found_rows[order].tolist(), found_distances[order].tolist())]
+
+    def nearest(self, chart: Union[Dict[str, Any], np.ndarray], k: int = 10, metric: str = 'euclidean',
+                exclude: Sequence[str] = ()) -> List[Tuple[str, float]]:
+        """The ``k`` charts nearest to a chart dict (or unweighted feature
+        vector), as (chart ID, distance) pairs from nearest, skipping the
+        IDs in ``exclude``"""
+        if k < 1:
+            raise ValueError("k must be at least 1")
+        vector = chart_features(chart) if isinstance(chart, dict) else chart
+        exclude = set(exclude)
+        results = self._search(vector, metric, k + len(exclude), None)
+        return [result for result in results if result[0] not in exclude][:k]
+
+    def within(self, chart: Union[Dict[str, Any], np.ndarray], radius: float = DUPLICATE_DISTANCE,
+               metric: str = 'euclidean') -> List[Tuple[str, float]]:
+        """Every chart no further than ``radius``, from nearest; with the
+        default radius, the charts that look like the same birth"""
+        vector = chart_features(chart) if isinstance(chart, dict) else chart
+        return self._search(vector, metric, None, radius)
+
+    def save(self, path: Optional[str] = None) -> None:
+        """Write the index (rebuilt over every chart) to an .npz file, by
+        default its own path (clearing the log)"""
+        path = path or self.path
+        if path is None:
+            raise ValueError("No path to save the chart similarity index to")
+        self._rebuild(path)
+
+    def _write(self, path: str, ids: List[str], vectors: np.ndarray, tree: Sequence[np.ndarray]) -> None:
+        starts, ends, children, lows, highs = tree
+        temporary = path + '.tmp.npz'
+        np.savez(temporary, weights=json.dumps(self.weights), leaf_size=self.leaf_size,
+                 ids=np.array([chart_id.encode('utf-8') for chart_id in ids], dtype=bytes),
+                 vectors=vectors, starts=starts, ends=ends, children=children, lows=lows, highs=highs)
+        os.replace(temporary, path)
+
+    def load(self, path: str) -> None:
+        """Replace the index with one written by save(), including its weights"""
+        with np.load(path) as data, self._rebuild_lock:
+            with self._lock:
+                self._set_weights(json.loads(str(data['weights'])))
+                self.leaf_size = int(data['leaf_size'])
+                self._ids = [chart_id.decode('utf-8') for chart_id in data['ids'].tolist()]
+                self._rows = {chart_id: row for row, chart_id in enumerate(self._ids)}
+                self._vectors = data['vectors']
+                self._alive = np.ones(len(self._ids), dtype=bool)
+                self._tree_rows = len(self._ids)
+                self._set_tree(data['starts'], data['ends'], data['children'], data['lows'], data['highs'])
+
+# Global chart similarity index
+chart_similarity = ChartSimilarityIndex(path=os.environ.get('CHART_SIMILARITY_INDEX', 'chart_similarity.npz'))
+
+if __name__ == "__main__":
+    import sys
+    from cache_manager import cache_manager
+    if len(sys.argv) != 2:
+        print("Usage: python chart_similarity.py OUTPUT.npz   (index every chart in the cache directory)")
+        sys.exit(1)
+    index = ChartSimilarityIndex()
+    count = index.index_cache(cache_manager.cache_dir)
+    index.save(sys.argv[1])
+    print(f"Indexed {count} cached charts in {sys.argv[1]}")
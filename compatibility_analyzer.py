@@ -3,21 +3,27 @@
 # Synastry and relationship analysis
 # =============================================================================
 
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Tuple, Optional
 from vedic_astrology_modular import VedicChartCalculator, RASIS, SIGN_LORDS
+from ephemeris_table import DEFAULT_AYANAMSA
+from chart_service import ChartService, chart_service
 
 class CompatibilityAnalyzer:
     """Analyze compatibility between two birth charts"""
     
-    def __init__(self):
+    def __init__(self, service: Optional[ChartService] = None):
         self.chart_calculator = VedicChartCalculator()
+        self.chart_service = service or chart_service
     
-    def analyze_compatibility(self, person1_details: Dict, person2_details: Dict) -> Dict[str, Any]:
-        """Analyze compatibility between two people"""
+    def analyze_compatibility(self, person1_details: Dict, person2_details: Dict,
+                              ayanamsa: str = DEFAULT_AYANAMSA) -> Dict[str, Any]:
+        """Analyze compatibility between two people (both charts in ``ayanamsa``)"""
         
-        # Calculate both charts
-        chart1 = self.chart_calculator.calculate_chart(**person1_details)
-        chart2 = self.chart_calculator.calculate_chart(**person2_details)
+        # Calculate both charts in parallel (only planets and houses are analyzed)
+        chart1, chart2 = self.chart_service.calculate_charts(
+            [{**person1_details, 'ayanamsa': ayanamsa}, {**person2_details, 'ayanamsa': ayanamsa}],
+            sections={'planets', 'houses'}
+        )
         
         # Perform various compatibility analyses
         compatibility = {
@@ -0,0 +1,215 @@
+# =============================================================================
+# JULIAN DAY CONVERSION
+# Local civil date/time, numeric components and epoch timestamps to Julian
+# Days (UT), one at a time or as arrays
+# =============================================================================
+
+import datetime
+import functools
+import math
+import swisseph as swe
+import numpy as np
+from typing import Iterable, Tuple, Union
+
+ArrayLike = Union[float, Iterable[float], np.ndarray]
+
+_DAY_US = 86_400_000_000
+_MINUTE_US = 60_000_000
+_EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+_JD_UNIX_EPOCH = 2440587.5
+_JD_ORDINAL_EPOCH = 1721424.5  # 00:00 UT on the day before 0001-01-01 (date ordinal 0)
+
+# =============================================================================
+# PARSING
+# =============================================================================
+
+def parse_date(date_str: str) -> Tuple[int, int, int]:
+    """'YYYY-MM-DD' to (year, month, day)"""
+    try:
+        year, month, day = date_str.split('-')
+        return int(year), int(month), int(day)
+    except ValueError:
+        raise ValueError(f"time data {date_str!r} does not match format 'YYYY-MM-DD'") from None
+
+def parse_time(time_str: str) -> Tuple[int, int, float]:
+    """'HH:MM' or 'HH:MM:SS[.ffffff]' to (hour, minute, second)"""
+    parts = time_str.split(':')
+    try:
+        if len(parts) == 2:
+            return int(parts[0]), int(parts[1]), 0.0
+        if len(parts) == 3:
+            return int(parts[0]), int(parts[1]), float(parts[2])
+    except ValueError:
+        pass
+    raise ValueError(f"time data {time_str!r} does not match format 'HH:MM' or 'HH:MM:SS'")
+
+def local_datetime(date_str: str, time_str: str) -> datetime.datetime:
+    """'YYYY-MM-DD' and 'HH:MM[:SS]' to a naive datetime, keeping fractional seconds"""
+    hour, minute, second = parse_time(time_str)
+    return datetime.datetime(*parse_date(date_str), hour, minute) + datetime.timedelta(seconds=second)
+
+@functools.lru_cache(maxsize=256)
+def _tz_microseconds(timezone_offset: float) -> int:
+    """Timezone offset in whole microseconds, rounded as datetime.timedelta rounds it"""
+    return datetime.timedelta(hours=timezone_offset) // datetime.timedelta(microseconds=1)
+
+# =============================================================================
+# SINGLE INSTANTS
+# =============================================================================
+
+def _julday_from_us(utc_us: int) -> float:
+    """Microseconds since 0001-01-01 (proleptic Gregorian, UT) to Julian Day"""
+    ordinal, us = divmod(utc_us, _DAY_US)
+    date = datetime.date.fromordinal(ordinal)
+    minute_of_day, us = divmod(us, _MINUTE_US)
+    return swe.julday(date.year, date.month, date.day,
+                      minute_of_day // 60 + (minute_of_day % 60) / 60.0 + us / 3.6e9)
+
+def julian_day(year: int, month: int, day: int, hour: int = 0, minute: int = 0,
+               second: float = 0.0, timezone: float = 0.0) -> float:
+    """Local civil date and time (already parsed) to Julian Day (UT)"""
+    if not (0 <= hour <= 23 and 0 <= minute <= 59 and 0 <= second < 60):
+        raise ValueError(f"time out of range: {hour}:{minute}:{second}")
+    ordinal = datetime.date(year, month, day).toordinal()
+    local_us = (ordinal * 1440 + hour * 60 + minute) * _MINUTE_US + round(second * 1e6)
+    return _julday_from_us(local_us - _tz_microseconds(timezone))
+
+def julian_day_from_timestamp(timestamp: float) -> float:
+    """POSIX timestamp (seconds since 1970-01-01 UTC) to Julian Day (UT)"""
+    return _julday_from_us(_EPOCH_ORDINAL * _DAY_US + round(timestamp * 1e6))
+
+def datetime_from_julian_day(jd: float, timezone: float = 0.0) -> datetime.datetime:
+    """Julian Day (UT) back to a naive local datetime (inverse of julian_day)"""
+    utc_us = round((jd - _JD_UNIX_EPOCH) * 86400e6)
+    return datetime.datetime(1970, 1, 1) + datetime.timedelta(microseconds=utc_us + _tz_microseconds(timezone))
+
+def date_julian_day(date_str: str) -> float:
+    """'YYYY-MM-DD' to the Julian Day of its 00:00 UT"""
+    return datetime.date(*parse_date(date_str)).toordinal() + _JD_ORDINAL_EPOCH
+
+def date_from_julian_day(jd: float) -> str:
+    """The 'YYYY-MM-DD' date (UT) that a Julian Day falls on"""
+    return datetime.date.fromordinal(math.floor(jd - _JD_ORDINAL_EPOCH)).isoformat()
+
+@functools.lru_cache(maxsize=4096)
+def get_julian_day(date_str: str, time_str: str, timezone_offset: float) -> float:
+    """Convert local datetime to Julian Day (UT)
+
+    ``time_str`` is 'HH:MM' or 'HH:MM:SS'. Results are cached, since the same
+    birth or transit instant is usually converted many times.
+    """
+    year, month, day = parse_date(date_str)
+    hour, minute, second = parse_time(time_str)
+    return julian_day(year, month, day, hour, minute, second, timezone_offset)
+
+# =============================================================================
+# ARRAYS
+# =============================================================================
+
+def _days_from_civil(year: np.ndarray, month: np.ndarray, day: np.ndarray) -> np.ndarray:
+    """Proleptic Gregorian date arrays to day counts (days since 1970-01-01)"""
+    y = year - (month <= 2)
+    era = y // 400
+    yoe = y - era * 400
+    doy = (153 * (month + np.where(month > 2, -3, 9)) + 2) // 5 + day - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    return era * 146097 + doe - 719468
+
+def _civil_from_days(days: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Day counts (days since 1970-01-01) back to proleptic Gregorian date arrays"""
+    z = days + 719468
+    era = z // 146097
+    doe = z - era * 146097
+    yoe = (doe - doe // 1460 + doe // 36524 - doe // 146096) // 365
+    doy = doe - (365 * yoe + yoe // 4 - yoe // 100)
+    mp = (5 * doy + 2) // 153
+    day = doy - (153 * mp + 2) // 5 + 1
+    month = mp + np.where(mp < 10, 3, -9)
+    year = yoe + era * 400 + (month <= 2)
+    return year, month, day
+
+def _julday_array(year: np.ndarray, month: np.ndarray, day: np.ndarray,
+                  hour: np.ndarray) -> np.ndarray:
+    """Array form of swe.julday (Gregorian calendar), operation-for-operation"""
+    u = (year - (month < 3)).astype(float)
+    u0 = u + 4712.0
+    u1 = month + 1.0
+    u1 = np.where(u1 < 4, u1 + 12.0, u1)
+    jd = np.floor(u0 * 365.25) + np.floor(30.6 * u1 + 0.000001) + day + hour / 24.0 - 63.5
+    u2 = np.floor(np.abs(u) / 100) - np.floor(np.abs(u) / 400)
+    u2 = np.where(u < 0.0, -u2, u2)
+    jd = jd - u2 + 2
+    century = (u < 0.0) & (u / 100 == np.floor(u / 100)) & (u / 400 != np.floor(u / 400))
+    return np.where(century, jd - 1, jd)
+
+def _julday_from_us_array(utc_us: np.ndarray) -> np.ndarray:
+    """Array form of _julday_from_us, counting from 1970-01-01"""
+    utc_days, us = np.divmod(utc_us, _DAY_US)
+    year, month, day = _civil_from_days(utc_days)
+    minute_of_day, us = np.divmod(us, _MINUTE_US)
+    return _julday_array(year, month, day, minute_of_day // 60 + (minute_of_day % 60) / 60.0 + us / 3.6e9)
+
+def julian_days(years: ArrayLike, months: ArrayLike, days: ArrayLike, hours: ArrayLike = 0,
+                minutes: ArrayLike = 0, seconds: ArrayLike = 0.0, timezones: ArrayLike = 0.0) -> np.ndarray:
+    """Array form of julian_day; the component arrays broadcast against each other.
+
+    Matches julian_day element for element (the timezone shift is applied in
+    whole microseconds like datetime.timedelta).
+    """
+    year, month, day, hour, minute = (np.asarray(a, dtype=np.int64)
+                                      for a in (years, months, days, hours, minutes))
+    second = np.asarray(seconds, dtype=float)
+    local_days = _days_from_civil(year, month, day)
+    check_year, check_month, check_day = _civil_from_days(local_days)
+    if np.any((check_year != year) | (check_month != month) | (check_day != day) |
+              (month < 1) | (month > 12) | (hour < 0) | (hour > 23) |
+              (minute < 0) | (minute > 59) | (second < 0) | (second >= 60)):
+        raise ValueError("date/time out of range in batch input")
+
+    # Timezone offsets in microseconds, converted once per distinct offset
+    unique_tz, tz_index = np.unique(np.asarray(timezones, dtype=float), return_inverse=True)
+    tz_us = np.array([_tz_microseconds(tz) for tz in unique_tz.tolist()], dtype=np.int64)[tz_index]
+    tz_us = tz_us.reshape(np.shape(timezones))
+
+    local_us = (local_days * 1440 + hour * 60 + minute) * _MINUTE_US + np.rint(second * 1e6).astype(np.int64)
+    return _julday_from_us_array(local_us - tz_us)
+
+def julian_days_from_timestamps(timestamps: ArrayLike) -> np.ndarray:
+    """Array form of julian_day_from_timestamp"""
+    return _julday_from_us_array(np.rint(np.asarray(timestamps, dtype=float) * 1e6).astype(np.int64))
+
+def julian_day_steps(date_str: str, time_str: str, timezone_offset: float, step_seconds: float,
+                     count: int, first: int = 0) -> np.ndarray:
+    """Julian Days (UT) of the local instants ``first`` .. ``first + count - 1`` steps
+    of ``step_seconds`` after date_str time_str.
+
+    Each step is counted in whole microseconds, so step k matches
+    get_julian_day for the local time k * step_seconds after the start.
+    """
+    year, month, day = parse_date(date_str)
+    hour, minute, second = parse_time(time_str)
+    julian_day(year, month, day, hour, minute, second)  # validates
+    start_us = (((datetime.date(year, month, day).toordinal() - _EPOCH_ORDINAL) * 1440 + hour * 60 + minute)
+                * _MINUTE_US + round(second * 1e6) - _tz_microseconds(timezone_offset))
+    step_us = round(step_seconds * 1e6)
+    return _julday_from_us_array(start_us + step_us * np.arange(first, first + count, dtype=np.int64))
+
+def get_julian_days(dates: Iterable[str], times: Iterable[str],
+                    timezone_offsets: Iterable[float]) -> np.ndarray:
+    """Convert many local datetimes to Julian Days (UT) in one pass.
+
+    Matches get_julian_day exactly, including 'HH:MM:SS' times.
+    """
+    year, month, day = zip(*(parse_date(d) for d in dates))
+    hour, minute, second = zip(*(parse_time(t) for t in times))
+    return julian_days(year, month, day, hour, minute, second, list(timezone_offsets))
+
+def date_julian_days(dates: Iterable[str]) -> np.ndarray:
+    """Array form of date_julian_day"""
+    return np.array(list(dates), dtype='datetime64[D]').astype(np.int64) + _JD_UNIX_EPOCH
+
+def dates_from_julian_days(jds: ArrayLike) -> np.ndarray:
+    """Array form of date_from_julian_day ('YYYY-MM-DD' strings)"""
+    return np.floor(np.asarray(jds, dtype=float) - _JD_UNIX_EPOCH).astype(np.int64).astype('datetime64[D]').astype(str)
+
+print("✅ Julian day conversion loaded!")
@@ -0,0 +1,365 @@
+# =============================================================================
+# PLANET WINDOWS
+# Retrograde stations and combustion windows of Mercury through Saturn,
+# computed once into a shared index that transit reports look up
+# =============================================================================
+
+import bisect
+import datetime
+import json
+import math
+import os
+import threading
+import swisseph as swe
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from ephemeris_table import calc_sidereal, calc_sidereal_batch, init_thread_ephemeris
+from julian_day import datetime_from_julian_day, get_julian_day, parse_date
+from chart_model import CHART_GRAHAS
+
+WINDOW_PLANETS = ('Mercury', 'Venus', 'Mars', 'Jupiter', 'Saturn')
+WINDOW_KINDS = ('retrograde', 'combust')
+
+# Classical combustion orbs in degrees from the Sun, (direct, retrograde)
+COMBUSTION_ORBS = {
+    'Mercury': (14.0, 12.0),
+    'Venus': (10.0, 8.0),
+    'Mars': (17.0, 17.0),
+    'Jupiter': (11.0, 11.0),
+    'Saturn': (15.0, 15.0)
+}
+
+# Sampling step in days. Stations of one planet are at least ~20 days
+# apart and no combustion window is shorter than ~6 days, so a sample pair
+# never hides two stations or a whole window.
+SAMPLE_DAYS = 2.0
+
+# Station and window edge times are refined to this precision, days (about 0.01 s)
+ROOT_TOLERANCE_DAYS = 1e-7
+
+# The index is filled in blocks of this many UT days
+INDEX_BLOCK_DAYS = 366
+
+# Longest range one query accepts, days
+MAX_WINDOW_QUERY_DAYS = 36525
+
+_SUN = CHART_GRAHAS.index('Sun')
+_BODIES = {'Mercury': swe.MERCURY, 'Venus': swe.VENUS, 'Mars': swe.MARS,
+           'Jupiter': swe.JUPITER, 'Saturn': swe.SATURN}
+
+def _elongation(planet_longitude: float, sun_longitude: float) -> float:
+    """Angular distance from the Sun along the ecliptic, 0-180 degrees"""
+    return abs((planet_longitude - sun_longitude + 180.0) % 360.0 - 180.0)
+
+def _solve(f: Callable[[float], float], a: float, fa: float, b: float, fb: float) -> float:
+    """Root of f between a and b (fa and fb of opposite signs), by the Illinois method"""
+    previous, side = None, 0
+    for _ in range(100):
+        c = (a * fb - b * fa) / (fb - fa)
+        if previous is not None and abs(c - previous) < ROOT_TOLERANCE_DAYS:
+            return c
+        previous = c
+        fc = f(c)
+        if fc == 0:
+            return c
+        if (fc > 0) == (fb > 0):
+            b, fb = c, fc
+            if side == -1:
+                fa /= 2
+            side = -1
+        else:
+            a, fa = c, fc
+            if side == 1:
+                fb /= 2
+            side = 1
+    return (a + b) / 2
+
+# =============================================================================
+# ONE BLOCK
+# =============================================================================
+
+def _block_windows(start_jd: float, end_jd: float) -> Tuple[List[Tuple[float, str, str]],
+                                                           Dict[Tuple[str, str], List[Tuple[float, float]]]]:
+    """Stations and windows of every planet between start_jd and end_jd.
+
+    Returns the stations as (jd, planet, 'retrograde' | 'direct') and the
+    windows as {(planet, kind): [(start, end), ...]}, clipped to the block.
+    """
+    init_thread_ephemeris()
+    count = math.ceil((end_jd - start_jd) / SAMPLE_DAYS)
+    grid = [start_jd + k * SAMPLE_DAYS for k in range(count)] + [end_jd]
+    longitudes, speeds = calc_sidereal_batch(grid)
+    sun_longitudes = longitudes[:, _SUN].tolist()
+
+    stations, windows = [], {}
+    for name in WINDOW_PLANETS:
+        body = _BODIES[name]
+        index = CHART_GRAHAS.index(name)
+        planet_longitudes, planet_speeds = longitudes[:, index].tolist(), speeds[:, index].tolist()
+
+        def speed(jd: float) -> float:
+            return calc_sidereal(jd, body)[2]
+
+        # Stations: zero speed between samples of opposite direction
+        turns = []
+        for k in range(len(grid) - 1):
+            if (planet_speeds[k] < 0) != (planet_speeds[k + 1] < 0):
+                jd = _solve(speed, grid[k], planet_speeds[k], grid[k + 1], planet_speeds[k + 1])
+                turns.append((k, jd))
+                stations.append((jd, name, 'retrograde' if planet_speeds[k] >= 0 else 'direct'))
+
+        # Retrograde periods from the stations
+        retrograde, opened = [], start_jd if planet_speeds[0] < 0 else None
+        for _, jd in turns:
+            if opened is None:
+                opened = jd
+            else:
+                retrograde.append((opened, jd))
+                opened = None
+        if opened is not None:
+            retrograde.append((opened, end_jd))
+        windows[(name, 'retrograde')] = retrograde
+
+        # Combustion: the orb applies by direction, so stations split the samples
+        points = [(grid[k], planet_longitudes[k], sun_longitudes[k], planet_speeds[k] < 0, False)
+                  for k in range(len(grid))]
+        for k, jd in reversed(turns):
+            planet_longitude = calc_sidereal(jd, body)[0]
+            points.insert(k + 1, (jd, planet_longitude, calc_sidereal(jd, swe.SUN)[0], False, True))
+        direct_orb, retrograde_orb = COMBUSTION_ORBS[name]
+        pieces = []
+        for (a, lon_a, sun_a, retro_a, station_a), (b, lon_b, sun_b, retro_b, _) in zip(points, points[1:]):
+            orb = retrograde_orb if (retro_b if station_a else retro_a) else direct_orb
+
+            def inside(jd: float, orb: float = orb) -> float:
+                return orb - _elongation(calc_sidereal(jd, body)[0], calc_sidereal(jd, swe.SUN)[0])
+
+            fa, fb = orb - _elongation(lon_a, sun_a), orb - _elongation(lon_b, sun_b)
+            if fa > 0 and fb > 0:
+                pieces.append((a, b))
+            elif fa > 0:
+                pieces.append((a, _solve(inside, a, fa, b, fb)))
+            elif fb > 0:
+                pieces.append((_solve(inside, a, fa, b, fb), b))
+        windows[(name, 'combust')] = _merge(pieces)
+    stations.sort()
+    return stations, windows
+
+def _merge(intervals: Iterable[Tuple[float, float]]) -> List[Tuple[float, float]]:
+    """Sorted intervals with touching or overlapping ones joined"""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+# =============================================================================
+# SHARED INDEX
+# =============================================================================
+
+class PlanetWindowIndex:
+    """Retrograde periods, stations and combustion windows, filled in blocks on demand.
+
+    One instance is shared by every request in a process (``planet_window_index``);
+    a block of INDEX_BLOCK_DAYS is computed the first time any query touches it,
+    and a prebuilt index can be loaded from a JSON file.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._blocks = set()
+        self._stations: List[Tuple[float, str, str]] = []
+        # Per (planet, kind): its merged windows and their starts, replaced as
+        # one tuple so that unlocked readers never see one without the other
+        self._windows: Dict[Tuple[str, str], Tuple[List[Tuple[float, float]], List[float]]] = {
+            (name, kind): ([], []) for name in WINDOW_PLANETS for kind in WINDOW_KINDS
+        }
+
+    @staticmethod
+    def _block_of(jd: float) -> int:
+        return math.floor((jd - 0.5) / INDEX_BLOCK_DAYS)
+
+    def _add(self, blocks: Iterable[int], stations, windows) -> None:
+        """Merge computed blocks in (hold _lock). ensure() checks blocks without the lock,
+        so they are marked computed only once their stations and windows are in place"""
+        self._stations = sorted(set(self._stations) | set(stations))
+        for key, intervals in windows.items():
+            merged = _merge(self._windows[key][0] + list(intervals))
+            self._windows[key] = (merged, [start for start, _ in merged])
+        self._blocks.update(blocks)
+
+    def ensure(self, start_jd: float, end_jd: float) -> None:
+        """Compute every block overlapping [start_jd, end_jd] not yet in the index"""
+        wanted = range(self._block_of(start_jd), self._block_of(end_jd) + 1)
+        if all(block in self._blocks for block in wanted):
+            return
+        with self._lock:
+            for block in wanted:
+                if block not in self._blocks:
+                    block_start = block * INDEX_BLOCK_DAYS + 0.5
+                    stations, windows = _block_windows(block_start, block_start + INDEX_BLOCK_DAYS)
+                    self._add([block], stations, windows)
+
+    def _open_block(self, jd: float, before: bool) -> Optional[int]:
+        """The uncomputed block an interval edge at ``jd`` may continue into
+        (the one before it for a start, after it for an end), if the edge
+        is only where a computed block was clipped"""
+        block = self._block_of(jd)
+        if jd != block * INDEX_BLOCK_DAYS + 0.5:
+            return None
+        neighbour = block - 1 if before else block
+        return None if neighbour in self._blocks else neighbour
+
+    def _overlapping(self, key: Tuple[str, str], start_jd: float, end_jd: float) -> List[Tuple[float, float]]:
+        intervals, starts = self._windows[key]
+        first = max(bisect.bisect_right(starts, start_jd) - 1, 0)
+        last = bisect.bisect_left(starts, end_jd)
+        return [(s, e) for s, e in intervals[first:last] if e > start_jd]
+
+    def windows(self, kind: str, start_jd: float, end_jd: float,
+                planets: Optional[Iterable[str]] = None) -> List[Tuple[str, float, float]]:
+        """Complete (planet, start, end) windows of ``kind`` overlapping [start_jd, end_jd)"""
+        if kind not in WINDOW_KINDS:
+            raise ValueError(f"Unknown window kind: {kind} (expected one of {', '.join(WINDOW_KINDS)})")
+        self.ensure(start_jd, end_jd)
+        found = []
+        for name in planets or WINDOW_PLANETS:
+            if name not in WINDOW_PLANETS:
+                raise ValueError(f"Unknown planet: {name} (expected one of {', '.join(WINDOW_PLANETS)})")
+            key = (name, kind)
+            # Compute further blocks while a window runs off the computed range
+            overlapping = self._overlapping(key, start_jd, end_jd)
+            while overlapping:
+                block = self._open_block(overlapping[0][0], True)
+                if block is None:
+                    block = self._open_block(overlapping[-1][1], False)
+                if block is None:
+                    break
+                self.ensure(block * INDEX_BLOCK_DAYS + 0.5, block * INDEX_BLOCK_DAYS + 0.5)
+                overlapping = self._overlapping(key, start_jd, end_jd)
+            found.extend((name, s, e) for s, e in overlapping)
+        found.sort(key=lambda window: window[1])
+        return found
+
+    def stations(self, start_jd: float, end_jd: float,
+                 planets: Optional[Iterable[str]] = None) -> List[Tuple[float, str, str]]:
+        """(jd, planet, 'retrograde' | 'direct') stations in [start_jd, end_jd)"""
+        self.ensure(start_jd, end_jd)
+        wanted = set(planets or WINDOW_PLANETS)
+        stations = self._stations  # one list, even if a block is added meanwhile
+        first = bisect.bisect_left(stations, (start_jd,))
+        last = bisect.bisect_left(stations, (end_jd,))
+        return [station for station in stations[first:last] if station[1] in wanted]
+
+    def status(self, jd: float) -> Dict[str, Dict[str, Optional[Tuple[float, float]]]]:
+        """For each planet, the retrograde period and combustion window containing ``jd`` (or None)"""
+        return {
+            name: {kind: next(((s, e) for _, s, e in self.windows(kind, jd, jd + 1e-9, [name])
+                               if s <= jd < e), None)
+                   for kind in WINDOW_KINDS}
+            for name in WINDOW_PLANETS
+        }
+
+    def save(self, path: str) -> None:
+        """Write the computed blocks to a JSON file"""
+        with self._lock:
+            data = {
+                'block_days': INDEX_BLOCK_DAYS,
+                'blocks': sorted(self._blocks),
+                'stations': self._stations,
+                'windows': [[name, kind, intervals] for (name, kind), (intervals, _) in self._windows.items()]
+            }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+
+    def load(self, path: str) -> None:
+        """Add the blocks of a file written by save()"""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data['block_days'] != INDEX_BLOCK_DAYS:
+            raise ValueError(f"Index file uses {data['block_days']}-day blocks, expected {INDEX_BLOCK_DAYS}")
+        with self._lock:
+            self._add(data['blocks'], [tuple(station) for station in data['stations']],
+                      {(name, kind): [tuple(iv) for iv in intervals] for name, kind, intervals in data['windows']})
+
+planet_window_index = PlanetWindowIndex()
+
+# =============================================================================
+# QUERIES
+# =============================================================================
+
+def _local_time(jd: float, timezone: float) -> str:
+    moment = datetime_from_julian_day(jd, timezone) + datetime.timedelta(microseconds=500000)
+    return moment.strftime("%Y-%m-%d %H:%M:%S")
+
+def _window_fields(name: str, kind: str, start_jd: float, end_jd: float, timezone: float) -> Dict[str, Any]:
+    window = {
+        'start': _local_time(start_jd, timezone),
+        'end': _local_time(end_jd, timezone),
+        'start_jd': start_jd,
+        'end_jd': end_jd,
+        'days': round(end_jd - start_jd, 2)
+    }
+    if kind == 'combust':
+        window['orbs'] = dict(zip(('direct', 'retrograde'), COMBUSTION_ORBS[name]))
+    return window
+
+def find_planet_windows(start_date: str, end_date: str, timezone: float = 0.0,
+                        planets: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """Retrograde stations, retrograde periods and combustion windows from start_date to end_date.
+
+    Both dates are local ('YYYY-MM-DD', end inclusive) in ``timezone``.
+    Periods and windows overlapping the range are given whole, even where
+    they begin before it or end after it. Speed and distance from the Sun
+    do not depend on the ayanamsa, so there is no ayanamsa argument.
+    """
+    planets = WINDOW_PLANETS if planets is None else tuple(planets)
+    for name in planets:
+        if name not in WINDOW_PLANETS:
+            raise ValueError(f"Unknown planet: {name} (expected one of {', '.join(WINDOW_PLANETS)})")
+    parse_date(end_date)
+    start_jd = get_julian_day(start_date, '00:00', timezone)
+    end_jd = get_julian_day(end_date, '00:00', timezone) + 1.0
+    if end_jd <= start_jd:
+        raise ValueError("end_date is before start_date")
+    if end_jd - start_jd > MAX_WINDOW_QUERY_DAYS:
+        raise ValueError(f"range is longer than {MAX_WINDOW_QUERY_DAYS} days")
+
+    stations = [{'time': _local_time(jd, timezone), 'jd': jd, 'planet': name, 'station': station}
+                for jd, name, station in planet_window_index.stations(start_jd, end_jd, planets)]
+    result = {
+        'range': {
+            'start_date': start_date,
+            'end_date': end_date,
+            'timezone': timezone
+        },
+        'stations': stations
+    }
+    for kind, field in (('retrograde', 'retrograde_periods'), ('combust', 'combustion_windows')):
+        result[field] = [dict(planet=name, **_window_fields(name, kind, s, e, timezone))
+                         for name, s, e in planet_window_index.windows(kind, start_jd, end_jd, planets)]
+    return result
+
+def transit_windows(jd: float, timezone: float = 0.0) -> Dict[str, Dict[str, Optional[Dict[str, Any]]]]:
+    """Per planet, the retrograde period and combustion window in force at ``jd`` (None if not)"""
+    return {
+        name: {kind: None if interval is None else _window_fields(name, kind, *interval, timezone)
+               for kind, interval in kinds.items()}
+        for name, kinds in planet_window_index.status(jd).items()
+    }
+
+if os.environ.get('PLANET_WINDOW_INDEX') and os.path.exists(os.environ['PLANET_WINDOW_INDEX']):
+    planet_window_index.load(os.environ['PLANET_WINDOW_INDEX'])
+
+print("✅ Planet window index loaded!")
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) not in (2, 4):
+        print("Usage: python planet_windows.py OUTPUT.json [START_YEAR END_YEAR]")
+        sys.exit(1)
+    first_year, last_year = (int(sys.argv[2]), int(sys.argv[3])) if len(sys.argv) == 4 else (1900, 2100)
+    planet_window_index.ensure(swe.julday(first_year, 1, 1, 0.0), swe.julday(last_year, 12, 31, 24.0))
+    planet_window_index.save(sys.argv[1])
+    print(f"Planet windows {first_year}-{last_year} written to {sys.argv[1]}")
@@ -0,0 +1,240 @@
+# =============================================================================
+# BIRTH TIME RECTIFICATION
+# Sweeps a window of candidate birth times and reports where the chart changes
+# =============================================================================
+
+import datetime
+import math
+import numpy as np
+import swisseph as swe
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from ephemeris_table import (
+    DEFAULT_AYANAMSA, SNAPSHOT_BODIES, ayanamsa_offset, calc_sidereal,
+    init_thread_ephemeris, resolve_ayanamsa
+)
+from julian_day import get_julian_day, local_datetime
+from chart_model import CHART_GRAHAS, NAKSHATRA_SPAN
+from vedic_astrology_modular import VedicChartCalculator, RASIS, NAKSHATRAS
+
+# Longest window one sweep accepts
+MAX_WINDOW_SECONDS = 86400
+
+# Planets are sampled this often; no graha crosses two sign (or, for the
+# Moon, nakshatra) boundaries or stations twice within an hour
+KNOT_SECONDS = 3600
+
+# Change times are bisected to this precision
+REFINE_SECONDS = 0.01
+
+# Mean advance of the local sidereal time (ARMC), degrees per day
+SIDEREAL_DAY_RATE = 360.98564736629
+
+_GRAHA_BODIES = list(SNAPSHOT_BODIES.values())
+_MOON = CHART_GRAHAS.index('Moon')
+
+# =============================================================================
+# ASCENDANT AND GRAHA STATE
+# =============================================================================
+
+def exact_ascendant(jd: float, latitude: float, longitude: float,
+                    ayanamsa: str = DEFAULT_AYANAMSA) -> float:
+    """Sidereal ascendant from Swiss Ephemeris (as calculate_chart computes it)"""
+    ascendant = swe.houses_ex(jd, latitude, longitude, b'P', flags=swe.FLG_SIDEREAL)[1][0]
+    return (ascendant - ayanamsa_offset(jd, ayanamsa)) % 360.0
+
+def sidereal_ascendants(jds: np.ndarray, latitude: float, longitude: float,
+                        ayanamsa: str = DEFAULT_AYANAMSA) -> np.ndarray:
+    """Sidereal ascendants for many instants of one day at one place.
+
+    The local sidereal time and the tropical-to-sidereal offset are anchored
+    to Swiss Ephemeris at the first and last instant and interpolated in
+    between, and the ascendant follows from the spherical formula. Over a
+    day the result stays within about an arc-second of exact_ascendant
+    (sub-0.1" outside the polar regions); use it to locate changes and
+    exact_ascendant to pin them down.
+    """
+    jds = np.asarray(jds, dtype=float)
+    first, last = float(jds[0]), float(jds[-1])
+    anchors = []
+    for jd in (first, last):
+        tropical = swe.houses_ex(jd, latitude, longitude, b'P')[1]
+        anchors.append((tropical[2], (tropical[0] - exact_ascendant(jd, latitude, longitude, ayanamsa)) % 360.0))
+    (armc0, offset0), (armc1, offset1) = anchors
+    span = last - first
+    if span > 0:
+        drift = (armc1 - armc0 - SIDEREAL_DAY_RATE * span + 180.0) % 360.0 - 180.0
+        fraction = (jds - first) / span
+    else:
+        drift, fraction = 0.0, np.zeros_like(jds)
+    armc = np.radians(armc0 + SIDEREAL_DAY_RATE * (jds - first) + drift * fraction)
+    obliquity = np.radians(swe.calc_ut((first + last) / 2, swe.ECL_NUT)[0][0])
+    tropical = np.degrees(np.arctan2(
+        np.cos(armc),
+        -(np.sin(armc) * np.cos(obliquity) + np.tan(np.radians(latitude)) * np.sin(obliquity))
+    ))
+    offset = offset0 + ((offset1 - offset0 + 180.0) % 360.0 - 180.0) * fraction
+    return (tropical - offset) % 360.0
+
+def _graha_position(jd: float, index: int, ayanamsa: str) -> Tuple[float, float]:
+    """Sidereal longitude and speed of one graha (index into CHART_GRAHAS)"""
+    body = _GRAHA_BODIES[min(index, len(_GRAHA_BODIES) - 1)]
+    longitude, _, speed = calc_sidereal(jd, body)
+    if index == len(_GRAHA_BODIES):  # Ketu
+        longitude += 180.0
+    return (longitude - ayanamsa_offset(jd, ayanamsa)) % 360.0, speed
+
+def _graha_codes(jd: float, index: int, ayanamsa: str) -> Tuple[int, int, bool]:
+    """What a sweep tracks for a graha: sign, nakshatra (Moon only) and retrograde flag"""
+    longitude, speed = _graha_position(jd, index, ayanamsa)
+    nakshatra = int(longitude // NAKSHATRA_SPAN) if index == _MOON else 0
+    return int(longitude // 30), nakshatra, speed < 0
+
+def _crossings(code_at: Callable[[float], Any], start: float, end: float,
+               start_code: Any, end_code: Any) -> List[float]:
+    """Times in (start, end] at which ``code_at`` changes, bisected to REFINE_SECONDS.
+
+    Assumes the code changes monotonically (never returns to an earlier value)
+    between start and end.
+    """
+    times = []
+    while start_code != end_code:
+        low, high = start, end
+        while high - low > REFINE_SECONDS:
+            middle = (low + high) / 2
+            if code_at(middle) == start_code:
+                low = middle
+            else:
+                high = middle
+        times.append(high)
+        start, start_code = high, code_at(high)
+    return times
+
+# =============================================================================
+# SWEEP
+# =============================================================================
+
+def _format_time(start: datetime.datetime, seconds: float) -> str:
+    """Local time ``seconds`` after start, rounded up to the whole second"""
+    moment = start + datetime.timedelta(seconds=math.ceil(seconds - 1e-6))
+    return moment.strftime("%Y-%m-%d %H:%M:%S")
+
+def _chart_state(chart) -> Dict[str, Any]:
+    """The parts of a chart a rectification compares"""
+    yogas = chart.to_dict(sections={'yogas'})['yogas']
+    return {
+        'lagna': RASIS[chart.asc_sign],
+        'moon_nakshatra': NAKSHATRAS[chart.nakshatra(_MOON)],
+        'houses': {name: chart.house(i) for i, name in enumerate(CHART_GRAHAS)},
+        'yogas': sorted(name for name, present in yogas.items() if present)
+    }
+
+def _state_changes(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Any]:
+    changes = {}
+    for key in ('lagna', 'moon_nakshatra'):
+        if before[key] != after[key]:
+            changes[key] = {'from': before[key], 'to': after[key]}
+    houses = {name: {'from': before['houses'][name], 'to': house}
+              for name, house in after['houses'].items() if before['houses'][name] != house}
+    if houses:
+        changes['houses'] = houses
+    if before['yogas'] != after['yogas']:
+        changes['yogas'] = {'formed': [y for y in after['yogas'] if y not in before['yogas']],
+                            'dissolved': [y for y in before['yogas'] if y not in after['yogas']]}
+    return changes
+
+def sweep_birth_times(date: str, start_time: str, end_time: str, latitude: float, longitude: float,
+                      timezone: float, resolution: float = 60.0, ayanamsa: str = DEFAULT_AYANAMSA,
+                      include_steps: bool = False,
+                      calculator: Optional[VedicChartCalculator] = None) -> Dict[str, Any]:
+    """Sweep candidate birth times from start_time to end_time on ``date``.
+
+    The ascendant is evaluated at every ``resolution`` seconds in one array
+    operation; the grahas are sampled hourly and only re-queried around the
+    moments they change sign (or nakshatra, for the Moon) or station; a
+    full chart is calculated once per stretch of constant chart. Returns the
+    stretches ('segments') and the exact local times at which the lagna,
+    Moon nakshatra, house placements or yogas change ('events'). An
+    end_time at or before start_time means the next day. With
+    ``include_steps`` the lagna and its degree at every step are included.
+    """
+    ayanamsa = resolve_ayanamsa(ayanamsa)
+    calculator = calculator or VedicChartCalculator()
+    init_thread_ephemeris()
+    if resolution <= 0:
+        raise ValueError("resolution must be positive")
+    start = local_datetime(date, start_time)
+    end = local_datetime(date, end_time)
+    if end <= start:
+        end += datetime.timedelta(days=1)
+    duration = (end - start).total_seconds()
+    if duration > MAX_WINDOW_SECONDS:
+        raise ValueError(f"window is longer than {MAX_WINDOW_SECONDS // 3600} hours")
+    jd_start = get_julian_day(date, start_time, timezone)
+
+    def jd_at(seconds: float) -> float:
+        return jd_start + seconds / 86400.0
+
+    # Ascendant at every step; exact sign changes by bisection
+    steps = np.append(np.arange(0.0, duration, resolution), duration)
+    ascendants = sidereal_ascendants(jd_at(steps), latitude, longitude, ayanamsa)
+    asc_signs = (ascendants // 30).astype(np.int64)
+
+    def asc_sign_at(seconds: float) -> int:
+        return int(exact_ascendant(jd_at(seconds), latitude, longitude, ayanamsa) // 30)
+
+    boundaries = set()
+    for k in np.flatnonzero(asc_signs[1:] != asc_signs[:-1]).tolist():
+        boundaries.update(_crossings(asc_sign_at, steps[k], steps[k + 1],
+                                     asc_sign_at(steps[k]), asc_sign_at(steps[k + 1])))
+
+    # Grahas at hourly knots; exact changes by bisection
+    knots = np.linspace(0.0, duration, int(np.ceil(duration / KNOT_SECONDS)) + 1).tolist()
+    for index in range(len(CHART_GRAHAS)):
+        def codes_at(seconds: float, index: int = index) -> Tuple[int, int, bool]:
+            return _graha_codes(jd_at(seconds), index, ayanamsa)
+        codes = [codes_at(t) for t in knots]
+        for k in range(len(knots) - 1):
+            if codes[k] != codes[k + 1]:
+                boundaries.update(_crossings(codes_at, knots[k], knots[k + 1], codes[k], codes[k + 1]))
+
+    # One chart per stretch between changes; merge stretches that look the same
+    cuts = [0.0] + sorted(t for t in boundaries if 0.0 < t < duration) + [duration]
+    segments, events = [], []
+    for seg_start, seg_end in zip(cuts[:-1], cuts[1:]):
+        middle = start + datetime.timedelta(seconds=(seg_start + seg_end) / 2)
+        chart = calculator.calculate_chart(middle.strftime("%Y-%m-%d"), middle.strftime("%H:%M:%S.%f"),
+                                           latitude, longitude, timezone, as_model=True, ayanamsa=ayanamsa)
+        state = _chart_state(chart)
+        if segments:
+            changes = _state_changes(segments[-1], state)
+            if not changes:
+                segments[-1]['end'] = _format_time(start, seg_end)
+                continue
+            events.append({'time': _format_time(start, seg_start),
+                           'jd': jd_at(seg_start), 'changes': changes})
+        segments.append({'start': _format_time(start, seg_start),
+                         'end': _format_time(start, seg_end), **state})
+
+    result = {
+        'window': {
+            'start': _format_time(start, 0.0),
+            'end': _format_time(start, duration),
+            'resolution_seconds': resolution,
+            'steps': len(steps),
+            'latitude': latitude,
+            'longitude': longitude,
+            'timezone': timezone,
+            'ayanamsa': ayanamsa
+        },
+        'segments': segments,
+        'events': events
+    }
+    if include_steps:
+        result['steps'] = [
+            {'time': _format_time(start, t),
+             'lagna': RASIS[sign], 'lagna_degree': round(degree % 30, 2)}
+            for t, sign, degree in zip(steps.tolist(), asc_signs.tolist(), ascendants.tolist())
+        ]
+    return result
+
+print("✅ Rectification sweep loaded!")
@@ -0,0 +1,21 @@
+# =============================================================================
+# SAMPLE BIRTHS
+# Reproducible random birth records for tests and benchmarks
+# =============================================================================
+
+import random
+from typing import Any, Dict, List
+
+def random_births(count: int, seed: int = 7) -> List[Dict[str, Any]]:
+    """Generate reproducible birth records spread over 1900-2099"""
+    rng = random.Random(seed)
+    return [
+        {
+            'date': f"{rng.randint(1900, 2099)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            'time': f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}",
+            'latitude': rng.uniform(-60, 60),
+            'longitude': rng.uniform(-180, 180),
+            'timezone': rng.choice([5.5, -5.0, 0.0, 9.75, -3.5, 12.0])
+        }
+        for _ in range(count)
+    ]
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Tests for per-calculation ayanamsa selection
+"""
+
+import threading
+import pytest
+import swisseph as swe
+from ephemeris_table import AYANAMSAS, DEFAULT_SID_MODE, get_ayanamsa, get_snapshot
+from vedic_astrology_modular import VedicChartCalculator, get_julian_day, get_dasha_info
+from vedic_astrology_engine import VedicChart
+from cache_manager import cache_manager
+from sample_births import random_births
+
+
+def global_mode_reference(birth, sid_mode):
+    """Moon, ascendant and ayanamsa calculated the old way, by switching the global mode"""
+    jd = get_julian_day(birth['date'], birth['time'], birth['timezone'])
+    swe.set_sid_mode(sid_mode)
+    try:
+        moon = swe.calc_ut(jd, swe.MOON, swe.FLG_SIDEREAL)[0][0]
+        cusps, ascmc = swe.houses_ex(jd, birth['latitude'], birth['longitude'], b'P', flags=swe.FLG_SIDEREAL)
+        return moon, ascmc[0], cusps[3], swe.get_ayanamsa(jd)
+    finally:
+        swe.set_sid_mode(DEFAULT_SID_MODE)
+
+
+def test_charts_match_global_sidereal_mode():
+    for birth in random_births(20, seed=31):
+        for name, sid_mode in AYANAMSAS.items():
+            chart = VedicChart().calculate_chart(**birth, as_model=True, ayanamsa=name)
+            moon, ascendant, cusp, ayanamsa = global_mode_reference(birth, sid_mode)
+            assert chart.planet_longitude(1) == pytest.approx(moon, abs=1e-9)
+            assert chart.ascendant == pytest.approx(ascendant, abs=1e-9)
+            assert chart.cusps[3] == pytest.approx(cusp, abs=1e-9)
+            assert chart.ayanamsa == pytest.approx(ayanamsa, abs=1e-9)
+            assert chart.to_dict()['birth_info']['ayanamsa_name'] == name
+
+
+def test_batch_and_snapshots_per_ayanamsa():
+    births = random_births(15, seed=32)
+    calculator = VedicChartCalculator()
+    for name in AYANAMSAS:
+        assert calculator.calculate_charts(births, ayanamsa=name) == \
+            [calculator.calculate_chart(**b, ayanamsa=name) for b in births]
+    jd = get_julian_day('1990-05-17', '06:45', 5.5)
+    assert get_snapshot(jd, 'raman') is get_snapshot(jd, 'raman')
+    assert get_snapshot(jd, 'raman') != get_snapshot(jd)
+    assert get_ayanamsa(jd, 'krishnamurti') < get_ayanamsa(jd) < get_ayanamsa(jd, 'raman') + 1.5
+    with pytest.raises(ValueError):
+        calculator.calculate_chart(**births[0], ayanamsa='fagan')
+
+
+def test_concurrent_calculations_do_not_interfere():
+    births = random_births(10, seed=33)
+    calculator = VedicChartCalculator()
+    expected = {name: [calculator.calculate_chart(**b, ayanamsa=name) for b in births] for name in AYANAMSAS}
+    mismatches = []
+
+    def worker(name):
+        for _ in range(5):
+            if [calculator.calculate_chart(**b, ayanamsa=name) for b in births] != expected[name]:
+                mismatches.append(name)
+
+    threads = [threading.Thread(target=worker, args=(name,)) for name in AYANAMSAS for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert mismatches == []
+
+
+def test_dasha_and_cache_keys_carry_ayanamsa():
+    dasha = get_dasha_info(123.4, '1990-05-17', '2020-01-01', ayanamsa='Raman')
+    assert dasha['ayanamsa'] == 'raman'
+    birth = random_births(1, seed=34)[0]
+    keys = {cache_manager.generate_cache_key({**birth, 'ayanamsa': name}) for name in AYANAMSAS}
+    assert len(keys) == len(AYANAMSAS)
+
+
+if __name__ == "__main__":
+    test_charts_match_global_sidereal_mode()
+    test_batch_and_snapshots_per_ayanamsa()
+    test_concurrent_calculations_do_not_interfere()
+    test_dasha_and_cache_keys_carry_ayanamsa()
+    print("✅ Ayanamsa tests passed")
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Tests for the batch chart calculator
+"""
+
+from sample_births import random_births
+from vedic_astrology_modular import VedicChartCalculator, get_julian_day, get_julian_days
+
+
+def test_julian_days_match_single_path():
+    births = random_births(500)
+    jds = get_julian_days([b['date'] for b in births], [b['time'] for b in births],
+                          [b['timezone'] for b in births])
+    for birth, jd in zip(births, jds.tolist()):
+        assert jd == get_julian_day(birth['date'], birth['time'], birth['timezone'])
+
+
+def test_batch_matches_single_chart():
+    calculator = VedicChartCalculator()
+    births = random_births(200)
+    charts = calculator.calculate_charts(births)
+    assert len(charts) == len(births)
+    for birth, chart in zip(births, charts):
+        assert chart == calculator.calculate_chart(**birth)
+
+
+def test_batch_accepts_tuples_and_empty_input():
+    calculator = VedicChartCalculator()
+    assert calculator.calculate_charts([]) == []
+    chart = calculator.calculate_charts([("1977-10-29", "21:30", 13.08333333, 80.28333333, 5.5)])[0]
+    assert chart == calculator.calculate_chart("1977-10-29", "21:30", 13.08333333, 80.28333333, 5.5)
+
+
+if __name__ == "__main__":
+    test_julian_days_match_single_path()
+    test_batch_matches_single_chart()
+    test_batch_accepts_tuples_and_empty_input()
+    print("✅ Batch chart tests passed")
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Tests for the chart inverted index
+"""
+
+import os
+import time
+import numpy as np
+import pytest
+from chart_index import ChartIndex, chart_terms
+from vedic_astrology_modular import GRAHAS, NAKSHATRAS, RASIS, YOGAS, VedicChartCalculator
+from sample_births import random_births
+
+# (query, the same condition on a chart dict)
+QUERIES = [
+    ('yoga:Gajakesari AND nakshatra:Moon=Rohini',
+     lambda c: c['yogas']['Gajakesari'] and c['planets']['Moon']['nakshatra'] == 'Rohini'),
+    ('house:Venus=7 AND NOT dosha:Kuja',
+     lambda c: c['planets']['Venus']['house'] == 7 and not c['yogas']['Kuja_Dosha']),
+    ('yoga:Budhaditya OR sign:Moon=Kataka AND lagna:Mesha',
+     lambda c: c['yogas']['Budhaditya'] or (c['planets']['Moon']['sign'] == 'Kataka' and c['lagna']['sign'] == 'Mesha')),
+    ('NOT (house:Sun=1 or house:Sun=10) and not NOT dosha:Kuja',
+     lambda c: c['planets']['Sun']['house'] not in (1, 10) and c['yogas']['Kuja_Dosha']),
+    ('dosha:Kuja', lambda c: c['yogas']['Kuja_Dosha']),
+]
+
+
+def chart_arrays(charts):
+    planets = [[c['planets'][g] for g in GRAHAS] for c in charts]
+    signs = np.array([[RASIS.index(p['sign']) for p in row] for row in planets])
+    houses = np.array([[p['house'] for p in row] for row in planets])
+    nakshatras = np.array([[NAKSHATRAS.index(p['nakshatra']) for p in row] for row in planets])
+    asc_signs = np.array([RASIS.index(c['lagna']['sign']) for c in charts])
+    masks = np.array([sum(1 << bit for bit, key in enumerate(YOGAS.keys) if c['yogas'][key]) for c in charts])
+    return signs, houses, nakshatras, asc_signs, masks
+
+
+def test_queries_match_scanning(tmp_path):
+    charts = VedicChartCalculator().calculate_charts(random_births(300, seed=17))
+    ids = [f"chart-{k}" for k in range(len(charts))]
+    one_by_one, bulk = ChartIndex(str(tmp_path / 'single')), ChartIndex(str(tmp_path / 'bulk'))
+    # Bulk rows start part-way through a bitmap word
+    for chart_id, chart in zip(ids[:5], charts[:5]):
+        one_by_one.add(chart_id, chart)
+        bulk.add(chart_id, chart)
+    for chart_id, chart in zip(ids[5:], charts[5:]):
+        one_by_one.add(chart_id, chart)
+    bulk.add_arrays(ids[5:], *chart_arrays(charts[5:]))
+    assert len(one_by_one) == len(bulk) == 300
+
+    for query, condition in QUERIES:
+        expected = [chart_id for chart_id, chart in zip(ids, charts) if condition(chart)]
+        assert 0 < len(expected) < 300
+        for index in (one_by_one, bulk, ChartIndex(str(tmp_path / 'single')), ChartIndex(str(tmp_path / 'bulk'))):
+            assert index.search(query) == expected
+            assert index.count(query) == len(expected)
+        assert one_by_one.search(query, limit=2) == expected[:2]
+
+
+def test_persistence_replacement_and_removal(tmp_path):
+    directory = str(tmp_path / 'index')
+    charts = VedicChartCalculator().calculate_charts(random_births(3, seed=4))
+    index = ChartIndex(directory)
+    index.add('a', charts[0])
+    index.add('b', charts[1])
+    index.save()
+    # Re-adding an ID replaces its terms; removals and adds after the snapshot are replayed from the log
+    index.add('a', charts[2])
+    index.remove('b')
+    assert index.remove('missing') is False
+    with open(f"{directory}/log.jsonl", 'a') as f:
+        f.write('{"id": "c", "ter')  # a write cut short
+    reopened = ChartIndex(directory)
+    assert len(reopened) == 1
+    lagna = f"lagna:{charts[2]['lagna']['sign']}"
+    assert reopened.search(lagna) == ['a'] and reopened.search('NOT ' + lagna) == []
+    assert reopened.search(f"nakshatra:Moon={charts[2]['planets']['Moon']['nakshatra']}") == ['a']
+
+    # The engine output shape indexes to the same terms
+    engine_chart = VedicChartCalculator(output='engine').calculate_chart(**random_births(3, seed=4)[1])
+    assert sorted(chart_terms(engine_chart)) == sorted(chart_terms(charts[1]))
+
+    for query in ['yoga:Unknown', 'house:Mars=13', '(lagna:Mesha', 'lagna:Mesha AND', 'lagna:Mesha lagna:Thula', 'OR']:
+        with pytest.raises(ValueError):
+            reopened.search(query)
+    with pytest.raises(ValueError):
+        reopened.add_arrays(['x', 'x'], *chart_arrays(charts[:2]))
+
+
+def test_compaction_runs_in_the_background(tmp_path, monkeypatch):
+    import chart_index
+    monkeypatch.setattr(chart_index, 'COMPACT_LOG_ENTRIES', 5)
+    directory = str(tmp_path / 'index')
+    charts = VedicChartCalculator().calculate_charts(random_births(12, seed=9))
+    index = ChartIndex(directory)
+    for k, chart in enumerate(charts):
+        index.add(f'c{k}', chart)
+    while index._compacting:
+        time.sleep(0.01)
+    index.save()
+    assert os.path.exists(f"{directory}/index.npz") and not os.path.exists(f"{directory}/log.jsonl")
+    lagna = f"lagna:{charts[0]['lagna']['sign']}"
+    assert ChartIndex(directory).search(lagna) == index.search(lagna)
+
+    # A save cut short leaves its log entries aside; reopening replays them and finishes the save
+    index.remove('c0')
+    os.replace(f"{directory}/log.jsonl", f"{directory}/log.saving.jsonl")
+    index.add('c1', charts[2])
+    reopened = ChartIndex(directory)
+    assert len(reopened) == len(charts) - 1 and reopened.search(lagna) == index.search(lagna)
+    assert not os.path.exists(f"{directory}/log.saving.jsonl")
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    with tempfile.TemporaryDirectory() as directory:
+        test_queries_match_scanning(pathlib.Path(directory))
+    with tempfile.TemporaryDirectory() as directory:
+        test_persistence_replacement_and_removal(pathlib.Path(directory))
+    with tempfile.TemporaryDirectory() as directory:
+        test_compaction_runs_in_the_background(pathlib.Path(directory), pytest.MonkeyPatch())
+    print("✅ Chart index tests passed")
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Tests for the compact Chart model
+"""
+
+import pickle
+import pytest
+import numpy as np
+from chart_model import Chart, ChartSections, CHART_GRAHAS, NAKSHATRA_SPAN, PADA_SPAN, classify_longitudes
+from vedic_astrology_modular import VedicChartCalculator, RASIS, NAKSHATRAS, get_rasi_info
+from vedic_astrology_engine import VedicChart
+from sample_births import random_births
+
+
+def test_model_expands_to_engine_dicts():
+    for birth in random_births(50, seed=11):
+        for calculator in (VedicChartCalculator(), VedicChart()):
+            chart = calculator.calculate_chart(**birth, as_model=True)
+            assert isinstance(chart, Chart)
+            assert chart.to_dict() == calculator.calculate_chart(**birth)
+
+
+def test_integer_codes_match_dict():
+    birth = random_births(1, seed=5)[0]
+    chart = VedicChart().calculate_chart(**birth, as_model=True)
+    planets = chart.to_dict()['planets']
+    for i, name in enumerate(CHART_GRAHAS):
+        assert planets[name]['house'] == chart.house(i)
+        assert planets[name]['pada'] == chart.pada(i)
+        assert planets[name]['longitude'] == chart.planet_longitude(i)
+
+
+def test_batch_models_are_compact_and_picklable():
+    births = random_births(20, seed=3)
+    calculator = VedicChartCalculator()
+    charts = calculator.calculate_charts(births, as_model=True)
+    assert not hasattr(charts[0], '__dict__')
+    restored = pickle.loads(pickle.dumps(charts))
+    assert [c.to_dict() for c in restored] == calculator.calculate_charts(births)
+
+
+def test_sections_are_built_on_demand():
+    birth = random_births(1, seed=9)[0]
+    for calculator in (VedicChartCalculator(), VedicChart()):
+        full = calculator.calculate_chart(**birth)
+        chart = calculator.calculate_chart(**birth, sections={'planets'})
+        assert isinstance(chart, ChartSections)
+        assert list(chart) == ['planets'] and chart['planets'] == full['planets']
+        assert chart.get('yogas') == full['yogas'] and 'houses' not in chart  # yogas read the chart arrays
+        assert chart['aspects'] == full['aspects']
+        with pytest.raises(ValueError):
+            calculator.calculate_chart(**birth, sections={'planets', 'dashas'})
+
+
+def test_output_adapters_share_one_engine():
+    birth = random_births(1, seed=13)[0]
+    chart = VedicChartCalculator().calculate_chart(**birth, as_model=True)
+    legacy = VedicChart().calculate_chart(**birth)
+    assert chart.to_dict(output='engine') == legacy
+    assert VedicChartCalculator(output='engine').calculate_chart(**birth) == legacy
+    assert legacy['lagna']['rasi'] == chart.to_dict()['lagna']['sign']
+    with pytest.raises(ValueError):
+        VedicChartCalculator(output='western')
+
+
+def test_classify_longitudes_matches_rasi_info():
+    boundaries = np.arange(108) * PADA_SPAN
+    longitudes = np.concatenate([boundaries, np.nextafter(boundaries, -1)[1:], [359.999999],
+                                 np.random.default_rng(2).uniform(0, 360, 499)]).reshape(-1, 5)
+    signs, nakshatras, padas, degrees = classify_longitudes(longitudes)
+    assert signs.shape == longitudes.shape and signs.dtype == np.int64
+    for k, longitude in enumerate(longitudes.ravel().tolist()):
+        info = get_rasi_info(longitude)
+        assert RASIS[signs.flat[k]] == info['rasi'] and NAKSHATRAS[nakshatras.flat[k]] == info['nakshatra']
+        assert padas.flat[k] == info['pada'] and degrees.flat[k] == info['degrees_in_rasi']
+    assert classify_longitudes(NAKSHATRA_SPAN)[1] == 1
+
+
+if __name__ == "__main__":
+    test_model_expands_to_engine_dicts()
+    test_integer_codes_match_dict()
+    test_batch_models_are_compact_and_picklable()
+    test_sections_are_built_on_demand()
+    test_output_adapters_share_one_engine()
+    test_classify_longitudes_matches_rasi_info()
+    print("✅ Chart model tests passed")
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Tests for the process-pool chart service
+"""
+
+import time
+import pytest
+from concurrent.futures.process import BrokenProcessPool
+from chart_service import ChartService, ChartServiceBusy, ChartTaskTimeout
+from vedic_astrology_modular import VedicChartCalculator
+from sample_births import random_births
+
+
+def test_pool_matches_inline_calculation():
+    births = random_births(6, seed=21)
+    service = ChartService(workers=2)
+    try:
+        charts = service.calculate_charts(births)
+        legacy = service.calculate_chart(**births[0], output='engine', sections={'planets'})
+    finally:
+        service.shutdown()
+    assert charts == [VedicChartCalculator().calculate_chart(**b) for b in births]
+    assert legacy['planets'] == VedicChartCalculator('engine').calculate_chart(**births[0])['planets']
+    assert service.stats()['completed'] == 7 and service.stats()['synchronous'] == 0
+
+
+def test_synchronous_fallback():
+    service = ChartService(workers=0)
+    birth = random_births(1, seed=4)[0]
+    assert service.calculate_chart(**birth) == VedicChartCalculator().calculate_chart(**birth)
+    assert service.stats()['synchronous'] == 1
+
+
+def test_bounded_queue_and_timeout():
+    service = ChartService(workers=1, max_pending=1, queue_wait=0.1)
+    try:
+        service.run(time.sleep, 0)  # start the worker
+        slow = service.submit(time.sleep, 2)
+        with pytest.raises(ChartServiceBusy):
+            service.submit(time.sleep, 0)
+        with pytest.raises(ChartTaskTimeout):
+            service.result(slow, timeout=0.1)
+        assert service.stats()['rejected'] == 1 and service.stats()['timeouts'] == 1
+    finally:
+        service.shutdown()
+
+
+def test_timeout_frees_the_slot():
+    service = ChartService(workers=1, max_pending=1, queue_wait=0.5)
+    try:
+        service.run(time.sleep, 0)
+        stuck = service.submit(time.sleep, 60)
+        time.sleep(0.5)  # let the worker pick it up
+        with pytest.raises(ChartTaskTimeout):
+            service.result(stuck, timeout=0.1)
+        # The stuck worker is stopped, so its slot serves the next task
+        assert service.run(pow, 2, 10) == 1024
+        with pytest.raises(BrokenProcessPool):
+            stuck.result(timeout=5)
+        assert service.stats()['recycled'] == 1 and service.stats()['pool_failures'] == 0
+    finally:
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    test_pool_matches_inline_calculation()
+    test_synchronous_fallback()
+    test_bounded_queue_and_timeout()
+    test_timeout_frees_the_slot()
+    print("✅ Chart service tests passed")
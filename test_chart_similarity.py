@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Tests for the chart similarity index
+"""
+
+import os
+import time
+import numpy as np
+import pytest
+import chart_similarity
+from chart_similarity import DISTANCE_METRICS, ChartSimilarityIndex, chart_features
+from vedic_astrology_modular import GRAHAS, YOGAS, VedicChartCalculator
+from sample_births import random_births
+
+
+def chart_arrays(charts):
+    planet_lons = [[c['planets'][g]['longitude'] for g in GRAHAS] for c in charts]
+    asc_lons = [c['lagna']['degree'] for c in charts]
+    houses = np.array([[c['planets'][g]['house'] for g in GRAHAS] for c in charts])
+    masks = [sum(1 << bit for bit, key in enumerate(YOGAS.keys) if c['yogas'][key]) for c in charts]
+    return planet_lons, asc_lons, houses, masks
+
+
+def scan(index, features, ids, target, metric, k):
+    distances = np.linalg.norm((features - target) * index._scale, ord=DISTANCE_METRICS[metric], axis=1)
+    order = np.argsort(distances, kind='stable')[:k]
+    return [ids[i] for i in order], distances[order]
+
+
+def test_nearest_matches_scanning():
+    charts = VedicChartCalculator().calculate_charts(random_births(600, seed=9))
+    ids = [f"chart-{k}" for k in range(len(charts))]
+    index = ChartSimilarityIndex(leaf_size=8)
+    index.add_arrays(ids[:550], *chart_arrays(charts[:550]))
+    # Charts added after the build are scanned until the next rebuild
+    for chart_id, chart in zip(ids[550:], charts[550:]):
+        index.add(chart_id, chart)
+    index.add('chart-3', charts[3])
+    assert index.remove('chart-4') and not index.remove('chart-4')
+    assert len(index) == 599
+
+    features = np.array([chart_features(c) for c in charts])
+    kept = [k for k in range(len(charts)) if k != 4]
+    for metric in DISTANCE_METRICS:
+        for q in range(0, 600, 40):
+            expected_ids, expected = scan(index, features[kept], [ids[k] for k in kept], features[q], metric, 7)
+            found = index.nearest(charts[q], k=7, metric=metric)
+            assert np.allclose([d for _, d in found], expected, atol=1e-5)
+            assert found[0] == (ids[q], pytest.approx(0.0, abs=1e-5))
+            assert [i for i, _ in found[:3]] == expected_ids[:3]
+    assert ids[40] not in [i for i, _ in index.nearest(charts[40], k=5, exclude=[ids[40]])]
+
+
+def test_rebuilds_off_the_query_path(monkeypatch):
+    charts = VedicChartCalculator().calculate_charts(random_births(300, seed=31))
+    ids = [f"chart-{k}" for k in range(len(charts))]
+    index = ChartSimilarityIndex(leaf_size=8)
+    index.add_arrays(ids[:100], *chart_arrays(charts[:100]))
+    build = chart_similarity._kd_tree
+
+    def busy_build(points, leaf_size):
+        # The index stays usable while a tree is built
+        assert index.nearest(charts[0], k=1)[0][0] == 'chart-0'
+        index.remove('chart-5')
+        index.add('chart-6', charts[250])
+        index.add('late', charts[260])
+        return build(points, leaf_size)
+
+    monkeypatch.setattr(chart_similarity, 'REBUILD_MIN_PENDING', 50)
+    monkeypatch.setattr(chart_similarity, '_kd_tree', busy_build)
+    for chart_id, chart in zip(ids[100:200], charts[100:200]):
+        index.add(chart_id, chart)
+    for _ in range(500):
+        if not index._rebuilding:
+            break
+        time.sleep(0.01)
+    monkeypatch.setattr(chart_similarity, '_kd_tree', build)
+    assert index._tree_rows >= 150 and len(index) == 200
+    assert [i for i, _ in index.within(charts[5])] == []
+    assert [i for i, _ in index.within(charts[250])] == ['chart-6']
+    assert [i for i, _ in index.within(charts[260])] == ['late']
+    assert [i for i, _ in index.nearest(charts[150], k=1)] == ['chart-150']
+
+
+def test_added_charts_survive_restarts(tmp_path):
+    charts = VedicChartCalculator().calculate_charts(random_births(151, seed=33))
+    ids = [f"chart-{k}" for k in range(150)]
+    path = str(tmp_path / 'similarity.npz')
+    index = ChartSimilarityIndex(path=path, weights={'houses': 0.5})
+    index.add_arrays(ids[:100], *chart_arrays(charts[:100]))
+    assert os.path.exists(path) and not os.path.exists(tmp_path / 'similarity.log.jsonl')
+    for chart_id, chart in zip(ids[100:], charts[100:]):
+        index.add(chart_id, chart)
+    index.add('chart-1', charts[150])
+    index.remove('chart-2')
+
+    def same(reopened):
+        assert len(reopened) == len(index) == 149 and reopened.weights == index.weights
+        for q in (0, 1, 2, 120, 150):
+            found, expected = reopened.nearest(charts[q], k=5), index.nearest(charts[q], k=5)
+            assert [i for i, _ in found] == [i for i, _ in expected]
+            assert np.allclose([d for _, d in found], [d for _, d in expected], atol=1e-5)
+
+    same(ChartSimilarityIndex(path=path))
+    # A save interrupted after setting the log aside is finished on load
+    os.replace(tmp_path / 'similarity.log.jsonl', tmp_path / 'similarity.log.saving.jsonl')
+    same(ChartSimilarityIndex(path=path))
+    assert not os.path.exists(tmp_path / 'similarity.log.saving.jsonl')
+    index.save()
+    assert not os.path.exists(tmp_path / 'similarity.log.jsonl')
+    same(ChartSimilarityIndex(path=path))
+    with pytest.raises(ValueError):
+        ChartSimilarityIndex().save()
+
+
+def test_duplicates_weights_and_persistence(tmp_path):
+    base = {'date': '1988-11-02', 'time': '14:20', 'latitude': 19.07, 'longitude': 72.88, 'timezone': 5.5}
+    births = [base, dict(base, time='14:22'), dict(base, time='15:20')] + random_births(200, seed=12)
+    charts = VedicChartCalculator().calculate_charts(births)
+    ids = ['base', 'two_minutes', 'one_hour'] + [f"chart-{k}" for k in range(200)]
+    index = ChartSimilarityIndex()
+    index.add_arrays(ids, *chart_arrays(charts))
+    assert [i for i, _ in index.within(charts[0])] == ['base', 'two_minutes']
+
+    path = str(tmp_path / 'similarity.npz')
+    index.save(path)
+    loaded = ChartSimilarityIndex()
+    loaded.load(path)
+    for q in (0, 50, 100):
+        assert loaded.nearest(charts[q], k=5) == index.nearest(charts[q], k=5)
+
+    # With only the lagna weighted, neighbours are ordered by lagna distance
+    lagna_only = ChartSimilarityIndex(weights={'planets': 0.0, 'houses': 0.0, 'yogas': 0.0})
+    lagna_only.add_arrays(ids, *chart_arrays(charts))
+    separation = [abs((c['lagna']['degree'] - charts[10]['lagna']['degree'] + 180) % 360 - 180) for c in charts]
+    assert [i for i, _ in lagna_only.nearest(charts[10], k=4)] == [ids[k] for k in np.argsort(separation)[:4]]
+
+    with pytest.raises(ValueError):
+        index.nearest(charts[0], metric='cosine')
+    with pytest.raises(ValueError):
+        index.nearest(charts[0], k=0)
+    with pytest.raises(ValueError):
+        ChartSimilarityIndex(weights={'aspects': 1.0})
+    with pytest.raises(ValueError):
+        index.add_arrays(['x', 'x'], *chart_arrays(charts[:2]))
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    test_nearest_matches_scanning()
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_rebuilds_off_the_query_path(monkeypatch)
+    with tempfile.TemporaryDirectory() as directory:
+        test_duplicates_weights_and_persistence(pathlib.Path(directory))
+    with tempfile.TemporaryDirectory() as directory:
+        test_added_charts_survive_restarts(pathlib.Path(directory))
+    print("✅ Chart similarity tests passed")
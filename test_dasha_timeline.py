@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Tests for the numeric dasha timeline
+"""
+
+import datetime
+import random
+import numpy as np
+import pytest
+from julian_day import date_from_julian_day, date_julian_day, date_julian_days, dates_from_julian_days
+from vedic_astrology_modular import (
+    DASHA_LEVELS, DASHA_SYSTEMS, DAYS_PER_YEAR, NAKSHATRAS, VIMSHOTTARI_PERIODS, VIMSHOTTARI_YEARS, DashaSystem,
+    DashaTree, calculate_birth_nakshatra, calculate_mahadasha_periods, dasha_timeline, get_active_dashas,
+    get_current_mahadasha, get_dasha_info, get_dasha_tree, vimshottari_timeline
+)
+
+
+def random_dates(rng, n, start='1900-01-01', days=70000):
+    first = datetime.date.fromisoformat(start)
+    return [(first + datetime.timedelta(days=rng.randrange(days))).isoformat() for _ in range(n)]
+
+
+def test_boundaries_accumulate_exactly():
+    rng = random.Random(3)
+    for birth_date in random_dates(rng, 50):
+        nakshatra = calculate_birth_nakshatra(rng.uniform(0, 360))
+        birth_jd = date_julian_day(birth_date)
+        timeline = vimshottari_timeline(nakshatra, birth_jd)
+        elapsed = (1 - nakshatra['remaining']) * VIMSHOTTARI_PERIODS[nakshatra['lord']]
+        # No rounding drift across the nine mahadashas, nor across the antardashas of any one
+        assert timeline.boundaries[-1] == pytest.approx(birth_jd + (VIMSHOTTARI_YEARS - elapsed) * DAYS_PER_YEAR, abs=1e-6)
+        for index in range(len(timeline)):
+            antardashas = timeline.subperiods(index)
+            assert antardashas.boundaries[0] == timeline.boundaries[index]
+            assert antardashas.boundaries[-1] == pytest.approx(timeline.boundaries[index + 1], abs=1e-6)
+        periods = timeline.to_periods()
+        assert periods[0]['start_date'] == birth_date
+        assert all(a['end_date'] == b['start_date'] for a, b in zip(periods, periods[1:]))
+        assert periods == [timeline.period(k) for k in range(len(timeline))]
+
+
+def test_lookups_match_scanning():
+    rng = random.Random(8)
+    timeline = vimshottari_timeline(calculate_birth_nakshatra(200.0), date_julian_day('1970-03-01'))
+    jds = np.array([rng.uniform(timeline.boundaries[0] - 400, timeline.boundaries[-1] + 400) for _ in range(2000)]
+                   + timeline.boundaries.tolist())
+    for jd, index in zip(jds.tolist(), timeline.indices_at(jds).tolist()):
+        scanned = [k for k in range(len(timeline)) if timeline.boundaries[k] <= jd < timeline.boundaries[k + 1]]
+        assert timeline.index_at(jd) == (scanned[0] if scanned else None)
+        assert index == (scanned[0] if scanned else -1)
+
+    # Many dates in one call agree with get_dasha_info date by date
+    dates = random_dates(rng, 300, start='1960-01-01', days=50000)
+    for active in get_active_dashas(200.0, '1970-03-01', dates):
+        info = get_dasha_info(200.0, '1970-03-01', active['date'])
+        assert (active['mahadasha'], active['antardasha']) == (info['current_mahadasha'], info['current_antardasha'])
+    assert get_active_dashas(200.0, '1970-03-01', ['1969-12-31'])[0]['mahadasha'] is None
+
+    # The formatted lists can still be searched: a boundary date belongs to the period it ends
+    periods = calculate_mahadasha_periods(calculate_birth_nakshatra(200.0), datetime.date(1970, 3, 1))
+    boundary = datetime.date.fromisoformat(periods[2]['end_date'])
+    assert get_current_mahadasha(periods, boundary) is periods[2]
+    assert get_current_mahadasha(periods, boundary + datetime.timedelta(days=1)) is periods[3]
+    assert get_current_mahadasha(periods, datetime.date(1970, 2, 28)) is None
+
+
+def test_dasha_tree_expands_on_demand():
+    tree = get_dasha_tree(77.7, '1984-07-09')
+    assert get_dasha_tree(77.7, '1984-07-09') is tree
+    info = get_dasha_info(77.7, '1984-07-09', '2031-05-20')
+    strip = lambda nodes: [{k: node[k] for k in ('dasha', 'start_date', 'end_date', 'years')} for node in nodes]
+    assert strip(tree.children()) == info['mahadasha_periods']
+    assert strip(tree.children([info['current_mahadasha']['dasha']])) == info['antardasha_periods']
+
+    # The periods in force nest, from the mahadasha down to prana
+    jd = date_julian_day('2031-05-20') + 0.3
+    chain = tree.active(jd)
+    assert [node['level'] for node in chain] == list(DASHA_LEVELS)
+    assert strip(chain[:2]) == [info['current_mahadasha'], info['current_antardasha']]
+    for depth, node in enumerate(chain):
+        assert node['path'] == [n['dasha'] for n in chain[:depth + 1]]
+        assert node['start_jd'] <= jd < node['end_jd']
+        assert tree.period(node['path']) == node
+        subperiods = tree.children(node['path']) if depth < 4 else None
+        if subperiods:
+            assert subperiods[0]['start_jd'] == node['start_jd']
+            assert subperiods[-1]['end_jd'] == pytest.approx(node['end_jd'], abs=1e-6)
+            assert subperiods[0]['dasha'] == node['dasha']
+
+    # A level over a range matches walking every period of the level
+    start, end = date_julian_day('1999-02-01'), date_julian_day('2001-08-15')
+    every = [c for a in tree.children() for b in tree.children(a['path']) for c in tree.children(b['path'])]
+    assert list(tree.iter_level('pratyantardasha', start, end)) == \
+        [node for node in every if node['end_jd'] > start and node['start_jd'] < end]
+
+    # A few days at prana level expand only the periods on the way down
+    fresh = DashaTree(tree.timeline)
+    pranas = list(fresh.iter_level(4, jd, jd + 3))
+    assert 2 < len(pranas) < 40 and pranas[0]['path'] == chain[-1]['path']
+    assert fresh._subperiods.cache_info().currsize < 12
+
+    for bad in (lambda: tree.children(['Pluto']), lambda: tree.children(chain[-1]['path']),
+                lambda: tree.period(chain[-1]['path'] + ['Sun']), lambda: tree.period([]),
+                lambda: list(tree.iter_level('hora', start, end))):
+        with pytest.raises(ValueError):
+            bad()
+
+
+def test_dasha_systems_share_the_engine():
+    span = 360 / 27
+
+    def balance(system, nakshatra, progress):
+        period = dasha_timeline((NAKSHATRAS.index(nakshatra) + progress) * span, '2000-01-01', system).period(0)
+        return period['dasha'], period['years']
+
+    # Yogini starts at (nakshatra number + 3) mod 8; Ashtottari's balance runs over the lord's group of nakshatras
+    assert balance('yogini', 'Ashwini', 0.0) == ('Bhramari', 4)
+    assert balance('yogini', 'Ardra', 0.5) == ('Mangala', 0.5)
+    assert balance('ashtottari', 'Ardra', 0.0) == ('Sun', 6)
+    assert balance('ashtottari', 'Ashwini', 0.0) == ('Rahu', 6)
+    assert balance('ashtottari', 'Revati', 0.5) == ('Rahu', 7.5)
+    assert dasha_timeline(123.4, '2000-01-01', 'Vimshottari').period(0) == \
+        calculate_mahadasha_periods(calculate_birth_nakshatra(123.4), datetime.date(2000, 1, 1))[0]
+
+    for name, system in DASHA_SYSTEMS.items():
+        timeline = dasha_timeline(200.0, '1970-03-01', name)
+        assert timeline.system is system and sum(timeline.years) > 100
+        for index in range(len(timeline)):
+            assert timeline.subperiods(index).boundaries[-1] == pytest.approx(timeline.boundaries[index + 1], abs=1e-6)
+        info = get_dasha_info(200.0, '1970-03-01', '2031-05-20', system=name)
+        assert info['system'] == name and info['mahadasha_periods'] == timeline.to_periods()
+        active = get_active_dashas(200.0, '1970-03-01', ['2031-05-20'], system=name)[0]
+        assert (active['mahadasha'], active['antardasha']) == (info['current_mahadasha'], info['current_antardasha'])
+
+    # Yogini repeats its cycle, so its mahadashas are named by index in tree paths
+    tree = get_dasha_tree(200.0, '1970-03-01', 'yogini')
+    assert [node['path'] for node in tree.children()] == [[k] for k in range(32)]
+    chain = tree.active(date_julian_day('2031-05-20'))
+    assert isinstance(chain[0]['path'][0], int) and all(isinstance(step, str) for step in chain[-1]['path'][1:])
+    assert tree.period(chain[-1]['path']) == chain[-1]
+
+    with pytest.raises(ValueError):
+        dasha_timeline(200.0, '1970-03-01', 'chara')
+    with pytest.raises(ValueError):
+        tree.children(['Mangala'])
+    with pytest.raises(ValueError):
+        DashaSystem('short', ('Sun', 'Moon'), (1, 2), ('Sun', 'Moon') * 13)
+
+
+def test_date_conversions():
+    dates = ['1900-03-01', '1970-01-01', '2000-02-29', '2099-12-31']
+    jds = date_julian_days(dates)
+    assert jds.tolist() == [date_julian_day(d) for d in dates]
+    assert dates_from_julian_days(jds + 0.999).tolist() == dates
+    assert [date_from_julian_day(jd - 1e-6) for jd in jds.tolist()] == ['1900-02-28', '1969-12-31', '2000-02-28', '2099-12-30']
+
+
+if __name__ == "__main__":
+    test_boundaries_accumulate_exactly()
+    test_lookups_match_scanning()
+    test_dasha_tree_expands_on_demand()
+    test_dasha_systems_share_the_engine()
+    test_date_conversions()
+    print("✅ Dasha timeline tests passed")
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Tests for the precomputed ephemeris table backend
+"""
+
+import swisseph as swe
+from ephemeris_table import (
+    EphemerisTable, use_ephemeris_table, calc_sidereal, get_snapshot,
+    get_query_counts, reset_query_counts, SNAPSHOT_BODIES
+)
+from vedic_astrology_modular import VedicChartCalculator
+
+
+def build_table(tmp_path):
+    """Build a small two-year table"""
+    path = str(tmp_path / "ephemeris_test.bin")
+    return EphemerisTable.build(path, swe.julday(1999, 1, 1, 0.0), swe.julday(2001, 1, 1, 0.0))
+
+
+def test_table_within_tolerance(tmp_path):
+    table = build_table(tmp_path)
+    worst = table.verify(samples=300, tolerance_arcsec=2.0)
+    assert set(worst) and max(worst.values()) < 2.0
+    reopened = EphemerisTable(table.path)
+    assert reopened.count == table.count and reopened.start_jd == table.start_jd
+
+
+def test_backend_falls_back_outside_range(tmp_path):
+    table = build_table(tmp_path)
+    use_ephemeris_table(table)
+    try:
+        jd = swe.julday(1950, 6, 1, 12.0)
+        exact = swe.calc_ut(jd, swe.MOON, swe.FLG_SIDEREAL | swe.FLG_SPEED)[0]
+        assert calc_sidereal(jd, swe.MOON) == (exact[0], exact[1], exact[3])
+    finally:
+        use_ephemeris_table(None)
+
+
+def test_batch_and_single_agree_with_table(tmp_path):
+    table = build_table(tmp_path)
+    calculator = VedicChartCalculator()
+    births = [
+        {'date': f"2000-{month:02d}-15", 'time': "06:45", 'latitude': 28.61,
+         'longitude': 77.21, 'timezone': 5.5}
+        for month in range(1, 13)
+    ]
+    use_ephemeris_table(table)
+    try:
+        assert calculator.calculate_charts(births) == [calculator.calculate_chart(**b) for b in births]
+    finally:
+        use_ephemeris_table(None)
+
+
+def test_one_ephemeris_query_per_body_per_chart():
+    calculator = VedicChartCalculator()
+    reset_query_counts()
+    calculator.calculate_chart("1984-02-11", "04:17", 12.97, 77.59, 5.5)
+    assert get_query_counts() == {body_id: 1 for body_id in SNAPSHOT_BODIES.values()}
+
+    # Same instant again: the shared snapshot is reused, no new queries
+    calculator.calculate_chart("1984-02-11", "04:17", 40.71, -74.0, 5.5)
+    assert get_query_counts() == {body_id: 1 for body_id in SNAPSHOT_BODIES.values()}
+
+
+def test_snapshot_is_immutable_and_consistent():
+    jd = swe.julday(2010, 7, 4, 9.25)
+    snapshot = get_snapshot(jd)
+    assert get_snapshot(jd) is snapshot
+    exact = swe.calc_ut(jd, swe.MARS, swe.FLG_SIDEREAL | swe.FLG_SPEED)[0]
+    assert snapshot.position('Mars') == (exact[0], exact[1], exact[3])
+    assert snapshot.longitude('Ketu') == (snapshot.longitude('Rahu') + 180.0) % 360.0
+    try:
+        snapshot.jd = 0.0
+        assert False, "snapshot should be frozen"
+    except AttributeError:
+        pass
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        test_table_within_tolerance(pathlib.Path(tmp))
+        test_backend_falls_back_outside_range(pathlib.Path(tmp))
+        test_batch_and_single_agree_with_table(pathlib.Path(tmp))
+    test_one_ephemeris_query_per_body_per_chart()
+    test_snapshot_is_immutable_and_consistent()
+    print("✅ Ephemeris table tests passed")
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Tests for the Julian day conversion layer
+"""
+
+import datetime
+import pytest
+import swisseph as swe
+from julian_day import (
+    get_julian_day, get_julian_days, julian_day, julian_days,
+    julian_day_from_timestamp, julian_days_from_timestamps
+)
+from sample_births import random_births
+
+
+def strptime_julian_day(date_str, time_str, timezone_offset):
+    """The original strptime-based conversion (minutes only)"""
+    local_dt = datetime.datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H:%M")
+    utc_dt = local_dt - datetime.timedelta(hours=timezone_offset)
+    return swe.julday(utc_dt.year, utc_dt.month, utc_dt.day, utc_dt.hour + utc_dt.minute / 60.0)
+
+
+def test_matches_strptime_path():
+    for birth in random_births(500, seed=41):
+        expected = strptime_julian_day(birth['date'], birth['time'], birth['timezone'])
+        assert get_julian_day(birth['date'], birth['time'], birth['timezone']) == expected
+        year, month, day = map(int, birth['date'].split('-'))
+        hour, minute = map(int, birth['time'].split(':'))
+        assert julian_day(year, month, day, hour, minute, 0, birth['timezone']) == expected
+
+
+def test_seconds_and_cache():
+    get_julian_day.cache_clear()
+    with_seconds = get_julian_day('1990-05-17', '06:45:30', 5.5)
+    assert with_seconds - get_julian_day('1990-05-17', '06:45', 5.5) == pytest.approx(30 / 86400, abs=1e-9)
+    assert get_julian_day('1990-05-17', '06:45:30', 5.5) == with_seconds
+    assert get_julian_day.cache_info().hits == 1
+    for bad in [('1990-02-30', '06:45'), ('1990-05-17', '24:00'), ('1990-05-17', '6.45'),
+                ('17/05/1990', '06:45'), ('1990-05-17', '06:45:60')]:
+        with pytest.raises(ValueError):
+            get_julian_day(*bad, 5.5)
+
+
+def test_arrays_and_timestamps_agree():
+    dates = ['1999-12-31', '2000-01-01', '1900-03-01', '2024-02-29']
+    times = ['23:59:59.5', '00:00:30', '12:00', '05:30:00']
+    zones = [-1.0, 0.0, 5.5, 9.75]
+    jds = get_julian_days(dates, times, zones)
+    assert jds.tolist() == [get_julian_day(*args) for args in zip(dates, times, zones)]
+    assert julian_days([2000, 2000], [1, 1], [1, 2], 12).tolist() == [2451545.0, 2451546.0]
+
+    instants = [datetime.datetime(1969, 7, 20, 20, 17, 40, tzinfo=datetime.timezone.utc),
+                datetime.datetime(2038, 1, 19, 3, 14, 7, 500000, tzinfo=datetime.timezone.utc)]
+    expected = [get_julian_day(t.strftime('%Y-%m-%d'), t.strftime('%H:%M:%S.%f'), 0.0) for t in instants]
+    assert [julian_day_from_timestamp(t.timestamp()) for t in instants] == expected
+    assert julian_days_from_timestamps([t.timestamp() for t in instants]).tolist() == expected
+    with pytest.raises(ValueError):
+        julian_days([2001], [2], [29])
+
+
+if __name__ == "__main__":
+    test_matches_strptime_path()
+    test_seconds_and_cache()
+    test_arrays_and_timestamps_agree()
+    print("✅ Julian day tests passed")
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Tests for the retrograde station and combustion window index
+"""
+
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+import swisseph as swe
+from ephemeris_table import calc_sidereal
+from julian_day import get_julian_day
+from planet_windows import (
+    COMBUSTION_ORBS, INDEX_BLOCK_DAYS, WINDOW_PLANETS, PlanetWindowIndex, _BODIES, _elongation,
+    find_planet_windows
+)
+
+
+def retrograde(jd, name):
+    return calc_sidereal(jd, _BODIES[name])[2] < 0
+
+
+def combust(jd, name, retro=None):
+    longitude, _, speed = calc_sidereal(jd, _BODIES[name])
+    retro = speed < 0 if retro is None else retro
+    return _elongation(longitude, calc_sidereal(jd, swe.SUN)[0]) < COMBUSTION_ORBS[name][retro]
+
+
+def inside(jd, windows, name):
+    return any(s <= jd < e for planet, s, e in windows if planet == name)
+
+
+def test_windows_match_sampling():
+    index = PlanetWindowIndex()
+    start, end = get_julian_day('2019-01-01', '00:00', 0.0), get_julian_day('2021-01-01', '00:00', 0.0)
+    retrograde_windows = index.windows('retrograde', start, end)
+    combust_windows = index.windows('combust', start, end)
+    for k in range(int((end - start) * 4)):
+        jd = start + k / 4 + 0.01
+        for name in WINDOW_PLANETS:
+            assert inside(jd, retrograde_windows, name) == retrograde(jd, name)
+            assert inside(jd, combust_windows, name) == combust(jd, name)
+
+    # Every edge is exact: the state differs a moment either side
+    stations = index.stations(start, end)
+    assert len(stations) > 20
+    for jd, name, station in stations:
+        assert (retrograde(jd - 1e-4, name), retrograde(jd + 1e-4, name)) == (station == 'direct', station == 'retrograde')
+    stations = {jd for jd, _, _ in stations}
+    for name, s, e in combust_windows:
+        for edge, entering in ((s, True), (e, False)):
+            if edge not in stations and start < edge < end:
+                retro = retrograde(edge, name)
+                assert (combust(edge - 1e-5, name, retro), combust(edge + 1e-5, name, retro)) == (not entering, entering)
+
+
+def test_blocks_stitch_and_persist(tmp_path):
+    # A window found from either side of a block edge is the same whole window
+    edge = 6737 * INDEX_BLOCK_DAYS + 0.5
+    forward, backward = PlanetWindowIndex(), PlanetWindowIndex()
+    later = forward.windows('retrograde', edge - 1, edge + 200)
+    backward.windows('retrograde', edge + 199, edge + 200)
+    assert backward.windows('retrograde', edge - 1, edge + 200) == later
+    assert any(s < edge < e for _, s, e in later)
+
+    path = tmp_path / 'windows.json'
+    forward.save(str(path))
+    loaded = PlanetWindowIndex()
+    loaded.load(str(path))
+    assert loaded._blocks == forward._blocks
+    for kind in ('retrograde', 'combust'):
+        assert loaded.windows(kind, edge - 300, edge + 300) == forward.windows(kind, edge - 300, edge + 300)
+    assert loaded.stations(edge - 300, edge + 300) == forward.stations(edge - 300, edge + 300)
+
+
+def test_find_planet_windows():
+    result = find_planet_windows('2024-04-01', '2024-04-30', 5.5, planets=['Mercury'])
+    assert [(s['time'][:10], s['station']) for s in result['stations']] == \
+        [('2024-04-02', 'retrograde'), ('2024-04-25', 'direct')]
+    period = result['retrograde_periods'][0]
+    assert (period['start'], period['end']) == (result['stations'][0]['time'], result['stations'][1]['time'])
+    assert all(w['planet'] == 'Mercury' and w['orbs'] == {'direct': 14.0, 'retrograde': 12.0}
+               for w in result['combustion_windows'])
+    # The window around inferior conjunction uses the retrograde orb
+    assert any(period['start_jd'] < w['start_jd'] < w['end_jd'] < period['end_jd']
+               for w in result['combustion_windows'])
+
+    for args, kwargs in [(('2024-02-01', '2024-01-01'), {}), (('2024-01-01', '2024-02-01'), {'planets': ['Rahu']}),
+                         (('2024-01-01', '2024-13-01'), {}), (('1900-01-01', '2100-01-01'), {})]:
+        with pytest.raises(ValueError):
+            find_planet_windows(*args, **kwargs)
+    with pytest.raises(ValueError):
+        PlanetWindowIndex().windows('setting', 2460000.5, 2460001.5)
+
+
+def test_concurrent_queries_see_whole_blocks():
+    start = get_julian_day('2010-01-01', '00:00', 0.0)
+    ranges = [(start + k * 150, start + k * 150 + 400) for k in range(16)]
+    expected = [PlanetWindowIndex().windows(kind, a, b) for a, b in ranges for kind in ('retrograde', 'combust')]
+
+    # Threads filling the blocks others read never hand out a partly merged range
+    index = PlanetWindowIndex()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        found = list(pool.map(lambda job: index.windows(job[1], *job[0]),
+                              [((a, b), kind) for a, b in ranges for kind in ('retrograde', 'combust')]))
+    assert found == expected
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    test_windows_match_sampling()
+    with tempfile.TemporaryDirectory() as directory:
+        test_blocks_stitch_and_persist(pathlib.Path(directory))
+    test_find_planet_windows()
+    test_concurrent_queries_see_whole_blocks()
+    print("✅ Planet window tests passed")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Tests for the birth time rectification sweep
+"""
+
+import datetime
+import pytest
+from rectification import sweep_birth_times, exact_ascendant, sidereal_ascendants, _chart_state
+from vedic_astrology_modular import VedicChartCalculator, get_julian_day
+
+
+def chart_state_at(calculator, moment, latitude, longitude, timezone, ayanamsa='lahiri'):
+    chart = calculator.calculate_chart(moment.strftime('%Y-%m-%d'), moment.strftime('%H:%M:%S'),
+                                       latitude, longitude, timezone, as_model=True, ayanamsa=ayanamsa)
+    return _chart_state(chart)
+
+
+def parse(time_str):
+    return datetime.datetime.strptime(time_str, '%Y-%m-%d %H:%M:%S')
+
+
+def test_segments_match_naive_sweep():
+    calculator = VedicChartCalculator()
+    for args, ayanamsa in [(('1990-05-17', '00:00', '23:59', 12.97, 77.59, 5.5), 'lahiri'),
+                           (('2003-11-02', '20:00', '04:00', 60.17, 24.94, 2.0), 'raman')]:
+        result = sweep_birth_times(*args, resolution=60, ayanamsa=ayanamsa, calculator=calculator)
+        segments = result['segments']
+        assert len(result['events']) == len(segments) - 1 > 0
+        assert segments[0]['start'] == result['window']['start']
+        assert segments[-1]['end'] == result['window']['end']
+        for segment in segments:
+            moment = parse(segment['start'])
+            while moment < parse(segment['end']):
+                state = chart_state_at(calculator, moment, *args[3:], ayanamsa=ayanamsa)
+                assert {key: segment[key] for key in state} == state
+                moment += datetime.timedelta(minutes=7)
+
+
+def test_event_times_are_exact():
+    calculator = VedicChartCalculator()
+    args = ('1985-01-09', '03:00', '15:00', 28.61, 77.21, 5.5)
+    result = sweep_birth_times(*args, calculator=calculator)
+    assert any('lagna' in event['changes'] for event in result['events'])
+    for event in result['events']:
+        moment = parse(event['time'])
+        before = chart_state_at(calculator, moment - datetime.timedelta(seconds=1), *args[3:])
+        after = chart_state_at(calculator, moment, *args[3:])
+        for key in ('lagna', 'moon_nakshatra'):
+            if key in event['changes']:
+                assert before[key] == event['changes'][key]['from']
+                assert after[key] == event['changes'][key]['to']
+
+
+def test_vectorized_ascendant_and_options():
+    jd = get_julian_day('2010-07-04', '00:00', -4.0)
+    jds = [jd + k / 96 for k in range(97)]
+    for latitude in (-33.9, 0.0, 40.7, 64.1):
+        approx = sidereal_ascendants(jds, latitude, -74.0, 'krishnamurti')
+        exact = [exact_ascendant(t, latitude, -74.0, 'krishnamurti') for t in jds]
+        errors = [abs((a - e + 180) % 360 - 180) for a, e in zip(approx.tolist(), exact)]
+        assert max(errors) < 1 / 3600
+
+    result = sweep_birth_times('2010-07-04', '06:00', '07:00:30', 40.7, -74.0, -4.0,
+                               resolution=30, include_steps=True)
+    assert result['window']['steps'] == len(result['steps']) == 122
+    assert result['steps'][-1]['time'] == '2010-07-04 07:00:30'
+    for bad in [dict(resolution=0), dict(end_time='7 pm'), dict(ayanamsa='fagan')]:
+        kwargs = {'end_time': '07:00', **bad}
+        with pytest.raises(ValueError):
+            sweep_birth_times('2010-07-04', '06:00', latitude=40.7, longitude=-74.0, timezone=-4.0, **kwargs)
+
+
+if __name__ == "__main__":
+    test_segments_match_naive_sweep()
+    test_event_times_are_exact()
+    test_vectorized_ascendant_and_options()
+    print("✅ Rectification tests passed")
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Tests for the chart timeline generator
+"""
+
+import copy
+import datetime
+import pytest
+from vedic_astrology_modular import VedicChartCalculator
+
+
+def timeline_state(chart):
+    """The fields a timeline tracks, taken from a calculate_chart dict"""
+    return {
+        'lagna': chart['lagna']['sign'],
+        'planets': {name: {'sign': p['sign'], 'house': p['house'], 'retrograde': p['retrograde']}
+                    for name, p in chart['planets'].items()},
+        'yogas': sorted(name for name, present in chart['yogas'].items() if present)
+    }
+
+
+def apply_changes(state, changes):
+    state = copy.deepcopy(state)
+    if 'lagna' in changes:
+        assert state['lagna'] == changes['lagna']['from']
+        state['lagna'] = changes['lagna']['to']
+    for name, fields in changes.get('planets', {}).items():
+        for field, change in fields.items():
+            assert state['planets'][name][field] == change['from']
+            state['planets'][name][field] = change['to']
+    if 'yogas' in changes:
+        state['yogas'] = sorted(set(state['yogas']) - set(changes['yogas']['dissolved'])
+                                | set(changes['yogas']['formed']))
+    return state
+
+
+# (start date, start time, end date, end time, latitude, longitude, timezone), step, ayanamsa
+TIMELINES = [
+    (('1987-03-01', '00:00', '1987-04-15', '00:00', 51.5, -0.1, 0.0), 3600, 'raman'),
+    (('2019-06-01', '05:00', '2019-06-02', '05:00', -33.9, 151.2, 10.0), 600, 'lahiri'),
+    (('1960-01-01', '12:00', '1962-01-01', '12:00', 19.1, 72.9, 5.5), 86400, 'krishnamurti'),
+]
+
+
+def check_timeline(calculator, window, step, ayanamsa):
+    items = list(calculator.chart_timeline(*window, step_seconds=step, ayanamsa=ayanamsa,
+                                           include_unchanged=True))
+    start = datetime.datetime.strptime(f"{window[0]} {window[1]}", '%Y-%m-%d %H:%M')
+    end = datetime.datetime.strptime(f"{window[2]} {window[3]}", '%Y-%m-%d %H:%M')
+    assert len(items) == (end - start) // datetime.timedelta(seconds=step) + 1
+    state = None
+    for k, item in enumerate(items):
+        state = item['state'] if k == 0 else apply_changes(state, item['changes'])
+        moment = start + datetime.timedelta(seconds=k * step)
+        assert item['time'] == moment.strftime('%Y-%m-%d %H:%M:%S')
+        chart = calculator.calculate_chart(moment.strftime('%Y-%m-%d'), moment.strftime('%H:%M'),
+                                           *window[4:], ayanamsa=ayanamsa)
+        assert state == timeline_state(chart)
+
+    # Without include_unchanged only the steps that change are yielded,
+    # whatever the chunk size
+    changed = [item for item in items if item.get('changes', True)]
+    for chunk_size in (1024, 37):
+        assert list(calculator.chart_timeline(*window, step_seconds=step, ayanamsa=ayanamsa,
+                                              chunk_size=chunk_size)) == changed
+
+
+def test_replayed_changes_match_calculate_chart():
+    calculator = VedicChartCalculator()
+    for window, step, ayanamsa in TIMELINES:
+        check_timeline(calculator, window, step, ayanamsa)
+
+
+def test_invalid_timelines():
+    calculator = VedicChartCalculator()
+    place = (28.6, 77.2, 5.5)
+    for args, kwargs in [(('2020-01-02', '00:00', '2020-01-01', '00:00'), {}),
+                         (('2020-01-01', '00:00', '2020-01-02', '00:00'), {'step_seconds': 0}),
+                         (('2020-01-01', '00:00', '2020-01-02', '25:00'), {}),
+                         (('2020-01-01', '00:00', '2020-01-02', '00:00'), {'ayanamsa': 'fagan'})]:
+        with pytest.raises(ValueError):
+            next(calculator.chart_timeline(*args, *place, **kwargs))
+    single = list(calculator.chart_timeline('2020-01-01', '06:00', '2020-01-01', '06:00', *place))
+    assert len(single) == 1 and 'state' in single[0]
+
+
+if __name__ == "__main__":
+    test_replayed_changes_match_calculate_chart()
+    test_invalid_timelines()
+    print("✅ Timeline tests passed")
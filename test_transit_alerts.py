@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Tests for the transit alert scheduler
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pytest
+from julian_day import get_julian_day
+from transit_alerts import TransitAlertScheduler
+from transit_calculator import TransitCalculator
+from vedic_astrology_modular import RASIS, VedicChartCalculator
+
+START = get_julian_day('2027-01-01', '00:00', 0.0)
+
+
+def stored(scheduler):
+    return [{k: v for k, v in alert.items() if k != 'id'}
+            for alert in scheduler.due(24 * 1000, START, include_sent=True)]
+
+
+def test_alerts_follow_transit_houses():
+    chart = VedicChartCalculator().calculate_chart('1983-02-14', '08:25', 22.57, 88.36, 5.5)
+    scheduler = TransitAlertScheduler(':memory:', horizon_days=365)
+    count = scheduler.subscribe('c1', chart, now_jd=START)
+    alerts = scheduler.due(24 * 366, START)
+    assert len(alerts) == count and [a['jd'] for a in alerts] == sorted(a['jd'] for a in alerts)
+
+    # House alerts are the hour-by-hour transit series' changes of house, with its effects
+    series = TransitCalculator().iter_transit_series(chart, '2027-01-01', '2027-12-31', timezone=0.0, time='00:00',
+                                                     step_hours=1.0, output='intervals')
+    changes = sorted((stay for stay in series if stay['planet'] in ('Mars', 'Jupiter', 'Saturn')
+                      and stay['start_jd'] > START), key=lambda stay: stay['start_jd'])
+    houses = [a for a in alerts if a['kind'] == 'house' and a['jd'] < START + 365]
+    assert [(a['planet'], a['house'], a['strength'], a['impact']) for a in houses] == \
+        [(s['planet'], s['house'], s['strength'], s['impact']) for s in changes]
+    assert all(0 < s['start_jd'] - a['jd'] <= 1 / 24 + 1e-9 for a, s in zip(houses, changes))
+    lagna = RASIS.index(chart['lagna']['sign'])
+    assert all(a['sign'] == RASIS[(lagna + a['house'] - 1) % 12] and a['local_time'] > a['time'] for a in houses)
+
+    # Sent alerts drop out of due(); a chart's alerts can be read on their own
+    scheduler.mark_sent([alerts[0]['id']])
+    assert scheduler.due(24 * 366, START)[0]['id'] == alerts[1]['id']
+    assert scheduler.due(24 * 366, START, include_sent=True)[0]['sent']
+    assert scheduler.due(24 * 366, START, chart_id='other') == []
+    assert scheduler.stats()['unsent'] == count - 1
+
+    # Concurrent claims hand out every unsent alert once
+    with ThreadPoolExecutor(4) as pool:
+        claims = list(pool.map(lambda _: [a for _ in range(count) for a in scheduler.claim(24 * 366, START, limit=3)],
+                               range(4)))
+    claimed = [alert['id'] for batch in claims for alert in batch]
+    assert sorted(claimed) == sorted(alert['id'] for alert in alerts[1:])
+    assert all(alert['sent'] for batch in claims for alert in batch) and scheduler.stats()['unsent'] == 0
+    assert scheduler.unsubscribe('c1') and len(scheduler) == 0 and scheduler.stats()['alerts'] == 0
+
+
+def test_moon_sign_and_sade_sati():
+    # Saturn enters Mesha on 2027-06-02 and turns back into Meena on 2027-10-20
+    scheduler = TransitAlertScheduler(':memory:', horizon_days=365)
+    # Lagna Mesha, Moon in the 2nd, 1st and 5th houses (Rishaba, Mesha, Simha)
+    natal = np.array([[0, 1, moon_house, 1, 1, 1, 1, 1] for moon_house in (2, 1, 5)], dtype=np.int8)
+    scheduler.subscribe_array(['rishaba', 'mesha', 'simha'], natal, 5.5, now_jd=START)
+    phases = lambda scheduler, chart_id, start=START: [
+        (a['time'][:10], a['phase']) for a in scheduler.due(24 * 4000, start, chart_id=chart_id, kinds=['sade_sati'])]
+    # The retrograde step back into Meena neither ends Sade Sati nor starts it again
+    assert phases(scheduler, 'rishaba') == [('2027-06-02', 'start')]
+    assert phases(scheduler, 'mesha') == [('2027-06-02', 'peak')]
+    assert phases(scheduler, 'simha') == []
+
+    # Saturn's loops at the Meena/Mesha and Mesha/Rishaba boundaries give each phase once
+    whole = TransitAlertScheduler(':memory:', horizon_days=3300)
+    begin = get_julian_day('2025-01-01', '00:00', 0.0)
+    whole.subscribe_array(['mesha'], natal[1:2], 5.5, now_jd=begin)
+    assert phases(whole, 'mesha', begin) == \
+        [('2025-03-29', 'start'), ('2027-06-02', 'peak'), ('2029-08-08', 'setting'), ('2032-05-30', 'end')]
+    # Also when the window opens between the retrograde crossing and its direct re-crossing
+    late = TransitAlertScheduler(':memory:', horizon_days=200)
+    late_start = get_julian_day('2027-12-01', '00:00', 0.0)
+    late.subscribe_array(['mesha'], natal[1:2], 5.5, now_jd=late_start)
+    assert phases(late, 'mesha', late_start) == []
+
+    moon = [(a['planet'], a['time'][:10]) for a in scheduler.due(24 * 366, START, chart_id='mesha', kinds=['moon_sign'])]
+    assert moon == [('Saturn', '2027-06-02')]
+    assert ('Jupiter', '2027-06-25') in \
+        [(a['planet'], a['time'][:10]) for a in scheduler.due(24 * 366, START, chart_id='simha', kinds=['moon_sign'])]
+
+    with pytest.raises(ValueError):
+        scheduler.due(24, START, kinds=['eclipse'])
+    with pytest.raises(ValueError):
+        scheduler.subscribe_array(['a'], natal, 5.5)
+    with pytest.raises(ValueError):
+        scheduler.subscribe_array(['a'], np.zeros((1, 8)), 5.5)
+
+
+def test_horizon_extends_incrementally(tmp_path):
+    chart = VedicChartCalculator().calculate_chart('1991-09-30', '23:05', 51.5, -0.13, 0.0)
+    whole = TransitAlertScheduler(':memory:', horizon_days=400)
+    whole.subscribe('c', chart, now_jd=START)
+    stepped = TransitAlertScheduler(str(tmp_path / 'alerts.sqlite3'), horizon_days=100)
+    stepped.subscribe('c', chart, now_jd=START)
+    for days in (100, 100, 250, 300):
+        stepped.extend(now_jd=START + days)
+    # Extending in steps stores the same alerts as computing the whole range, and never twice
+    assert stored(stepped) == stored(whole)
+    assert stepped.stats()['horizon'] == whole.stats()['horizon']
+    stepped.close()
+
+    # The store persists; the background thread extends it to the current horizon
+    reopened = TransitAlertScheduler(str(tmp_path / 'alerts.sqlite3'), horizon_days=30, refresh_seconds=0.05)
+    assert len(reopened) == 1 and stored(reopened) == stored(whole)
+    reopened.start()
+    time.sleep(1.0)
+    reopened.stop()
+    assert reopened.stats()['horizon'][0] > '2027-12-31'
+    reopened.close()
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    test_alerts_follow_transit_houses()
+    test_moon_sign_and_sade_sati()
+    test_horizon_extends_incrementally(pathlib.Path(tempfile.mkdtemp()))
+    print("✅ Transit alert tests passed")
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Tests for the transit event finder
+"""
+
+import pytest
+from ephemeris_table import ayanamsa_offset, calc_sidereal
+from chart_model import CHART_GRAHAS, PADA_SPAN
+from julian_day import get_julian_day
+from transit_events import EVENT_GRAHAS, find_transit_events, _block_events
+
+
+def pada_index(jd, graha, ayanamsa):
+    body = EVENT_GRAHAS['Rahu' if graha == 'Ketu' else graha][0]
+    longitude = calc_sidereal(jd, body)[0] + (180.0 if graha == 'Ketu' else 0.0)
+    return int((longitude - ayanamsa_offset(jd, ayanamsa)) % 360.0 // PADA_SPAN)
+
+
+def test_events_match_hourly_sampling():
+    for start, end, timezone, ayanamsa in [('2020-01-01', '2020-02-29', 5.5, 'lahiri'),
+                                           ('1977-03-01', '1977-04-15', -5.0, 'raman')]:
+        events = find_transit_events(start, end, timezone, ayanamsa, kinds=['pada'])['events']
+        hours = [get_julian_day(start, '00:00', timezone) + k / 24
+                 for k in range(int(get_julian_day(end, '00:00', timezone) + 1
+                                    - get_julian_day(start, '00:00', timezone)) * 24)]
+        for graha in CHART_GRAHAS:
+            padas = [pada_index(jd, graha, ayanamsa) for jd in hours]
+            sampled = [after for before, after in zip(padas, padas[1:]) if before != after]
+            found = [event for event in events if event['graha'] == graha and event['jd'] < hours[-1]]
+            assert len(found) == len(sampled)
+
+        # Each crossing time is exact: the pada differs a moment either side
+        # (the true node's longitude jitters by ~1e-6 degrees, so a minute there)
+        for event in events:
+            margin = 1e-3 if event['graha'] in ('Rahu', 'Ketu') else 1e-5
+            before = pada_index(event['jd'] - margin, event['graha'], ayanamsa)
+            after = pada_index(event['jd'] + margin, event['graha'], ayanamsa)
+            assert (before % 4 + 1, after % 4 + 1) == (event['from']['pada'], event['to']['pada'])
+
+
+def test_kinds_grahas_and_shared_cache():
+    result = find_transit_events('2024-01-01', '2024-12-31', 5.5)
+    events = result['events']
+    assert [e['jd'] for e in events] == sorted(e['jd'] for e in events)
+    signs = [e for e in events if e['kind'] == 'sign']
+    assert {'Sun': 12, 'Jupiter': 1}.items() <= {g: sum(e['graha'] == g for e in signs) for g in CHART_GRAHAS}.items()
+    jupiter = next(e for e in signs if e['graha'] == 'Jupiter')
+    assert (jupiter['from'], jupiter['to'], jupiter['time'][:10]) == ('Mesha', 'Rishaba', '2024-05-01')
+    for event in signs:
+        assert any(e['jd'] == event['jd'] and e['kind'] == 'pada' for e in events)
+    assert all(e['retrograde'] for e in events if e['graha'] in ('Rahu', 'Ketu') and e['kind'] == 'sign')
+
+    filtered = find_transit_events('2024-01-01', '2024-12-31', 5.5, kinds=['sign'], grahas=['Sun'])['events']
+    assert filtered == [e for e in signs if e['graha'] == 'Sun']
+
+    # Another timezone reuses the cached blocks
+    hits = _block_events.cache_info().hits
+    find_transit_events('2024-03-01', '2024-06-30', -8.0)
+    assert _block_events.cache_info().hits > hits
+
+    for args, kwargs in [(('2024-02-01', '2024-01-01'), {}), (('2024-01-01', '2024-02-01'), {'kinds': ['tithi']}),
+                         (('2024-01-01', '2024-02-01'), {'grahas': ['Pluto']}), (('2024-01-01', '2024-13-01'), {}),
+                         (('1900-01-01', '2100-01-01'), {})]:
+        with pytest.raises(ValueError):
+            find_transit_events(*args, **kwargs)
+
+
+if __name__ == "__main__":
+    test_events_match_hourly_sampling()
+    test_kinds_grahas_and_shared_cache()
+    print("✅ Transit event tests passed")
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Tests for scoring one transit moment against many natal charts
+"""
+
+import random
+import numpy as np
+import pytest
+from chart_service import ChartService
+from transit_calculator import NATAL_ARRAY_COLUMNS, TRANSIT_PLANETS, TransitCalculator, natal_array
+from transit_snapshots import TransitSnapshotStore
+from vedic_astrology_modular import RASIS, VedicChartCalculator
+
+
+def test_scores_match_transit_summaries():
+    rng = random.Random(24)
+    calculator = TransitCalculator(ChartService(workers=0), TransitSnapshotStore(prefetch_days=0))
+    charts = [VedicChartCalculator().calculate_chart(
+                  f"19{rng.randrange(40, 99)}-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d}",
+                  f"{rng.randrange(24):02d}:{rng.randrange(60):02d}",
+                  rng.uniform(-40, 60), rng.uniform(-120, 150), 5.5)
+              for _ in range(60)]
+    natal = natal_array(charts)
+    assert natal.shape == (60, len(NATAL_ARRAY_COLUMNS)) and natal.dtype == np.int8
+
+    scores = calculator.score_transits(natal, '2026-04-10', timezone=5.5)
+    counts = scores.counts()
+    for row, (chart, summary) in enumerate(zip(charts, scores.summaries())):
+        analysis = calculator.calculate_chart_transits(chart, '2026-04-10')['transit_analysis']
+        assert summary == calculator.get_transit_summary(analysis)
+        assert scores.houses[row].tolist() == [analysis[name]['transit_house'] for name in TRANSIT_PLANETS]
+        assert counts[row].tolist() == [len(summary[key]) for key in
+                                        ('strong_transits', 'moderate_transits', 'weak_transits', 'challenging_transits')]
+    # Callers get their own lists
+    scores.summary(0)['strong_transits'].append('changed')
+    assert 'changed' not in scores.summary(0)['strong_transits']
+
+
+def test_every_natal_placement_scores():
+    calculator = TransitCalculator(ChartService(workers=0), TransitSnapshotStore(prefetch_days=0))
+    rng = np.random.default_rng(7)
+    n = 5000
+    natal = np.column_stack([rng.integers(0, 12, n), rng.integers(1, 13, (n, len(TRANSIT_PLANETS)))]).astype(np.int8)
+    scores = calculator.score_transits(natal, '2026-04-10', timezone=5.5)
+    assert len(scores) == n
+    # A bare chart with the same lagna and natal houses gets the same analysis
+    for row in rng.integers(0, n, 300).tolist():
+        lagna, *houses = natal[row].tolist()
+        chart = {'lagna': {'sign': RASIS[lagna]}, 'houses': {},
+                 'planets': {name: {'house': house} for name, house in zip(TRANSIT_PLANETS, houses)}}
+        transit_chart = {'planets': {name: {'sign': RASIS[sign]}
+                                     for name, sign in zip(TRANSIT_PLANETS, scores.transit_signs.tolist())}}
+        analysis = calculator.analyze_transits(chart, transit_chart, lagna)
+        assert scores.summary(row) == calculator.get_transit_summary(analysis)
+
+    assert len(calculator.score_transits(natal[:0], '2026-04-10')) == 0
+    for bad in (natal[:, 1:], np.where(natal == natal[0, 1], 13, natal), np.full((2, 8), -1)):
+        with pytest.raises(ValueError):
+            calculator.score_transits(bad, '2026-04-10')
+
+
+if __name__ == "__main__":
+    test_scores_match_transit_summaries()
+    test_every_natal_placement_scores()
+    print("✅ Transit score tests passed")
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Tests for transit series over date ranges
+"""
+
+import pytest
+from chart_service import ChartService
+from transit_calculator import TRANSIT_PLANETS, TransitCalculator
+from transit_snapshots import TransitSnapshotStore
+from vedic_astrology_modular import VedicChartCalculator
+
+BIRTH = {'date': '1986-11-02', 'time': '04:10', 'latitude': 19.07, 'longitude': 72.88, 'timezone': 5.5}
+
+
+def test_daily_rows_match_transit_analysis():
+    calculator = TransitCalculator(ChartService(workers=0), TransitSnapshotStore(prefetch_days=0))
+    chart = VedicChartCalculator().calculate_chart(**BIRTH)
+    rows = list(calculator.iter_transit_series(chart, '2026-01-01', '2026-02-19'))
+    assert len(rows) == 50 and rows[0]['time'] == '2026-01-01 12:00:00' and rows[-1]['time'] == '2026-02-19 12:00:00'
+    effects = calculator.transit_effects_table(chart)
+    for row in rows:
+        report = calculator.calculate_chart_transits(chart, row['time'][:10])
+        for name in TRANSIT_PLANETS:
+            analysis = report['transit_analysis'][name]
+            assert row['planets'][name] == {'sign': analysis['transit_sign'], 'house': analysis['transit_house'],
+                                            'strength': analysis['effects']['strength'],
+                                            'impact': analysis['effects']['impact']}
+            assert effects[name][analysis['transit_house']] == analysis['effects']
+
+    # Another ayanamsa frame moves the signs with it
+    raman = VedicChartCalculator().calculate_chart(**BIRTH, ayanamsa='raman')
+    row = next(calculator.iter_transit_series(raman, '2026-02-19', '2026-02-19'))
+    analysis = calculator.calculate_chart_transits(raman, '2026-02-19')['transit_analysis']
+    assert {name: row['planets'][name]['house'] for name in TRANSIT_PLANETS} == \
+        {name: analysis[name]['transit_house'] for name in TRANSIT_PLANETS}
+
+
+def test_intervals_compress_hourly_rows():
+    calculator = TransitCalculator(ChartService(workers=0), TransitSnapshotStore(prefetch_days=0))
+    chart = VedicChartCalculator().calculate_chart(**BIRTH)
+    options = dict(start_date='2025-12-20', end_date='2026-01-31', time='00:00', step_hours=1.0)
+    rows = list(calculator.iter_transit_series(chart, **options))
+    assert len(rows) == 43 * 24
+    assert rows == list(calculator.iter_transit_series(chart, **options, chunk_size=100))
+
+    intervals = list(calculator.iter_transit_series(chart, **options, output='intervals', chunk_size=100))
+    assert intervals == list(calculator.iter_transit_series(chart, **options, output='intervals'))
+    assert [interval['end_jd'] for interval in intervals] == sorted(interval['end_jd'] for interval in intervals)
+    index = {row['time']: k for k, row in enumerate(rows)}
+    for name in TRANSIT_PLANETS:
+        stays = [interval for interval in intervals if interval['planet'] == name]
+        # A planet's intervals cover every hour once, each with the placement of its rows
+        assert sum(stay['steps'] for stay in stays) == len(rows)
+        assert index[stays[0]['start']] == 0 and index[stays[-1]['end']] == len(rows) - 1
+        for stay, following in zip(stays, stays[1:]):
+            assert index[following['start']] == index[stay['end']] + 1 and following['house'] != stay['house']
+        for stay in stays:
+            first, last = index[stay['start']], index[stay['end']]
+            assert last - first + 1 == stay['steps']
+            assert (stay['start_jd'], stay['end_jd']) == (rows[first]['jd'], rows[last]['jd'])
+            placement = {key: stay[key] for key in ('sign', 'house', 'strength', 'impact')}
+            assert all(row['planets'][name] == placement for row in rows[first:last + 1])
+    # The Moon changes sign every couple of days
+    assert 15 < sum(interval['planet'] == 'Moon' for interval in intervals) < 25
+
+
+def test_series_validates_eagerly():
+    calculator = TransitCalculator(ChartService(workers=0), TransitSnapshotStore(prefetch_days=0))
+    chart = VedicChartCalculator().calculate_chart(**BIRTH)
+    bare = {section: chart[section] for section in ('lagna', 'planets', 'houses')}
+    # A bare chart needs the timezone
+    assert sum(1 for _ in calculator.iter_transit_series(bare, '2030-01-01', '2034-12-31', timezone=5.5,
+                                                         output='intervals')) > 1000
+    for bad in (dict(birth_chart=bare, start_date='2026-01-01', end_date='2026-01-31'),
+                dict(birth_chart=chart, start_date='2026-01-31', end_date='2026-01-01'),
+                dict(birth_chart=chart, start_date='2026-01-01', end_date='2026-01-31', output='weeks'),
+                dict(birth_chart=chart, start_date='2026-01-01', end_date='2026-01-31', step_hours=0),
+                dict(birth_chart=chart, start_date='1900-01-01', end_date='2099-12-31', step_hours=1.0)):
+        with pytest.raises(ValueError):
+            calculator.iter_transit_series(**bad)
+
+
+if __name__ == "__main__":
+    test_daily_rows_match_transit_analysis()
+    test_intervals_compress_hourly_rows()
+    test_series_validates_eagerly()
+    print("✅ Transit series tests passed")
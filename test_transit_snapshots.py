@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared transit snapshot store
+"""
+
+import random
+import pytest
+from chart_service import ChartService
+from planet_windows import transit_windows
+from transit_calculator import TransitCalculator
+from transit_snapshots import TransitSnapshotStore
+from vedic_astrology_modular import VedicChartCalculator
+from julian_day import get_julian_day
+
+
+def test_snapshot_charts_match_calculated_charts():
+    rng = random.Random(21)
+    store = TransitSnapshotStore(prefetch_days=0)
+    calculator = VedicChartCalculator()
+    for ayanamsa in ('lahiri', 'krishnamurti'):
+        for _ in range(150):
+            latitude, longitude = rng.uniform(-60, 65), rng.uniform(-180, 180)
+            timezone = rng.choice([5.5, -5.0, 0.0])
+            snapshot = store.get('2026-03-14', '12:00', timezone, ayanamsa)
+            expected = calculator.calculate_chart('2026-03-14', '12:00', latitude, longitude, timezone,
+                                                  sections={'planets'}, ayanamsa=ayanamsa)
+            assert snapshot.transit_chart(latitude, longitude) == dict(expected)
+    # One snapshot per moment and ayanamsa, however many places ask
+    assert store.stats()['misses'] == 6 and len(store) == 6
+    assert store.get('2026-03-14', '12:00', 5.5, 'Lahiri') is store.get('2026-03-14', '12:00', 5.5)
+
+    # Callers get their own copies
+    chart = snapshot.transit_chart(10.0, 10.0)
+    chart['planets']['Sun']['shadbala']['dignity'] = 'changed'
+    assert snapshot.transit_chart(10.0, 10.0)['planets']['Sun']['shadbala']['dignity'] != 'changed'
+    assert snapshot.planet_windows() == transit_windows(get_julian_day('2026-03-14', '12:00', 0.0), 0.0)
+
+
+def test_prefetch_and_transit_report():
+    store = TransitSnapshotStore(max_snapshots=5, prefetch_days=3)
+    store.get('2025-12-30', '12:00', 5.5)
+    store.join()
+    assert ('2026-01-02', '12:00', 5.5, 'lahiri') in store
+    assert store.stats()['prefetched'] == 3
+    store.get('2026-01-01', '12:00', 5.5)
+    store.join()
+    assert store.stats()['misses'] == 1 and store.stats()['prefetched'] == 5
+    # The oldest moments are dropped beyond max_snapshots
+    assert len(store) == 5 and ('2025-12-30', '12:00', 5.5, 'lahiri') not in store
+
+    calculator = TransitCalculator(ChartService(workers=0), store)
+    report = calculator.calculate_current_transits('1977-10-29', '21:30', 13.08, 80.28, 5.5, transit_date='2026-01-02')
+    expected = VedicChartCalculator().calculate_chart('2026-01-02', '12:00', 13.08, 80.28, 5.5, sections={'planets'})
+    assert report['transit_chart'] == dict(expected)
+    assert report['planet_windows'] == transit_windows(get_julian_day('2026-01-02', '12:00', 5.5), 5.5)
+    assert set(report['transit_analysis']) == {'Sun', 'Moon', 'Mars', 'Mercury', 'Jupiter', 'Venus', 'Saturn'}
+
+
+def test_transits_reuse_the_natal_chart():
+    service = ChartService(workers=0)
+    calculator = TransitCalculator(service, TransitSnapshotStore(prefetch_days=0))
+    birth = {'date': '1990-05-17', 'time': '06:45', 'latitude': 28.61, 'longitude': 77.21, 'timezone': 5.5}
+    full = calculator.calculate_current_transits(**birth, transit_date='2026-02-01', ayanamsa='raman')
+    assert service.stats()['synchronous'] == 1
+
+    # A natal chart dict, its Chart model or a bare chart with the place given: no chart is recalculated
+    expected = {k: v for k, v in full.items() if k != 'birth_chart'}
+    chart = VedicChartCalculator().calculate_chart(**birth, ayanamsa='raman')
+    model = VedicChartCalculator().calculate_chart(**birth, ayanamsa='raman', as_model=True)
+    bare = {section: chart[section] for section in ('lagna', 'planets', 'houses')}
+    assert calculator.calculate_chart_transits(chart, '2026-02-01') == expected
+    assert calculator.calculate_chart_transits(model, '2026-02-01') == expected
+    assert calculator.calculate_chart_transits(bare, '2026-02-01', 28.61, 77.21, 5.5, 'raman') == expected
+    assert service.stats()['synchronous'] == 1
+    with pytest.raises(ValueError):
+        calculator.calculate_chart_transits(bare, '2026-02-01')
+    with pytest.raises(ValueError):
+        calculator.calculate_chart_transits({'planets': chart['planets']}, '2026-02-01', 28.61, 77.21, 5.5)
+
+
+if __name__ == "__main__":
+    test_snapshot_charts_match_calculated_charts()
+    test_prefetch_and_transit_report()
+    test_transits_reuse_the_natal_chart()
+    print("✅ Transit snapshot tests passed")
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Tests for the compiled yoga rules
+"""
+
+import numpy as np
+import pytest
+from vedic_astrology_modular import (
+    GRAHAS, RASIS, YOGA_RULES, YOGAS, VedicChart, VedicChartCalculator, compile_yoga_rules
+)
+from sample_births import random_births
+
+
+def random_columns(n, seed):
+    rng = np.random.default_rng(seed)
+    signs = rng.integers(0, 12, (n, 9))
+    houses = (signs - rng.integers(0, 12, (n, 1))) % 12 + 1
+    return signs, houses, rng.uniform(0, 10, (n, 9)).round(2), rng.uniform(0, 12, (n, 12)).round(2)
+
+
+def reference_yogas(signs, houses, strengths, house_strengths):
+    """The yogas of one chart, written out directly"""
+    planet = {name: (RASIS[signs[p]], houses[p], strengths[p]) for p, name in enumerate(GRAHAS)}
+    kendra = lambda name: planet[name][1] in (1, 4, 7, 10)
+    in_signs = lambda name, rasis: planet[name][0] in rasis
+    return {
+        'Gajakesari': abs(planet['Moon'][1] - planet['Jupiter'][1]) % 12 in (0, 3, 6, 9),
+        'Budhaditya': planet['Sun'][0] == planet['Mercury'][0],
+        'Chandra_Mangal': planet['Moon'][0] == planet['Mars'][0],
+        'Dhana': sum(house_strengths[h - 1] > 5.0 for h in (2, 5, 9, 11)) >= 2,
+        'Raja': sum(house_strengths[h - 1] > 6.0 for h in (1, 4, 7, 10)) >= 2,
+        'Kuja_Dosha': planet['Mars'][1] in (1, 2, 4, 7, 8, 12),
+        'Ruchaka': kendra('Mars') and in_signs('Mars', ('Mesha', 'Vrischika', 'Makara')),
+        'Bhadra': kendra('Mercury') and in_signs('Mercury', ('Mithuna', 'Kanni')),
+        'Hamsa': kendra('Jupiter') and in_signs('Jupiter', ('Dhanus', 'Meena', 'Kataka')),
+        'Malavya': kendra('Venus') and in_signs('Venus', ('Rishaba', 'Thula', 'Meena')),
+        'Sasha': kendra('Saturn') and in_signs('Saturn', ('Makara', 'Kumbha', 'Thula')),
+        'Guru_Chandala': planet['Jupiter'][0] == planet['Rahu'][0],
+        'Lakshmi': planet['Venus'][1] in (1, 4, 5, 7, 9, 10) and planet['Venus'][2] >= 3.0
+    }
+
+
+def test_rules_match_reference_one_chart_and_batch():
+    columns = random_columns(3000, seed=5)
+    masks = YOGAS.evaluate_batch(*columns)
+    assert masks.dtype == np.int64
+    for k in range(len(masks)):
+        row = [column[k].tolist() for column in columns]
+        mask = YOGAS.evaluate(*row)
+        assert mask == masks[k]
+        assert YOGAS.flags(mask) == reference_yogas(*row)
+    # Every rule is both present and absent somewhere in the sample
+    for bit in range(len(YOGA_RULES)):
+        assert 0 < ((masks >> bit) & 1).sum() < len(masks)
+
+
+def test_both_outputs_list_the_same_yogas():
+    births = random_births(25, seed=21)
+    modular, engine = VedicChartCalculator(), VedicChartCalculator(output='engine')
+    batch = modular.calculate_charts(births)
+    for birth, batch_chart in zip(births, batch):
+        flags = modular.calculate_chart(**birth)['yogas']
+        assert flags == batch_chart['yogas'] and list(flags) == YOGAS.keys
+        names = dict(zip(YOGAS.keys, YOGAS.names))
+        assert engine.calculate_chart(**birth)['yogas'] == sorted(names[k] for k, v in flags.items() if v)
+
+
+def test_legacy_detector_matches_the_yogas_section():
+    # Cusp house strengths or the nodes' dignity strengths would change a few of these
+    legacy = VedicChart()
+    for birth in random_births(150, seed=9):
+        chart = legacy.calculate_chart(**birth)
+        assert legacy._detect_yogas(chart['planets'], chart['houses']) == chart['yogas']
+
+
+def test_rules_are_data():
+    rules = compile_yoga_rules([
+        ('Sun_Moon_Apart', 'Sun and Moon apart', ('not', ('same_sign', 'Sun', 'Moon'))),
+        ('Benefic_Kendra', 'Benefic in a kendra', ('any', ('in_houses', 'Jupiter', [1, 4, 7, 10]),
+                                                   ('in_houses', 'Venus', [1, 4, 7, 10]))),
+        ('Exalted_Sun', 'Exalted Sun', ('in_signs', 'Sun', ['Mesha']))
+    ])
+    signs, houses, strengths, house_strengths = [0] * 9, [1, 2, 3, 5, 2, 4, 6, 7, 1], [5.0] * 9, [4.0] * 12
+    mask = rules.evaluate(signs, houses, strengths, house_strengths)
+    assert rules.present(mask) == ['Benefic_Kendra', 'Exalted_Sun']
+    assert rules.display_names(mask) == ['Benefic in a kendra', 'Exalted Sun']
+    batch = rules.evaluate_batch(*random_columns(200, seed=8))
+    assert batch.shape == (200,) and set(batch.tolist()) <= set(range(8))
+
+    with pytest.raises(ValueError):
+        compile_yoga_rules([('Bad', 'Bad', ('opposite', 'Sun', 'Moon'))])
+    with pytest.raises(ValueError):
+        compile_yoga_rules(YOGA_RULES * 5)
+
+
+if __name__ == "__main__":
+    test_rules_match_reference_one_chart_and_batch()
+    test_both_outputs_list_the_same_yogas()
+    test_legacy_detector_matches_the_yogas_section()
+    test_rules_are_data()
+    print("✅ Yoga rule tests passed")
@@ -0,0 +1,374 @@
+# =============================================================================
+# TRANSIT ALERTS
+# Upcoming transit events of subscribed natal charts, precomputed into a
+# time-ordered SQLite table and extended in the background
+# =============================================================================
+
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+import numpy as np
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from chart_model import Chart
+from ephemeris_table import DEFAULT_AYANAMSA, resolve_ayanamsa
+from julian_day import date_from_julian_day, datetime_from_julian_day, julian_day_from_timestamp
+from transit_calculator import TRANSIT_PLANETS, TransitCalculator, check_natal_array, natal_array
+from transit_events import find_transit_events
+from vedic_astrology_modular import RASIS
+
+# Days ahead of now that every subscription's alerts are computed to
+TRANSIT_ALERT_HORIZON_DAYS = int(os.environ.get('TRANSIT_ALERT_HORIZON_DAYS', 90))
+
+# Seconds between the background thread's horizon extensions
+TRANSIT_ALERT_REFRESH_SECONDS = float(os.environ.get('TRANSIT_ALERT_REFRESH_SECONDS', 3600))
+
+# Planets whose house ingresses are alerted (slow enough to warn ahead of)
+ALERT_PLANETS = ('Mars', 'Jupiter', 'Saturn')
+
+# Alert kinds: a planet entering a natal house (counted from the lagna, as
+# analyze_transits does), entering the natal Moon sign, and Saturn moving
+# through the twelfth, first and second signs from the natal Moon
+ALERT_KINDS = ('house', 'moon_sign', 'sade_sati')
+
+# Sade Sati phase by the signs (counted from the natal Moon, 0 = the Moon
+# sign) between which Saturn moves direct, crossing that sign boundary for
+# the first time: retrograde crossings and the direct re-crossings that undo
+# them are not alerted, so each phase is alerted once
+SADE_SATI_PHASES = {(10, 11): 'start', (11, 0): 'peak', (0, 1): 'setting', (1, 2): 'end'}
+
+# Days searched before a window for each planet's previous ingress, to tell
+# a direct re-crossing from a first crossing (longer than any retrograde loop)
+INGRESS_LOOKBACK_DAYS = 400
+
+# Subscriptions extended per pass of extend()
+EXTEND_BATCH = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS subscriptions (
+    chart_id TEXT PRIMARY KEY,
+    natal BLOB NOT NULL,          -- natal array row (NATAL_ARRAY_COLUMNS, int8)
+    timezone REAL NOT NULL,
+    ayanamsa TEXT NOT NULL,
+    horizon_jd REAL NOT NULL      -- alerts are stored up to here
+);
+CREATE INDEX IF NOT EXISTS subscriptions_horizon ON subscriptions (horizon_jd);
+CREATE TABLE IF NOT EXISTS alerts (
+    id INTEGER PRIMARY KEY,
+    chart_id TEXT NOT NULL,
+    jd REAL NOT NULL,
+    kind TEXT NOT NULL,
+    planet TEXT NOT NULL,
+    sign TEXT NOT NULL,
+    house INTEGER NOT NULL,
+    detail TEXT NOT NULL,
+    sent INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS alerts_due ON alerts (sent, jd);
+CREATE INDEX IF NOT EXISTS alerts_chart ON alerts (chart_id, jd);
+"""
+
+def now_julian_day() -> float:
+    return julian_day_from_timestamp(time.time())
+
+class TransitAlertScheduler:
+    """Upcoming transit alerts of subscribed natal charts, kept in SQLite.
+
+    Each subscription stores the chart's natal array row (see
+    transit_calculator.natal_array) and how far ahead its alerts have been
+    computed. extend() computes every subscription's alerts up to
+    ``horizon_days`` from now, a batch of subscriptions at a time, from the
+    exact sign ingresses of transit_events (found once per window and
+    ayanamsa and shared by every chart). start() runs extend() every
+    ``refresh_seconds`` on a background thread. due() reads the alerts of
+    the next hours off an index on their time, so it costs a B-tree lookup
+    plus the rows returned, however many alerts are stored.
+
+    Each alert is {'id', 'chart_id', 'jd', 'time' (UT), 'local_time',
+    'kind', 'planet', 'sign', 'house', 'retrograde', 'sent'} plus, by kind:
+    'house' alerts the 'strength', 'impact', 'areas_affected' and
+    'remedies' of calculate_planet_transit_effects, and 'sade_sati'
+    alerts the 'phase' (see SADE_SATI_PHASES).
+    """
+
+    def __init__(self, path: str, horizon_days: int = TRANSIT_ALERT_HORIZON_DAYS,
+                 refresh_seconds: float = TRANSIT_ALERT_REFRESH_SECONDS,
+                 calculator: Optional[TransitCalculator] = None):
+        self.path = path
+        self.horizon_days = horizon_days
+        self.refresh_seconds = refresh_seconds
+        self.calculator = calculator or TransitCalculator()
+        self._lock = threading.Lock()
+        self._connection = None
+        self._house_details = {}  # detail JSON of house alerts, by planet, natal house, house and direction
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def _db(self) -> sqlite3.Connection:
+        """The store's connection, opened (and the schema created) on first use; hold _lock"""
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.row_factory = sqlite3.Row
+            with self._connection:
+                self._connection.executescript(_SCHEMA)
+        return self._connection
+
+    # -------------------------------------------------------------------------
+    # Subscriptions
+    # -------------------------------------------------------------------------
+
+    def subscribe(self, chart_id: str, chart: Union[Dict[str, Any], Chart],
+                  timezone: Optional[float] = None, ayanamsa: Optional[str] = None,
+                  now_jd: Optional[float] = None) -> int:
+        """Subscribe a natal chart (replacing an earlier subscription of ``chart_id``)
+        and compute its alerts from now to the horizon. The timezone (of the
+        alerts' local times) and ayanamsa default to the chart's birth_info.
+        Returns the number of alerts stored."""
+        birth_info = (chart.to_dict({'birth_info'}) if isinstance(chart, Chart) else chart).get('birth_info') or {}
+        if timezone is None:
+            if 'timezone' not in birth_info:
+                raise ValueError("Give the timezone, or a natal chart with its birth_info")
+            timezone = birth_info['timezone']
+        ayanamsa = birth_info.get('ayanamsa_name', DEFAULT_AYANAMSA) if ayanamsa is None else ayanamsa
+        return self.subscribe_array([chart_id], natal_array([chart]), timezone, ayanamsa, now_jd)
+
+    def subscribe_array(self, chart_ids: Sequence[str], natal: np.ndarray, timezone: Union[float, Iterable[float]],
+                        ayanamsa: str = DEFAULT_AYANAMSA, now_jd: Optional[float] = None) -> int:
+        """Subscribe many natal charts at once from a natal array (one row per chart ID).
+        ``timezone`` is one offset for all or one per chart. Returns the number of alerts stored."""
+        natal = check_natal_array(natal, len(chart_ids)).astype(np.int8)
+        ayanamsa = resolve_ayanamsa(ayanamsa)
+        timezones = [float(timezone)] * len(chart_ids) if np.isscalar(timezone) else [float(t) for t in timezone]
+        now_jd = now_julian_day() if now_jd is None else now_jd
+        rows = [(str(chart_id), row.tobytes(), tz, ayanamsa, now_jd)
+                for chart_id, row, tz in zip(chart_ids, natal, timezones)]
+        with self._lock, self._db:
+            self._db.executemany("DELETE FROM alerts WHERE chart_id = ?", [(row[0],) for row in rows])
+            self._db.executemany("INSERT OR REPLACE INTO subscriptions VALUES (?, ?, ?, ?, ?)", rows)
+        return self._extend_subscriptions([dict(zip(('chart_id', 'natal', 'timezone', 'ayanamsa', 'horizon_jd'), row))
+                                           for row in rows], self._horizon(now_jd))
+
+    def unsubscribe(self, chart_id: str) -> bool:
+        """Drop a subscription and its alerts"""
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM alerts WHERE chart_id = ?", (chart_id,))
+            return self._db.execute("DELETE FROM subscriptions WHERE chart_id = ?", (chart_id,)).rowcount > 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM subscriptions").fetchone()[0]
+
+    # -------------------------------------------------------------------------
+    # Precomputation
+    # -------------------------------------------------------------------------
+
+    def _horizon(self, now_jd: float) -> float:
+        """The end of the UT day ``horizon_days`` from now, so horizons line up across charts"""
+        return math.floor(now_jd + self.horizon_days - 0.5) + 1.5
+
+    def _ingresses(self, start_jd: float, end_jd: float, ayanamsa: str) -> List[Dict[str, Any]]:
+        """Sign ingresses of the alert planets in [start_jd, end_jd), each marked
+        'recrossing' when it is direct and undoes the planet's previous, retrograde, ingress"""
+        events = find_transit_events(date_from_julian_day(start_jd - INGRESS_LOOKBACK_DAYS),
+                                     date_from_julian_day(end_jd - 1e-9), 0.0,
+                                     ayanamsa, kinds=('sign',), grahas=ALERT_PLANETS)['events']
+        previous = {}
+        for event in events:
+            last = previous.get(event['graha'])
+            event['recrossing'] = (not event['retrograde'] and last is not None and last['retrograde']
+                                   and (last['from'], last['to']) == (event['to'], event['from']))
+            previous[event['graha']] = event
+        return [event for event in events if start_jd <= event['jd'] < end_jd]
+
+    def _alerts(self, chart_id: str, natal: np.ndarray, ingresses: List[Dict[str, Any]]) -> List[tuple]:
+        """Alert rows of one natal chart for a window's ingresses"""
+        lagna = int(natal[0])
+        houses = dict(zip(TRANSIT_PLANETS, natal[1:].tolist()))
+        moon_sign = (lagna + houses['Moon'] - 1) % 12
+        rows = []
+        for event in ingresses:
+            planet, sign, previous = event['graha'], RASIS.index(event['to']), RASIS.index(event['from'])
+            house = (sign - lagna) % 12 + 1
+
+            def alert(kind: str, **detail: Any) -> None:
+                rows.append((chart_id, event['jd'], kind, planet, event['to'], house,
+                             json.dumps({'retrograde': event['retrograde'], **detail})))
+
+            key = (planet, houses[planet], house, event['retrograde'])
+            if key not in self._house_details:
+                effects = self.calculator.calculate_planet_transit_effects(planet, houses[planet], event['to'], house, {})
+                self._house_details[key] = json.dumps({
+                    'retrograde': event['retrograde'], 'strength': effects['strength'], 'impact': effects['impact'],
+                    'areas_affected': effects['areas_affected'], 'remedies': effects['remedies']})
+            rows.append((chart_id, event['jd'], 'house', planet, event['to'], house, self._house_details[key]))
+            if sign == moon_sign:
+                alert('moon_sign')
+            if planet == 'Saturn' and not event['retrograde'] and not event['recrossing']:
+                phase = SADE_SATI_PHASES.get(((previous - moon_sign) % 12, (sign - moon_sign) % 12))
+                if phase is not None:
+                    alert('sade_sati', phase=phase)
+        return rows
+
+    def _extend_subscriptions(self, subscriptions: List[Dict[str, Any]], until_jd: float) -> int:
+        """Store the alerts of ``subscriptions`` from their horizons to ``until_jd``"""
+        windows = {}
+        extended = []
+        for subscription in subscriptions:
+            if subscription['horizon_jd'] >= until_jd:
+                continue
+            key = (subscription['horizon_jd'], subscription['ayanamsa'])
+            if key not in windows:
+                windows[key] = self._ingresses(key[0], until_jd, key[1])
+            natal = np.frombuffer(subscription['natal'], dtype=np.int8)
+            extended.append((subscription['chart_id'], subscription['horizon_jd'],
+                             self._alerts(subscription['chart_id'], natal, windows[key])))
+        added = 0
+        with self._lock, self._db:
+            for chart_id, horizon_jd, rows in extended:
+                # Skip charts extended or resubscribed meanwhile by another thread
+                if self._db.execute("UPDATE subscriptions SET horizon_jd = ? WHERE chart_id = ? AND horizon_jd = ?",
+                                    (until_jd, chart_id, horizon_jd)).rowcount:
+                    self._db.executemany("INSERT INTO alerts (chart_id, jd, kind, planet, sign, house, detail) "
+                                         "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+                    added += len(rows)
+        return added
+
+    def extend(self, now_jd: Optional[float] = None) -> int:
+        """Compute every subscription's alerts up to ``horizon_days`` from now,
+        EXTEND_BATCH subscriptions at a time. Returns the number of alerts added."""
+        until_jd = self._horizon(now_julian_day() if now_jd is None else now_jd)
+        added = 0
+        while True:
+            with self._lock:
+                batch = [dict(row) for row in self._db.execute(
+                    "SELECT * FROM subscriptions WHERE horizon_jd < ? ORDER BY horizon_jd LIMIT ?",
+                    (until_jd, EXTEND_BATCH))]
+            if not batch:
+                return added
+            added += self._extend_subscriptions(batch, until_jd)
+
+    def start(self) -> None:
+        """Extend the horizon now and then every refresh_seconds, on a daemon thread"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+
+        def loop() -> None:
+            while not self._stop.is_set():
+                try:
+                    self.extend()
+                except Exception as e:
+                    print(f"Transit alert extension failed: {e}")
+                self._stop.wait(self.refresh_seconds)
+
+        self._thread = threading.Thread(target=loop, name='transit-alerts', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread (after its current extension)"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    # -------------------------------------------------------------------------
+    # Queries
+    # -------------------------------------------------------------------------
+
+    def _alert(self, row: sqlite3.Row, timezone: float) -> Dict[str, Any]:
+        return {
+            'id': row['id'],
+            'chart_id': row['chart_id'],
+            'jd': row['jd'],
+            'time': datetime_from_julian_day(row['jd']).strftime("%Y-%m-%d %H:%M:%S"),
+            'local_time': datetime_from_julian_day(row['jd'], timezone).strftime("%Y-%m-%d %H:%M:%S"),
+            'kind': row['kind'],
+            'planet': row['planet'],
+            'sign': row['sign'],
+            'house': row['house'],
+            **json.loads(row['detail']),
+            'sent': bool(row['sent'])
+        }
+
+    def _due_query(self, hours: float, now_jd: Optional[float], chart_id: Optional[str],
+                   kinds: Optional[Iterable[str]], include_sent: bool, limit: Optional[int]) -> Tuple[str, list]:
+        """SELECT of the alerts due() returns, and its parameters"""
+        kinds = ALERT_KINDS if kinds is None else tuple(kinds)
+        for kind in kinds:
+            if kind not in ALERT_KINDS:
+                raise ValueError(f"Unknown alert kind: {kind} (expected one of {', '.join(ALERT_KINDS)})")
+        start_jd = now_julian_day() if now_jd is None else now_jd
+        clauses, params = ["a.jd >= ?", "a.jd < ?"], [start_jd, start_jd + hours / 24.0]
+        # Either way the (sent, jd) index serves the time range
+        clauses.append("a.sent IN (0, 1)" if include_sent else "a.sent = 0")
+        if chart_id is not None:
+            clauses.append("a.chart_id = ?")
+            params.append(chart_id)
+        if len(kinds) < len(ALERT_KINDS):
+            clauses.append(f"a.kind IN ({', '.join('?' * len(kinds))})")
+            params.extend(kinds)
+        query = (f"SELECT a.*, s.timezone FROM alerts a JOIN subscriptions s USING (chart_id) "
+                 f"WHERE {' AND '.join(clauses)} ORDER BY a.jd, a.id")
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(int(limit))
+        return query, params
+
+    def due(self, hours: float, now_jd: Optional[float] = None, chart_id: Optional[str] = None,
+            kinds: Optional[Iterable[str]] = None, include_sent: bool = False,
+            limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Alerts due in the next ``hours``, in time order (unsent only, unless include_sent)"""
+        query, params = self._due_query(hours, now_jd, chart_id, kinds, include_sent, limit)
+        with self._lock:
+            return [self._alert(row, row['timezone']) for row in self._db.execute(query, params)]
+
+    def claim(self, hours: float, now_jd: Optional[float] = None, chart_id: Optional[str] = None,
+              kinds: Optional[Iterable[str]] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """The unsent alerts due() would return, marked sent in the same
+        transaction, so concurrent callers never get the same alert"""
+        query, params = self._due_query(hours, now_jd, chart_id, kinds, False, limit)
+        with self._lock, self._db:
+            # Take the write lock first, so other processes wait to read too
+            self._db.execute("BEGIN IMMEDIATE")
+            rows = self._db.execute(query, params).fetchall()
+            self._db.executemany("UPDATE alerts SET sent = 1 WHERE id = ?", [(row['id'],) for row in rows])
+        return [dict(self._alert(row, row['timezone']), sent=True) for row in rows]
+
+    def mark_sent(self, alert_ids: Iterable[int]) -> int:
+        """Mark alerts as sent, so due() skips them. Returns how many were marked"""
+        with self._lock, self._db:
+            return self._db.executemany("UPDATE alerts SET sent = 1 WHERE id = ?",
+                                        [(int(alert_id),) for alert_id in alert_ids]).rowcount
+
+    def prune(self, before_jd: float) -> int:
+        """Delete the alerts due before ``before_jd``. Returns how many were deleted"""
+        with self._lock, self._db:
+            return self._db.execute("DELETE FROM alerts WHERE jd < ?", (before_jd,)).rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        """Subscription and alert counts, and the horizon range"""
+        with self._lock:
+            subscriptions, first, last = self._db.execute(
+                "SELECT COUNT(*), MIN(horizon_jd), MAX(horizon_jd) FROM subscriptions").fetchone()
+            alerts, unsent = self._db.execute("SELECT COUNT(*), COALESCE(SUM(sent = 0), 0) FROM alerts").fetchone()
+        return {
+            'subscriptions': subscriptions,
+            'alerts': alerts,
+            'unsent': unsent,
+            'horizon': [date_from_julian_day(first), date_from_julian_day(last)] if subscriptions else None
+        }
+
+    def close(self) -> None:
+        self.stop()
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+# Global alert scheduler (started by the app)
+transit_alerts = TransitAlertScheduler(os.environ.get('TRANSIT_ALERTS_DB', 'transit_alerts.sqlite3'))
+
+print("✅ Transit alert scheduler loaded!")
@@ -4,53 +4,409 @@
 # =============================================================================
 
 import datetime
-from typing import Dict, List, Any, Optional
-from vedic_astrology_modular import VedicChartCalculator, RASIS, SIGN_LORDS
+import math
+import numpy as np
+from typing import Dict, Iterable, Iterator, List, Any, Optional, Union
+from vedic_astrology_modular import VedicChartCalculator, GRAHAS, RASIS, SIGN_LORDS, graha_signs
+from chart_model import Chart
+from ephemeris_table import DEFAULT_AYANAMSA
+from chart_service import ChartService, chart_service
+from transit_events import find_transit_events
+from planet_windows import find_planet_windows
+from transit_snapshots import TransitSnapshotStore, transit_snapshots
+from julian_day import julian_day_steps, local_datetime
+
+# Natal chart sections the transit analysis reads
+NATAL_SECTIONS = frozenset({'lagna', 'planets', 'houses'})
+
+# Planets whose transits are analyzed, in analysis order
+TRANSIT_PLANETS = ['Sun', 'Moon', 'Mars', 'Mercury', 'Jupiter', 'Venus', 'Saturn']
+_TRANSIT_COLUMNS = [GRAHAS.index(name) for name in TRANSIT_PLANETS]
+
+# Transit series come as one row per step or as one interval per planet and house
+TRANSIT_SERIES_OUTPUTS = ('rows', 'intervals')
+
+# Most steps one transit series runs through (a century of hours)
+MAX_TRANSIT_SERIES_STEPS = 1_000_000
+
+# Columns of a natal array: the lagna sign index (0-11), then the natal
+# house (1-12) of each of TRANSIT_PLANETS
+NATAL_ARRAY_COLUMNS = ('lagna',) + tuple(TRANSIT_PLANETS)
+
+# What the codes in TransitScores.strengths and .impacts stand for
+TRANSIT_STRENGTHS = ('neutral', 'strong', 'moderate', 'weak')
+TRANSIT_IMPACTS = ('moderate', 'high', 'medium', 'challenging')
+
+# Natal rows scored per pass (bounds the scratch arrays of a batch)
+SCORE_CHUNK_ROWS = 1 << 20
+
+def _natal_chart(birth_chart: Union[Dict[str, Any], Chart]) -> Dict[str, Any]:
+    """A natal chart dict with the sections transit analysis reads"""
+    if isinstance(birth_chart, Chart):
+        birth_chart = birth_chart.to_dict(NATAL_SECTIONS | {'birth_info'})
+    missing = [section for section in sorted(NATAL_SECTIONS) if birth_chart.get(section) is None]
+    if missing:
+        raise ValueError(f"Natal chart is missing sections: {', '.join(missing)}")
+    return birth_chart
+
+def _birth_info(birth_chart: Dict[str, Any], needed: str = "the place and timezone") -> Dict[str, Any]:
+    birth_info = birth_chart.get('birth_info')
+    if birth_info is None:
+        raise ValueError(f"Give {needed}, or a natal chart with its birth_info")
+    return birth_info
+
+def natal_array(charts: Iterable[Union[Dict[str, Any], Chart]]) -> np.ndarray:
+    """The compact natal array of natal charts: one int8 row of NATAL_ARRAY_COLUMNS per chart"""
+    rows = []
+    for chart in charts:
+        chart = _natal_chart(chart)
+        rows.append([RASIS.index(chart['lagna']['sign'])] +
+                    [chart['planets'][name]['house'] for name in TRANSIT_PLANETS])
+    return np.array(rows, dtype=np.int8).reshape(-1, len(NATAL_ARRAY_COLUMNS))
+
+def check_natal_array(natal: np.ndarray, rows: Optional[int] = None) -> np.ndarray:
+    """``natal`` as an array, checked to be a natal array (of ``rows`` rows, when given)"""
+    natal = np.asarray(natal)
+    if natal.ndim != 2 or natal.shape[1] != len(NATAL_ARRAY_COLUMNS):
+        raise ValueError(f"natal array must have {len(NATAL_ARRAY_COLUMNS)} columns "
+                         f"({', '.join(NATAL_ARRAY_COLUMNS)})")
+    if rows is not None and len(natal) != rows:
+        raise ValueError(f"natal array must have one row per chart ({len(natal)} rows for {rows} charts)")
+    if len(natal) and (natal[:, 0].min() < 0 or natal[:, 0].max() > 11 or
+                       natal[:, 1:].min() < 1 or natal[:, 1:].max() > 12):
+        raise ValueError("natal array holds a lagna outside 0-11 or a house outside 1-12")
+    return natal
+
+class TransitScores:
+    """The transits of one moment scored against a batch of natal charts.
+
+    Row k belongs to row k of the natal array. ``houses`` holds each
+    planet's transit house (1-12, one column per TRANSIT_PLANETS),
+    ``strengths`` and ``impacts`` the codes of its effects (indices into
+    TRANSIT_STRENGTHS and TRANSIT_IMPACTS). counts() tallies the summary
+    categories of every row at once; summary(k) expands one row into
+    get_transit_summary's shape.
+    """
+
+    __slots__ = ('transit_signs', 'natal', 'houses', 'strengths', 'impacts', '_tables', '_cells')
+
+    def __init__(self, transit_signs: np.ndarray, natal: np.ndarray, houses: np.ndarray,
+                 strengths: np.ndarray, impacts: np.ndarray, tables: tuple):
+        self.transit_signs = transit_signs
+        self.natal = natal
+        self.houses = houses
+        self.strengths = strengths
+        self.impacts = impacts
+        self._tables = tables  # TransitCalculator._effect_tables()
+        self._cells = None
+
+    def __len__(self) -> int:
+        return len(self.natal)
+
+    def counts(self) -> np.ndarray:
+        """Strong, moderate, weak and challenging transits per row, shape (N, 4)"""
+        strength = [TRANSIT_STRENGTHS.index(name) for name in ('strong', 'moderate', 'weak')]
+        return np.stack([(self.strengths == code).sum(axis=1) for code in strength] +
+                        [(self.impacts == TRANSIT_IMPACTS.index('challenging')).sum(axis=1)], axis=1)
+
+    def _summary_cells(self) -> List[List[tuple]]:
+        """Per planet and (transit house - 1) * 12 + natal house - 1: the summary entry
+        and the summary lists it goes in"""
+        if self._cells is None:
+            self._cells = [[None] * 144 for _ in TRANSIT_PLANETS]
+            strength_codes, impact_codes, areas = self._tables
+            for p, name in enumerate(TRANSIT_PLANETS):
+                for transit_house in range(1, 13):
+                    for birth_house in range(1, 13):
+                        strength = TRANSIT_STRENGTHS[strength_codes[p, birth_house - 1, transit_house - 1]]
+                        keys = [] if strength == 'neutral' else [f"{strength}_transits"]
+                        if TRANSIT_IMPACTS[impact_codes[p, birth_house - 1, transit_house - 1]] == 'challenging':
+                            keys.append('challenging_transits')
+                        entry = {
+                            'planet': name,
+                            'birth_house': birth_house,
+                            'transit_house': transit_house,
+                            'transit_sign': RASIS[int(self.transit_signs[p])],
+                            'effects': areas[p][birth_house - 1][transit_house - 1]
+                        }
+                        self._cells[p][(transit_house - 1) * 12 + birth_house - 1] = (entry, keys)
+        return self._cells
+
+    def summary(self, row: int) -> Dict[str, Any]:
+        """Row ``row`` as TransitCalculator.get_transit_summary gives it"""
+        summary = {
+            'strong_transits': [],
+            'moderate_transits': [],
+            'weak_transits': [],
+            'challenging_transits': []
+        }
+        cells = self._summary_cells()
+        for p, (birth_house, transit_house) in enumerate(zip(self.natal[row, 1:].tolist(),
+                                                              self.houses[row].tolist())):
+            entry, keys = cells[p][(transit_house - 1) * 12 + birth_house - 1]
+            if keys:
+                transit_summary = dict(entry, effects=list(entry['effects']))
+                for key in keys:
+                    summary[key].append(transit_summary)
+        return summary
+
+    def summaries(self, rows: Optional[Iterable[int]] = None) -> Iterator[Dict[str, Any]]:
+        """summary() of each of ``rows`` (default all), lazily"""
+        for row in range(len(self)) if rows is None else rows:
+            yield self.summary(int(row))
 
 class TransitCalculator:
     """Calculate planetary transits and their effects"""
     
-    def __init__(self):
+    def __init__(self, service: Optional[ChartService] = None,
+                 snapshots: Optional[TransitSnapshotStore] = None):
         self.chart_calculator = VedicChartCalculator()
+        self.chart_service = service or chart_service
+        self.snapshots = snapshots or transit_snapshots
+        self._effect_codes = None
     
     def calculate_current_transits(self, date: str, time: str,
                                  latitude: float, longitude: float, timezone: float,
-                                 transit_date: Optional[str] = None) -> Dict[str, Any]:
-        """Calculate current planetary transits"""
-        
-        if transit_date is None:
-            transit_date = datetime.datetime.now().strftime("%Y-%m-%d")
-        
-        # Calculate birth chart
-        birth_chart = self.chart_calculator.calculate_chart(
+                                 transit_date: Optional[str] = None,
+                                 ayanamsa: str = DEFAULT_AYANAMSA) -> Dict[str, Any]:
+        """Calculate current planetary transits (both charts in ``ayanamsa``)
+
+        Calculates the natal chart from the birth details and returns it as
+        'birth_chart' alongside calculate_chart_transits(). Callers that
+        already hold the natal chart should call that directly.
+        """
+        birth_chart = self.chart_service.calculate_chart(
             date=date,
             time=time,
             latitude=latitude,
             longitude=longitude,
-            timezone=timezone
+            timezone=timezone,
+            sections=NATAL_SECTIONS,
+            ayanamsa=ayanamsa
         )
-        lagna_sign = birth_chart['lagna']['sign']
-        lagna_sign_index = RASIS.index(lagna_sign)
+        transits = self.calculate_chart_transits(birth_chart, transit_date, latitude, longitude,
+                                                 timezone, ayanamsa)
+        return {'birth_chart': birth_chart, **transits}
+    
+    def calculate_chart_transits(self, birth_chart: Union[Dict[str, Any], Chart],
+                                 transit_date: Optional[str] = None,
+                                 latitude: Optional[float] = None, longitude: Optional[float] = None,
+                                 timezone: Optional[float] = None,
+                                 ayanamsa: Optional[str] = None) -> Dict[str, Any]:
+        """Transits over an already calculated natal chart.
+
+        ``birth_chart`` is a 'modular' chart dict with at least its lagna,
+        planets and houses, or a Chart model. The place, timezone and
+        ayanamsa of the transit chart default to the chart's birth_info.
+        The transit planets come from the shared snapshot of midday on
+        ``transit_date`` (default today); only their houses from the transit
+        lagna at the place are worked out per call. Returns the transit
+        chart, analysis, planet windows and date, without the natal chart.
+        """
+        birth_chart = _natal_chart(birth_chart)
+        if None in (latitude, longitude, timezone) or ayanamsa is None:
+            birth_info = _birth_info(birth_chart)
+            latitude = birth_info['latitude'] if latitude is None else latitude
+            longitude = birth_info['longitude'] if longitude is None else longitude
+            timezone = birth_info['timezone'] if timezone is None else timezone
+            ayanamsa = birth_info.get('ayanamsa_name', DEFAULT_AYANAMSA) if ayanamsa is None else ayanamsa
         
-        # Calculate transit chart
-        transit_chart = self.chart_calculator.calculate_chart(
-            date=transit_date,
-            time="12:00",  # Midday transit
-            latitude=latitude,
-            longitude=longitude,
-            timezone=timezone
-        )
+        if transit_date is None:
+            transit_date = datetime.datetime.now().strftime("%Y-%m-%d")
+        
+        snapshot = self.snapshots.get(transit_date, "12:00", timezone, ayanamsa)  # Midday transit
+        transit_chart = snapshot.transit_chart(latitude, longitude)
+        lagna_sign_index = RASIS.index(birth_chart['lagna']['sign'])
         
         # Analyze transits
         transit_analysis = self.analyze_transits(birth_chart, transit_chart, lagna_sign_index)
         
         return {
-            'birth_chart': birth_chart,
             'transit_chart': transit_chart,
             'transit_analysis': transit_analysis,
+            'planet_windows': snapshot.planet_windows(),
             'transit_date': transit_date
         }
     
+    def transit_effects_table(self, birth_chart: Union[Dict[str, Any], Chart]) -> Dict[str, Dict[int, Dict[str, Any]]]:
+        """calculate_planet_transit_effects for each of TRANSIT_PLANETS in each transit house
+        (1-12) of a natal chart; the effects depend on nothing else"""
+        birth_chart = _natal_chart(birth_chart)
+        lagna_sign_index = RASIS.index(birth_chart['lagna']['sign'])
+        return {
+            name: {house: self.calculate_planet_transit_effects(
+                       name, birth_chart['planets'][name]['house'], RASIS[(lagna_sign_index + house - 1) % 12],
+                       house, birth_chart['houses'])
+                   for house in range(1, 13)}
+            for name in TRANSIT_PLANETS
+        }
+    
+    def iter_transit_series(self, birth_chart: Union[Dict[str, Any], Chart], start_date: str, end_date: str,
+                            timezone: Optional[float] = None, time: str = "12:00", step_hours: float = 24.0,
+                            output: str = 'rows', ayanamsa: Optional[str] = None,
+                            chunk_size: int = 4096) -> Iterator[Dict[str, Any]]:
+        """Transits over a natal chart at every step of a date range, as analyze_transits classifies them.
+
+        Steps start at ``time`` (local, in ``timezone``) on ``start_date`` and
+        run every ``step_hours`` until ``time`` on the day after ``end_date``.
+        The timezone and ayanamsa default to the chart's birth_info (the
+        ayanamsa to Lahiri for a chart without one). Transit
+        houses count from the natal lagna, so no place is needed. The graha
+        signs for ``chunk_size`` steps are found in one pass, and houses,
+        strengths and impacts are array lookups over the whole chunk.
+
+        With output='rows', each step is {'time', 'jd', 'planets'}, where
+        planets maps each of TRANSIT_PLANETS to its 'sign', 'house',
+        'strength' and 'impact'. With output='intervals', each planet's stay
+        in one house is {'planet', 'sign', 'house', 'strength', 'impact',
+        'start', 'end', 'start_jd', 'end_jd', 'steps'}. Start and end are its
+        first and last steps. Intervals come in the order they end. The full
+        effects of each planet and house are in transit_effects_table().
+        """
+        birth_chart = _natal_chart(birth_chart)
+        birth_info = _birth_info(birth_chart, "the timezone") if timezone is None else birth_chart.get('birth_info') or {}
+        timezone = birth_info['timezone'] if timezone is None else timezone
+        ayanamsa = birth_info.get('ayanamsa_name', DEFAULT_AYANAMSA) if ayanamsa is None else ayanamsa
+        if output not in TRANSIT_SERIES_OUTPUTS:
+            raise ValueError(f"Unknown transit series output: {output} (expected one of {', '.join(TRANSIT_SERIES_OUTPUTS)})")
+        if not step_hours > 0:
+            raise ValueError("step_hours must be positive")
+        start = local_datetime(start_date, time)
+        end = local_datetime(end_date, time) + datetime.timedelta(days=1)
+        if end <= start:
+            raise ValueError("end_date is before start_date")
+        step = datetime.timedelta(hours=step_hours)
+        total = math.ceil((end - start) / step)
+        if total > MAX_TRANSIT_SERIES_STEPS:
+            raise ValueError(f"range has more than {MAX_TRANSIT_SERIES_STEPS:,} steps")
+
+        # What each planet shows in each transit house, built once
+        lagna_sign_index = RASIS.index(birth_chart['lagna']['sign'])
+        effects = self.transit_effects_table(birth_chart)
+        cells = [[None] + [{'sign': RASIS[(lagna_sign_index + house - 1) % 12], 'house': house,
+                            'strength': effects[name][house]['strength'], 'impact': effects[name][house]['impact']}
+                           for house in range(1, 13)]
+                 for name in TRANSIT_PLANETS]
+        step_seconds = step.total_seconds()
+
+        def chunks() -> Iterator[tuple]:
+            for first in range(0, total, chunk_size):
+                count = min(chunk_size, total - first)
+                jds = julian_day_steps(start_date, time, timezone, step_seconds, count, first)
+                signs = graha_signs(jds, step_seconds, ayanamsa)[:, _TRANSIT_COLUMNS]
+                yield first, jds, (signs - lagna_sign_index) % 12 + 1
+
+        def local(index: int) -> str:
+            return (start + step * index).strftime("%Y-%m-%d %H:%M:%S")
+
+        def rows() -> Iterator[Dict[str, Any]]:
+            for first, jds, houses in chunks():
+                for k, (jd, row) in enumerate(zip(jds.tolist(), houses.tolist())):
+                    yield {'time': local(first + k), 'jd': jd,
+                           'planets': {name: dict(cells[p][house])
+                                       for p, (name, house) in enumerate(zip(TRANSIT_PLANETS, row))}}
+
+        def intervals() -> Iterator[Dict[str, Any]]:
+            opened = None  # per planet: (house, first step, its jd)
+            last_jd = None
+
+            def interval(p: int, closed: int, closed_jd: float) -> Dict[str, Any]:
+                house, opened_at, opened_jd = opened[p]
+                return {'planet': TRANSIT_PLANETS[p], **cells[p][house],
+                        'start': local(opened_at), 'end': local(closed), 'start_jd': opened_jd,
+                        'end_jd': closed_jd, 'steps': closed - opened_at + 1}
+
+            for first, jds, houses in chunks():
+                jd_list = jds.tolist()
+                if opened is None:
+                    opened = [(house, 0, jd_list[0]) for house in houses[0].tolist()]
+                before = np.vstack([[house for house, _, _ in opened], houses[:-1]])
+                previous_jds = [last_jd] + jd_list[:-1]
+                for k, p in zip(*np.nonzero(houses != before)):
+                    k, p = int(k), int(p)
+                    yield interval(p, first + k - 1, previous_jds[k])
+                    opened[p] = (int(houses[k, p]), first + k, jd_list[k])
+                last_jd = jd_list[-1]
+            for p in range(len(TRANSIT_PLANETS)):
+                yield interval(p, total - 1, last_jd)
+
+        return rows() if output == 'rows' else intervals()
+    
+    def _effect_tables(self) -> tuple:
+        """Strength and impact codes (planet, birth house - 1, transit house - 1) and areas
+        affected of calculate_planet_transit_effects, which reads nothing else"""
+        if self._effect_codes is None:
+            shape = (len(TRANSIT_PLANETS), 12, 12)
+            strengths, impacts = np.zeros(shape, dtype=np.int8), np.zeros(shape, dtype=np.int8)
+            areas = [[[None] * 12 for _ in range(12)] for _ in TRANSIT_PLANETS]
+            for p, name in enumerate(TRANSIT_PLANETS):
+                for birth_house in range(1, 13):
+                    for transit_house in range(1, 13):
+                        effects = self.calculate_planet_transit_effects(name, birth_house, None, transit_house, {})
+                        strengths[p, birth_house - 1, transit_house - 1] = TRANSIT_STRENGTHS.index(effects['strength'])
+                        impacts[p, birth_house - 1, transit_house - 1] = TRANSIT_IMPACTS.index(effects['impact'])
+                        areas[p][birth_house - 1][transit_house - 1] = tuple(effects['areas_affected'])
+            self._effect_codes = (strengths, impacts, areas)
+        return self._effect_codes
+
+    def score_transits(self, natal: np.ndarray, transit_date: Optional[str] = None, time: str = "12:00",
+                       timezone: float = 0.0, ayanamsa: str = DEFAULT_AYANAMSA) -> TransitScores:
+        """The transits of one moment scored against many natal charts at once.
+
+        ``natal`` is a natal array (see natal_array; NATAL_ARRAY_COLUMNS,
+        one row per chart, all in ``ayanamsa``), e.g. kept with numpy.save
+        for a whole subscriber base. The transit signs come from the shared
+        snapshot of ``time`` on ``transit_date`` (default today) in
+        ``timezone``. Every row then takes array lookups only: transit
+        houses count from the natal lagna, and the effects depend on nothing
+        but the planet, its natal house and its transit house. Summaries
+        match get_transit_summary(analyze_transits(...)) row by row.
+        """
+        natal = check_natal_array(natal)
+        if transit_date is None:
+            transit_date = datetime.datetime.now().strftime("%Y-%m-%d")
+
+        planets = self.snapshots.get(transit_date, time, timezone, ayanamsa).planets(0)
+        transit_signs = np.array([RASIS.index(planets[name]['sign']) for name in TRANSIT_PLANETS], dtype=np.int8)
+        tables = self._effect_tables()
+        strength_codes, impact_codes, _ = tables
+        # Per planet, (transit house - 1) * 12 + natal house - 1 indexes its row of the tables
+        strength_codes = strength_codes.transpose(0, 2, 1).reshape(len(TRANSIT_PLANETS), -1)
+        impact_codes = impact_codes.transpose(0, 2, 1).reshape(len(TRANSIT_PLANETS), -1)
+
+        shape = (len(natal), len(TRANSIT_PLANETS))
+        houses = np.empty(shape, dtype=np.int8)
+        strengths, impacts = np.empty(shape, dtype=np.int8), np.empty(shape, dtype=np.int8)
+        for first in range(0, len(natal), SCORE_CHUNK_ROWS):
+            rows = slice(first, first + SCORE_CHUNK_ROWS)
+            lagnas = natal[rows, 0].astype(np.int16)
+            for p in range(len(TRANSIT_PLANETS)):
+                offsets = (transit_signs[p] - lagnas) % 12
+                houses[rows, p] = offsets + 1
+                cells = offsets * 12 + (natal[rows, p + 1] - 1)
+                strengths[rows, p] = strength_codes[p][cells]
+                impacts[rows, p] = impact_codes[p][cells]
+        return TransitScores(transit_signs, natal, houses, strengths, impacts, tables)
+
+    def calculate_transit_events(self, start_date: str, end_date: str, timezone: float = 0.0,
+                                 ayanamsa: str = DEFAULT_AYANAMSA,
+                                 kinds: Optional[Iterable[str]] = None,
+                                 grahas: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Exact sign ingress, nakshatra and pada crossing times over a date range
+        (see transit_events.find_transit_events), run on the chart service"""
+        return self.chart_service.run(
+            find_transit_events, start_date, end_date, timezone, ayanamsa,
+            list(kinds) if kinds is not None else None,
+            list(grahas) if grahas is not None else None
+        )
+    
+    def calculate_planet_windows(self, start_date: str, end_date: str, timezone: float = 0.0,
+                                 planets: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Retrograde stations and combustion windows over a date range (see
+        planet_windows.find_planet_windows), looked up in this process's shared index"""
+        return find_planet_windows(start_date, end_date, timezone,
+                                   list(planets) if planets is not None else None)
+    
     def analyze_transits(self, birth_chart: Dict, transit_chart: Dict, lagna_sign_index: int) -> Dict[str, Any]:
         """Analyze the effects of transits on birth chart"""
         
@@ -60,7 +416,7 @@ class TransitCalculator:
         
         transit_effects = {}
         
-        for planet_name in ['Sun', 'Moon', 'Mars', 'Mercury', 'Jupiter', 'Venus', 'Saturn']:
+        for planet_name in TRANSIT_PLANETS:
             if planet_name in birth_planets and planet_name in transit_planets:
                 birth_house = birth_planets[planet_name]['house']
                 transit_sign = transit_planets[planet_name]['sign']
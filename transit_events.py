@@ -0,0 +1,264 @@
+# =============================================================================
+# TRANSIT EVENTS
+# Exact sign ingress, nakshatra and pada crossing times of the grahas
+# =============================================================================
+
+import datetime
+import functools
+import math
+import swisseph as swe
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from ephemeris_table import (
+    DEFAULT_AYANAMSA, ayanamsa_offset, calc_sidereal, init_thread_ephemeris, resolve_ayanamsa
+)
+from julian_day import datetime_from_julian_day, get_julian_day, parse_date
+from chart_model import CHART_GRAHAS, PADA_SPAN
+from vedic_astrology_modular import RASIS, NAKSHATRAS
+
+EVENT_KINDS = ('sign', 'nakshatra', 'pada')
+
+PADA_COUNT = 108
+PADAS_PER_NAKSHATRA = 4
+PADAS_PER_SIGN = 9
+
+# Per graha: Swiss Ephemeris body, an upper bound on its speed (degrees per
+# day) and the span in days within which it cannot station twice. The true
+# node's speed jitters around zero at its stations, so its direction is
+# never trusted (span 0). Ketu is Rahu plus 180 degrees, i.e. 54 padas.
+EVENT_GRAHAS = {
+    'Sun': (swe.SUN, 1.05, math.inf),
+    'Moon': (swe.MOON, 16.0, math.inf),
+    'Mercury': (swe.MERCURY, 2.5, 10.0),
+    'Venus': (swe.VENUS, 1.4, 20.0),
+    'Mars': (swe.MARS, 0.9, 30.0),
+    'Jupiter': (swe.JUPITER, 0.3, 60.0),
+    'Saturn': (swe.SATURN, 0.15, 60.0),
+    'Rahu': (swe.TRUE_NODE, 0.3, 0.0),
+}
+KETU_PADA_SHIFT = 54
+
+# First bracketing step in days (shorter for the Moon keeps root guesses close)
+SCAN_DAYS = 8.0
+MOON_SCAN_DAYS = 1.0
+
+# Brackets are not split below this; a graha is taken to move only by its
+# net motion within it (a stationary graha moves arc-seconds in an hour)
+MIN_BRACKET_DAYS = 1 / 24
+
+# Crossing times are refined to this precision, days (about 0.01 s); a
+# Newton step shorter than NEWTON_ACCEPT_DAYS is accepted without another
+# evaluation, as what remains after it is well below the tolerance
+ROOT_TOLERANCE_DAYS = 1e-7
+NEWTON_ACCEPT_DAYS = 1e-4
+
+# Searches are cached in blocks of this many UT days
+BLOCK_DAYS = 32
+
+# Longest range one search accepts, days
+MAX_EVENT_DAYS = 36525
+
+def _wrap(degrees: float) -> float:
+    """Angle folded into [-180, 180)"""
+    return (degrees + 180.0) % 360.0 - 180.0
+
+# =============================================================================
+# ROOT FINDING
+# =============================================================================
+
+def _hermite_guess(span: float, lon_a: float, speed_a: float, lon_b: float, speed_b: float,
+                   boundary: float) -> float:
+    """Fraction of a bracket at which the cubic Hermite curve through its ends reaches ``boundary``"""
+    m_a, m_b = speed_a * span, speed_b * span
+    s = (boundary - lon_a) / (lon_b - lon_a)
+    for _ in range(4):
+        s2, s3 = s * s, s * s * s
+        value = ((2 * s3 - 3 * s2 + 1) * lon_a + (s3 - 2 * s2 + s) * m_a +
+                 (3 * s2 - 2 * s3) * lon_b + (s3 - s2) * m_b)
+        slope = ((6 * s2 - 6 * s) * lon_a + (3 * s2 - 4 * s + 1) * m_a +
+                 (6 * s - 6 * s2) * lon_b + (3 * s2 - 2 * s) * m_b)
+        if not slope:
+            break
+        s = min(max(s - (value - boundary) / slope, 0.0), 1.0)
+    return s
+
+def _refine_crossing(position, boundary: float, direction: int, low: float, high: float,
+                     guess: float) -> float:
+    """Time in [low, high] at which a graha moving ``direction`` (+1/-1) passes ``boundary``.
+
+    Newton steps on the graha's speed, falling back to bisection whenever a
+    step would leave the bracket.
+    """
+    t = min(max(guess, low), high)
+    for _ in range(100):
+        longitude, speed = position(t)
+        offset = _wrap(longitude - boundary)
+        if offset * direction >= 0:
+            high = t
+        else:
+            low = t
+        step = offset / speed if speed else math.inf
+        following = t - step
+        if low < following < high and abs(step) < NEWTON_ACCEPT_DAYS:
+            return following
+        if not low < following < high:
+            following = (low + high) / 2
+        if high - low < ROOT_TOLERANCE_DAYS:
+            return following
+        t = following
+    return (low + high) / 2
+
+def _graha_crossings(name: str, start_jd: float, end_jd: float,
+                     ayanamsa: str) -> List[Tuple[float, int, int]]:
+    """Pada boundary crossings of one graha as (jd, boundary index, direction)"""
+    body, max_speed, monotonic_days = EVENT_GRAHAS[name]
+    step = MOON_SCAN_DAYS if name == 'Moon' else SCAN_DAYS
+
+    def position(jd: float) -> Tuple[float, float]:
+        longitude, _, speed = calc_sidereal(jd, body)
+        return (longitude - ayanamsa_offset(jd, ayanamsa)) % 360.0, speed
+
+    crossings = []
+    t0, p0 = start_jd, position(start_jd)
+    while t0 < end_jd:
+        t1 = min(t0 + step, end_jd)
+        p1 = position(t1)
+        brackets = [(t0, p0, t1, p1)]
+        while brackets:
+            a, (lon_a, speed_a), b, (lon_b, speed_b) = brackets.pop()
+            motion = _wrap(lon_b - lon_a)
+            reach = max_speed * (b - a)
+
+            # Skip brackets in which no pada boundary is within reach
+            lowest = lon_a + max(-reach, motion - reach)
+            highest = lon_a + min(reach, motion + reach)
+            if math.floor(highest / PADA_SPAN) == math.floor(lowest / PADA_SPAN):
+                continue
+
+            # Split until the graha cannot have turned around inside
+            steady = b - a <= monotonic_days and (speed_a < 0) == (speed_b < 0)
+            if not steady and b - a > MIN_BRACKET_DAYS:
+                middle = (a + b) / 2
+                p_middle = position(middle)
+                brackets.append((middle, p_middle, b, (lon_b, speed_b)))
+                brackets.append((a, (lon_a, speed_a), middle, p_middle))
+                continue
+
+            # Monotonic: every boundary between the two ends is crossed once
+            direction = 1 if motion > 0 else -1
+            first, last = math.floor(lon_a / PADA_SPAN), math.floor((lon_a + motion) / PADA_SPAN)
+            boundaries = range(first + 1, last + 1) if direction > 0 else range(first, last, -1)
+            low = a
+            for k in boundaries:
+                boundary = k * PADA_SPAN
+                guess = a + (b - a) * _hermite_guess(b - a, lon_a, speed_a, lon_a + motion, speed_b, boundary)
+                low = _refine_crossing(position, boundary % 360.0, direction, low, b, guess)
+                crossings.append((low, k % PADA_COUNT, direction))
+        t0, p0 = t1, p1
+    crossings.sort()
+    return crossings
+
+@functools.lru_cache(maxsize=512)
+def _block_events(block: int, ayanamsa: str) -> Tuple[Tuple[float, int, int, int], ...]:
+    """All graha pada crossings in one block of BLOCK_DAYS UT days, as
+    (jd, graha index, boundary, direction) in time order.
+
+    Cached: every search over the same days, for any user and timezone,
+    shares the block.
+    """
+    init_thread_ephemeris()
+    start_jd = block * BLOCK_DAYS + 0.5
+    end_jd = start_jd + BLOCK_DAYS
+    ketu = CHART_GRAHAS.index('Ketu')
+    events = []
+    for name in EVENT_GRAHAS:
+        index = CHART_GRAHAS.index(name)
+        for jd, boundary, direction in _graha_crossings(name, start_jd, end_jd, ayanamsa):
+            if start_jd <= jd < end_jd:
+                events.append((jd, index, boundary, direction))
+                if name == 'Rahu':
+                    events.append((jd, ketu, (boundary + KETU_PADA_SHIFT) % PADA_COUNT, direction))
+    events.sort()
+    return tuple(events)
+
+def _events_between(start_jd: float, end_jd: float, ayanamsa: str) -> Iterable[Tuple[float, int, int, int]]:
+    """Graha pada crossings in [start_jd, end_jd), from the cached blocks"""
+    for block in range(math.floor((start_jd - 0.5) / BLOCK_DAYS), math.ceil((end_jd - 0.5) / BLOCK_DAYS)):
+        for event in _block_events(block, ayanamsa):
+            if start_jd <= event[0] < end_jd:
+                yield event
+
+# =============================================================================
+# EVENTS
+# =============================================================================
+
+def _pada_fields(pada_index: int, kind: str) -> Any:
+    if kind == 'sign':
+        return RASIS[pada_index // PADAS_PER_SIGN]
+    if kind == 'nakshatra':
+        return NAKSHATRAS[pada_index // PADAS_PER_NAKSHATRA]
+    return {'nakshatra': NAKSHATRAS[pada_index // PADAS_PER_NAKSHATRA],
+            'pada': pada_index % PADAS_PER_NAKSHATRA + 1}
+
+def find_transit_events(start_date: str, end_date: str, timezone: float = 0.0,
+                        ayanamsa: str = DEFAULT_AYANAMSA, kinds: Optional[Iterable[str]] = None,
+                        grahas: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """Exact sign ingress, nakshatra and pada crossing times from start_date to end_date.
+
+    Both dates are local ('YYYY-MM-DD', end inclusive) in ``timezone``.
+    Each graha is bracketed between instants at which a boundary crossing
+    is possible and cannot have turned around, and every crossing in a
+    bracket is solved for by Newton/bisection to ROOT_TOLERANCE_DAYS.
+    ``kinds`` ('sign', 'nakshatra', 'pada') and ``grahas`` filter the
+    events, which are in time order.
+    """
+    ayanamsa = resolve_ayanamsa(ayanamsa)
+    kinds = EVENT_KINDS if kinds is None else tuple(kinds)
+    grahas = CHART_GRAHAS if grahas is None else tuple(grahas)
+    for kind in kinds:
+        if kind not in EVENT_KINDS:
+            raise ValueError(f"Unknown event kind: {kind} (expected one of {', '.join(EVENT_KINDS)})")
+    for name in grahas:
+        if name not in CHART_GRAHAS:
+            raise ValueError(f"Unknown graha: {name}")
+    parse_date(end_date)
+    start_jd = get_julian_day(start_date, '00:00', timezone)
+    end_jd = get_julian_day(end_date, '00:00', timezone) + 1.0
+    if end_jd <= start_jd:
+        raise ValueError("end_date is before start_date")
+    if end_jd - start_jd > MAX_EVENT_DAYS:
+        raise ValueError(f"range is longer than {MAX_EVENT_DAYS} days")
+
+    wanted = {CHART_GRAHAS.index(name) for name in grahas}
+    events = []
+    for jd, index, boundary, direction in _events_between(start_jd, end_jd, ayanamsa):
+        if index not in wanted:
+            continue
+        before, after = ((boundary - 1) % PADA_COUNT, boundary) if direction > 0 else \
+            (boundary, (boundary - 1) % PADA_COUNT)
+        moment = datetime_from_julian_day(jd, timezone) + datetime.timedelta(microseconds=500000)
+        time = moment.strftime("%Y-%m-%d %H:%M:%S")
+        for kind in kinds:
+            if (kind == 'sign' and boundary % PADAS_PER_SIGN) or \
+               (kind == 'nakshatra' and boundary % PADAS_PER_NAKSHATRA):
+                continue
+            events.append({
+                'time': time,
+                'jd': jd,
+                'graha': CHART_GRAHAS[index],
+                'kind': kind,
+                'from': _pada_fields(before, kind),
+                'to': _pada_fields(after, kind),
+                'retrograde': direction < 0
+            })
+
+    return {
+        'range': {
+            'start_date': start_date,
+            'end_date': end_date,
+            'timezone': timezone,
+            'ayanamsa': ayanamsa
+        },
+        'events': events
+    }
+
+print("✅ Transit event finder loaded!")
@@ -0,0 +1,192 @@
+# =============================================================================
+# TRANSIT SNAPSHOTS
+# The planetary state at a transit moment, computed once per moment and
+# shared by every user; only the lagna-relative placements are per user
+# =============================================================================
+
+import datetime
+import math
+import os
+import queue
+import threading
+import swisseph as swe
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from ephemeris_table import (
+    DEFAULT_AYANAMSA, ayanamsa_offset, get_ayanamsa, get_snapshot, init_thread_ephemeris, resolve_ayanamsa
+)
+from chart_model import Chart
+import vedic_astrology_modular  # registers the chart output shapes
+from julian_day import get_julian_day, parse_date
+from planet_windows import transit_windows
+
+# Snapshots kept per process (each is a few tens of KB)
+TRANSIT_SNAPSHOT_CACHE_SIZE = int(os.environ.get('TRANSIT_SNAPSHOT_CACHE_SIZE', 2048))
+
+# Days after a requested transit date computed in the background
+TRANSIT_PREFETCH_DAYS = int(os.environ.get('TRANSIT_PREFETCH_DAYS', 7))
+
+# (date, time, timezone, ayanamsa): a local transit moment in one ayanamsa frame
+SnapshotKey = Tuple[str, str, float, str]
+
+def _copy_window(window: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if window is None:
+        return None
+    window = dict(window)
+    if 'orbs' in window:
+        window['orbs'] = dict(window['orbs'])
+    return window
+
+class TransitSnapshot:
+    """Everything about one transit moment that does not depend on the observer.
+
+    The grahas' signs, nakshatras and padas, their retrograde periods and
+    combustion windows, and their placements from each of the twelve
+    possible lagna signs (whole-sign houses decide Shadbala, so the
+    planets section of a transit chart depends on the place only through
+    the lagna sign). transit_chart() finds the lagna for a place and picks
+    the matching placements.
+    """
+
+    __slots__ = ('date', 'time', 'timezone', 'ayanamsa', 'jd', 'snapshot', '_planets', '_windows')
+
+    def __init__(self, date: str, time: str, timezone: float, ayanamsa: str = DEFAULT_AYANAMSA):
+        self.date = date
+        self.time = time
+        self.timezone = timezone
+        self.ayanamsa = resolve_ayanamsa(ayanamsa)
+        self.jd = get_julian_day(date, time, timezone)
+        self.snapshot = get_snapshot(self.jd, self.ayanamsa)
+        ayanamsa_value = get_ayanamsa(self.jd, self.ayanamsa)
+        self._planets = [
+            Chart.from_snapshot('modular', date, time, math.nan, math.nan, timezone, self.snapshot,
+                                ayanamsa_value, asc_sign * 30.0, None, self.ayanamsa).to_dict({'planets'})['planets']
+            for asc_sign in range(12)
+        ]
+        self._windows = transit_windows(self.jd, timezone)
+
+    def lagna(self, latitude: float, longitude: float) -> float:
+        """Sidereal ascendant of the transit moment at a place"""
+        init_thread_ephemeris()
+        _, ascmc = swe.houses_ex(self.jd, latitude, longitude, b'P', flags=swe.FLG_SIDEREAL)
+        return (ascmc[0] - ayanamsa_offset(self.jd, self.ayanamsa)) % 360.0
+
+    def planets(self, asc_sign: int) -> Dict[str, Dict[str, Any]]:
+        """The planets section of a transit chart whose lagna is in ``asc_sign`` (a fresh copy)"""
+        return {name: dict(fields, shadbala=dict(fields['shadbala']))
+                for name, fields in self._planets[asc_sign].items()}
+
+    def transit_chart(self, latitude: float, longitude: float) -> Dict[str, Any]:
+        """The transit chart at a place, as calculate_chart(sections={'planets'}) gives it"""
+        return {'planets': self.planets(int(self.lagna(latitude, longitude) // 30))}
+
+    def planet_windows(self) -> Dict[str, Dict[str, Optional[Dict[str, Any]]]]:
+        """Retrograde periods and combustion windows in force (see planet_windows.transit_windows)"""
+        return {name: {kind: _copy_window(window) for kind, window in kinds.items()}
+                for name, kinds in self._windows.items()}
+
+class TransitSnapshotStore:
+    """Transit snapshots shared by every request in a process.
+
+    A snapshot is computed the first time any request asks for its moment
+    and kept (the most recent ``max_snapshots``). Each request also queues
+    the same local time on the next ``prefetch_days`` days, which a
+    background thread computes, so a day's snapshots are usually ready
+    before anyone asks for them.
+    """
+
+    def __init__(self, max_snapshots: int = TRANSIT_SNAPSHOT_CACHE_SIZE,
+                 prefetch_days: int = TRANSIT_PREFETCH_DAYS):
+        self.max_snapshots = max_snapshots
+        self.prefetch_days = prefetch_days
+        self._lock = threading.Lock()
+        self._snapshots: 'OrderedDict[SnapshotKey, TransitSnapshot]' = OrderedDict()
+        self._queued = set()
+        self._queue: 'queue.Queue[SnapshotKey]' = queue.Queue()
+        self._thread = None
+        self._stats = {'hits': 0, 'misses': 0, 'prefetched': 0}
+
+    @staticmethod
+    def _key(date: str, time: str, timezone: float, ayanamsa: str) -> SnapshotKey:
+        return (date, time, float(timezone), resolve_ayanamsa(ayanamsa))
+
+    def _lookup(self, key: SnapshotKey, counter: Optional[str] = None) -> Optional[TransitSnapshot]:
+        """The stored snapshot of ``key``; ``counter`` names the hit counter, 'misses' counting the rest"""
+        with self._lock:
+            snapshot = self._snapshots.get(key)
+            if snapshot is not None:
+                self._snapshots.move_to_end(key)
+            if counter is not None:
+                self._stats[counter if snapshot is not None else 'misses'] += 1
+            return snapshot
+
+    def _store(self, key: SnapshotKey, snapshot: TransitSnapshot) -> TransitSnapshot:
+        with self._lock:
+            # Another thread may have computed the same moment meanwhile; keep the first
+            snapshot = self._snapshots.setdefault(key, snapshot)
+            self._snapshots.move_to_end(key)
+            while len(self._snapshots) > self.max_snapshots:
+                self._snapshots.popitem(last=False)
+            return snapshot
+
+    def get(self, date: str, time: str, timezone: float,
+            ayanamsa: str = DEFAULT_AYANAMSA) -> TransitSnapshot:
+        """The snapshot of a local date and time, computed on first use"""
+        key = self._key(date, time, timezone, ayanamsa)
+        snapshot = self._lookup(key, 'hits')
+        if snapshot is None:
+            snapshot = self._store(key, TransitSnapshot(*key))
+        self.prefetch(date, time, timezone, ayanamsa)
+        return snapshot
+
+    def prefetch(self, date: str, time: str, timezone: float, ayanamsa: str = DEFAULT_AYANAMSA,
+                 days: Optional[int] = None) -> None:
+        """Queue the snapshots of the ``days`` (default prefetch_days) dates after ``date``"""
+        days = self.prefetch_days if days is None else days
+        first = datetime.date(*parse_date(date))
+        keys = [self._key((first + datetime.timedelta(days=k)).isoformat(), time, timezone, ayanamsa)
+                for k in range(1, days + 1)]
+        with self._lock:
+            keys = [key for key in keys if key not in self._snapshots and key not in self._queued]
+            self._queued.update(keys)
+            if keys and self._thread is None:
+                self._thread = threading.Thread(target=self._prefetch_loop, name='transit-prefetch', daemon=True)
+                self._thread.start()
+        for key in keys:
+            self._queue.put(key)
+
+    def _prefetch_loop(self) -> None:
+        while True:
+            key = self._queue.get()
+            try:
+                if self._lookup(key) is None:
+                    self._store(key, TransitSnapshot(*key))
+                    with self._lock:
+                        self._stats['prefetched'] += 1
+            except Exception as e:
+                print(f"Transit prefetch failed for {key}: {e}")
+            finally:
+                with self._lock:
+                    self._queued.discard(key)
+                self._queue.task_done()
+
+    def join(self) -> None:
+        """Wait until every queued prefetch has finished"""
+        self._queue.join()
+
+    def __contains__(self, key: SnapshotKey) -> bool:
+        with self._lock:
+            return self._key(*key) in self._snapshots
+
+    def __len__(self) -> int:
+        return len(self._snapshots)
+
+    def stats(self) -> Dict[str, Any]:
+        """Lookup and prefetch counters"""
+        with self._lock:
+            return {**self._stats, 'snapshots': len(self._snapshots), 'queued': self._queue.qsize()}
+
+# Global snapshot store, shared by every transit request in this process
+transit_snapshots = TransitSnapshotStore()
+
+print("✅ Transit snapshots loaded!")
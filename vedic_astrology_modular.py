@@ -4,15 +4,32 @@
 # =============================================================================
 
 import swisseph as swe
+import bisect
 import datetime
+import functools
 import json
 import math
-from dataclasses import dataclass
-from typing import Dict, List, Optional, Any, Tuple
+import numpy as np
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Any, Tuple, Iterable, Iterator, Union
+from array import array
+from ephemeris_table import (
+    DEFAULT_AYANAMSA, TABLE_BODIES, EphemerisSnapshot, ayanamsa_offset, calc_sidereal, calc_sidereal_batch,
+    get_ayanamsa, get_snapshot, init_thread_ephemeris, resolve_ayanamsa
+)
+from julian_day import (
+    date_from_julian_day, date_julian_day, date_julian_days, dates_from_julian_days,
+    get_julian_day, get_julian_days, julian_day_steps, local_datetime
+)
+from chart_model import (
+    Chart, ChartSections, chart_outputs, classify_longitude, classify_longitudes,
+    register_sections
+)
 
-# Initialize Swiss Ephemeris
-swe.set_ephe_path('.')
-swe.set_sid_mode(swe.SIDM_LAHIRI)
+# Initialize Swiss Ephemeris (ephemeris path and Lahiri mode; other threads
+# initialize on their first calculation, and other ayanamsas are applied per
+# calculation, see ephemeris_table.ayanamsa_offset)
+init_thread_ephemeris()
 
 # =============================================================================
 # CONSTANTS AND DATA STRUCTURES
@@ -80,61 +97,69 @@ NAISARGIKA_BALA = {
     'Venus': 1.25, 'Moon': 1.5, 'Sun': 2.0
 }
 
+DIG_BALA = {
+    'East': ['Mesha', 'Vrischika'],      # 1, 8
+    'South': ['Kataka', 'Simha'],        # 4, 5
+    'West': ['Thula', 'Kumbha'],         # 7, 11
+    'North': ['Makara', 'Meena']         # 10, 12
+}
+
+# Vimshottari Dasha periods (years) and nakshatra lords
+VIMSHOTTARI_PERIODS = {
+    'Sun': 6, 'Moon': 10, 'Mars': 7, 'Rahu': 18, 'Jupiter': 16,
+    'Saturn': 19, 'Mercury': 17, 'Ketu': 7, 'Venus': 20
+}
+NAKSHATRA_LORDS = [
+    'Ketu', 'Venus', 'Sun', 'Moon', 'Mars', 'Rahu', 'Jupiter', 'Saturn', 'Mercury',
+    'Ketu', 'Venus', 'Sun', 'Moon', 'Mars', 'Rahu', 'Jupiter', 'Saturn', 'Mercury',
+    'Ketu', 'Venus', 'Sun', 'Moon', 'Mars', 'Rahu', 'Jupiter', 'Saturn', 'Mercury'
+]
+
+# Graha order used for chart planets (index = Swiss Ephemeris id for the first seven)
+GRAHAS = ['Sun', 'Moon', 'Mercury', 'Venus', 'Mars', 'Jupiter', 'Saturn', 'Rahu', 'Ketu']
+SAPTA_GRAHAS = GRAHAS[:7]
+
 print("✅ Constants loaded successfully!")
 
 # =============================================================================
 # MODULE 1: CORE CALCULATION FUNCTIONS
 # =============================================================================
 
-def get_julian_day(date_str: str, time_str: str, timezone_offset: float) -> float:
-    """Convert local datetime to Julian Day (UT)"""
-    local_dt = datetime.datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H:%M")
-    utc_dt = local_dt - datetime.timedelta(hours=timezone_offset)
-    
-    return swe.julday(
-        utc_dt.year, utc_dt.month, utc_dt.day,
-        utc_dt.hour + utc_dt.minute / 60.0
-    )
+# Julian Day conversion (get_julian_day, get_julian_days) lives in julian_day.py
 
 def get_rasi_info(longitude: float) -> Dict[str, Any]:
-    """Get rasi, nakshatra, and pada from longitude"""
-    # Rasi (30-degree divisions)
-    rasi_index = int(longitude // 30)
-    rasi = RASIS[rasi_index]
-    
-    # Nakshatra (13.333... degree divisions)
-    nakshatra_span = 360 / 27
-    nakshatra_index = int(longitude // nakshatra_span)
-    nakshatra = NAKSHATRAS[nakshatra_index]
-    
-    # Pada (1/4 of nakshatra)
-    pada_span = nakshatra_span / 4
-    pada = int((longitude % nakshatra_span) // pada_span) + 1
-    
+    """Get rasi, nakshatra, and pada from longitude
+
+    For arrays of longitudes use chart_model.classify_longitudes, which
+    returns the same values as integer codes.
+    """
+    rasi_index, nakshatra_index, pada = classify_longitude(longitude)
     return {
-        'rasi': rasi,
-        'nakshatra': nakshatra,
+        'rasi': RASIS[rasi_index],
+        'nakshatra': NAKSHATRAS[nakshatra_index],
         'pada': pada,
         'degrees_in_rasi': longitude % 30
     }
 
-def calculate_planet_position(jd: float, planet_id: int) -> Dict[str, Any]:
+def calculate_planet_position(jd: float, planet_id: int,
+                              snapshot: Optional[EphemerisSnapshot] = None) -> Dict[str, Any]:
     """Calculate position for a single planet"""
-    flags = swe.FLG_SIDEREAL | swe.FLG_SPEED
-    result = swe.calc_ut(jd, planet_id, flags)[0]
-    longitude, latitude, speed = result[0], result[1], result[3]
+    if snapshot is not None:
+        longitude, latitude, speed = snapshot.position_of(planet_id)
+    else:
+        longitude, latitude, speed = calc_sidereal(jd, planet_id)
     
-    rasi_info = get_rasi_info(longitude)
+    rasi_index, nakshatra_index, pada = classify_longitude(longitude)
     
     return {
         'longitude': longitude,
         'latitude': latitude,
         'speed': speed,
         'retrograde': speed < 0,
-        'rasi': rasi_info['rasi'],
-        'nakshatra': rasi_info['nakshatra'],
-        'pada': rasi_info['pada'],
-        'degrees_in_rasi': rasi_info['degrees_in_rasi']
+        'rasi': RASIS[rasi_index],
+        'nakshatra': NAKSHATRAS[nakshatra_index],
+        'pada': pada,
+        'degrees_in_rasi': longitude % 30
     }
 
 print("✅ Core calculation functions loaded!")
@@ -193,19 +218,22 @@ def calculate_dig_bala(planet_rasi: str, asc_rasi: str) -> float:
     else:
         return 0.5
 
-def calculate_kala_bala(jd: float, planet_name: str) -> Dict[str, float]:
+def calculate_kala_bala(jd: float, planet_name: str,
+                        snapshot: Optional[EphemerisSnapshot] = None) -> Dict[str, float]:
     """Calculate Kala Bala (Temporal Strength)"""
-    sun_pos = swe.calc_ut(jd, swe.SUN, swe.FLG_SIDEREAL)[0][0]
-    planet_pos = swe.calc_ut(jd, get_planet_id(planet_name), swe.FLG_SIDEREAL)[0][0]
-    
+    if snapshot is None:
+        snapshot = get_snapshot(jd)
+    sun_pos = snapshot.longitude('Sun')
     sun_house = int(sun_pos // 30)
-    planet_house = int(planet_pos // 30)
     
+    is_day = sun_house in [0, 1, 2, 3, 4, 5]
+    return calculate_kala_bala_for_day(planet_name, is_day)
+
+def calculate_kala_bala_for_day(planet_name: str, is_day: bool) -> Dict[str, float]:
+    """Calculate Kala Bala once day/night (Sun in the first six signs) is known"""
     day_planets = ['Sun', 'Jupiter', 'Saturn']
     night_planets = ['Moon', 'Mars', 'Venus']
     
-    is_day = sun_house in [0, 1, 2, 3, 4, 5]
-    
     if planet_name in day_planets:
         nathonnata = 1.0 if is_day else 0.5
     elif planet_name in night_planets:
@@ -248,16 +276,22 @@ def get_planet_id(planet_name: str) -> int:
     }
     return planet_ids.get(planet_name, swe.SUN)
 
-def calculate_shadbala(jd: float, planet_name: str, planet_data: Dict) -> Dict[str, Any]:
+def calculate_shadbala(jd: float, planet_name: str, planet_data: Dict,
+                       snapshot: Optional[EphemerisSnapshot] = None) -> Dict[str, Any]:
     """Calculate complete Shadbala for a planet"""
     
     sthana = calculate_sthana_bala(planet_name, planet_data['rasi'], planet_data['house'])
     dig = calculate_dig_bala(planet_data['rasi'], planet_data.get('asc_rasi', 'Mesha'))
-    kala = calculate_kala_bala(jd, planet_name)
+    kala = calculate_kala_bala(jd, planet_name, snapshot)
     cheshta = calculate_cheshta_bala(planet_name, planet_data['speed'])
     naisargika = calculate_naisargika_bala(planet_name)
     drik = calculate_drik_bala(planet_name, planet_data['house'])
     
+    return combine_shadbala(sthana, dig, kala, cheshta, naisargika, drik)
+
+def combine_shadbala(sthana: Dict[str, Any], dig: float, kala: Dict[str, float],
+                     cheshta: float, naisargika: float, drik: float) -> Dict[str, Any]:
+    """Combine the six Shadbala components into the reported breakdown"""
     total_shadbala = (sthana['sthana_bala'] + dig + kala['kala_bala'] + 
                       cheshta + naisargika + drik) / 6
     
@@ -272,84 +306,198 @@ def calculate_shadbala(jd: float, planet_name: str, planet_data: Dict) -> Dict[s
         'dignity': sthana['dignity']
     }
 
+def build_shadbala_table() -> Tuple[List[Dict[str, Any]], np.ndarray]:
+    """Precompute Shadbala for every (planet, sign, house, day/night, retrograde) case.
+
+    In this model Shadbala depends only on those five discrete inputs, so the
+    batch calculator can look results up by index instead of recomputing them.
+    Returns the breakdown dicts (flat, C-order over shape (7, 12, 12, 2, 2))
+    and the matching display strengths as an array of that shape.
+    """
+    breakdowns = []
+    for planet_name in SAPTA_GRAHAS:
+        naisargika = calculate_naisargika_bala(planet_name)
+        for sign_index in range(12):
+            for house in range(1, 13):
+                asc_rasi = RASIS[(sign_index - (house - 1)) % 12]
+                sthana = calculate_sthana_bala(planet_name, RASIS[sign_index], house)
+                dig = calculate_dig_bala(RASIS[sign_index], asc_rasi)
+                drik = calculate_drik_bala(planet_name, house)
+                for is_day in (False, True):
+                    kala = calculate_kala_bala_for_day(planet_name, is_day)
+                    for retrograde in (False, True):
+                        cheshta = calculate_cheshta_bala(planet_name, -1.0 if retrograde else 1.0)
+                        breakdowns.append(combine_shadbala(sthana, dig, kala, cheshta, naisargika, drik))
+    strengths = np.array([b['total_shadbala'] * 10 for b in breakdowns]).reshape(7, 12, 12, 2, 2)
+    return breakdowns, strengths
+
+def get_planetary_strength(planet_name: str, rasi: str, house: int) -> Tuple[float, str]:
+    """Calculate basic planetary strength (legacy function)"""
+    strength = 2.5  # Base neutral strength
+    dignity = 'neutral'
+    
+    if planet_name in PLANETARY_DIGNITY:
+        dignity_info = PLANETARY_DIGNITY[planet_name]
+        
+        if rasi == dignity_info['exalted']:
+            strength = 5.0
+            dignity = 'exalted'
+        elif rasi == dignity_info['debilitated']:
+            strength = -1.0
+            dignity = 'debilitated'
+        elif rasi in dignity_info['own']:
+            strength = 4.0
+            dignity = 'own'
+    
+    # House bonuses
+    house_attrs = HOUSE_ATTRIBUTES[house]
+    if house_attrs['kendra']:
+        strength += 1.0
+    if house_attrs['trikona']:
+        strength += 1.5
+    
+    return round(strength, 2), dignity
+
 print("✅ Shadbala calculations loaded!")
 
 # =============================================================================
 # MODULE 3: YOGA DETECTION
 # =============================================================================
 
-def detect_gajakesari_yoga(planets: Dict, houses: Dict) -> bool:
-    """Detect Gajakesari Yoga: Moon and Jupiter in mutual Kendra"""
-    moon_house = planets['Moon']['house']
-    jupiter_house = planets['Jupiter']['house']
-    kendra_diff = abs(moon_house - jupiter_house) % 12
-    return kendra_diff in [0, 3, 6, 9]
-
-def detect_budhaditya_yoga(planets: Dict) -> bool:
-    """Detect Budhaditya Yoga: Sun and Mercury together"""
-    return planets['Sun']['rasi'] == planets['Mercury']['rasi']
-
-def detect_chandra_mangal_yoga(planets: Dict) -> bool:
-    """Detect Chandra Mangal Yoga: Moon and Mars together"""
-    return planets['Moon']['rasi'] == planets['Mars']['rasi']
-
-def detect_dhana_yoga(planets: Dict, houses: Dict) -> bool:
-    """Detect Dhana Yoga: Strong 2nd, 5th, 9th, 11th houses"""
-    wealth_houses = [2, 5, 9, 11]
-    strong_wealth_houses = 0
-    
-    for house_num in wealth_houses:
-        if houses[house_num]['strength'] > 5.0:
-            strong_wealth_houses += 1
-    
-    return strong_wealth_houses >= 2
+KENDRA_HOUSES = [1, 4, 7, 10]
 
-def detect_raja_yoga(planets: Dict, houses: Dict) -> bool:
-    """Detect Raja Yoga: Strong 1st, 4th, 7th, 10th houses"""
-    kendra_houses = [1, 4, 7, 10]
-    strong_kendra_houses = 0
-    
-    for house_num in kendra_houses:
-        if houses[house_num]['strength'] > 6.0:
-            strong_kendra_houses += 1
-    
-    return strong_kendra_houses >= 2
-
-def detect_mahapurusha_yogas(planets: Dict, houses: Dict) -> List[str]:
-    """Detect Panch Mahapurusha Yogas"""
-    mahapurusha_rules = {
-        'Mars': (['Mesha', 'Vrischika', 'Makara'], 'Ruchaka Yoga'),
-        'Mercury': (['Mithuna', 'Kanni'], 'Bhadra Yoga'),
-        'Jupiter': (['Dhanus', 'Meena', 'Kataka'], 'Hamsa Yoga'),
-        'Venus': (['Rishaba', 'Thula', 'Meena'], 'Malavya Yoga'),
-        'Saturn': (['Makara', 'Kumbha', 'Thula'], 'Sasha Yoga')
-    }
-    
-    detected_yogas = []
-    for planet, (signs, yoga_name) in mahapurusha_rules.items():
-        planet_data = planets[planet]
-        if (planet_data['rasi'] in signs and 
-            houses[planet_data['house']]['kendra']):
-            detected_yogas.append(yoga_name)
-    
-    return detected_yogas
+# Every yoga as (flag key, display name, condition). The key names the flag in
+# the 'modular' chart output and the display name is listed by the 'engine'
+# output. Conditions are nested tuples of the primitives in _YOGA_PRIMITIVES,
+# naming grahas, signs and houses:
+#   ('same_sign', graha, graha)          ('mutual_kendra', graha, graha)
+#   ('in_signs', graha, [sign, ...])     ('in_houses', graha, [house, ...])
+#   ('min_strength', graha, strength)    ('strong_houses', [house, ...], above, count)
+#   ('all', cond, ...)  ('any', cond, ...)  ('not', cond)
+# compile_yoga_rules turns them into integer and bitmask tests, so a yoga is
+# added here as data.
+YOGA_RULES = [
+    ('Gajakesari', 'Gaja Kesari Yoga', ('mutual_kendra', 'Moon', 'Jupiter')),
+    ('Budhaditya', 'Budhaditya Yoga', ('same_sign', 'Sun', 'Mercury')),
+    ('Chandra_Mangal', 'Chandra Mangal Yoga', ('same_sign', 'Moon', 'Mars')),
+    ('Dhana', 'Dhana Yoga', ('strong_houses', [2, 5, 9, 11], 5.0, 2)),
+    ('Raja', 'Raja Yoga', ('strong_houses', KENDRA_HOUSES, 6.0, 2)),
+    ('Kuja_Dosha', 'Kuja Dosha (Manglik)', ('in_houses', 'Mars', [1, 2, 4, 7, 8, 12])),
+    # Panch Mahapurusha: own or exaltation sign in a kendra
+    ('Ruchaka', 'Ruchaka Yoga', ('all', ('in_signs', 'Mars', ['Mesha', 'Vrischika', 'Makara']),
+                                 ('in_houses', 'Mars', KENDRA_HOUSES))),
+    ('Bhadra', 'Bhadra Yoga', ('all', ('in_signs', 'Mercury', ['Mithuna', 'Kanni']),
+                               ('in_houses', 'Mercury', KENDRA_HOUSES))),
+    ('Hamsa', 'Hamsa Yoga', ('all', ('in_signs', 'Jupiter', ['Dhanus', 'Meena', 'Kataka']),
+                             ('in_houses', 'Jupiter', KENDRA_HOUSES))),
+    ('Malavya', 'Malavya Yoga', ('all', ('in_signs', 'Venus', ['Rishaba', 'Thula', 'Meena']),
+                                 ('in_houses', 'Venus', KENDRA_HOUSES))),
+    ('Sasha', 'Sasha Yoga', ('all', ('in_signs', 'Saturn', ['Makara', 'Kumbha', 'Thula']),
+                             ('in_houses', 'Saturn', KENDRA_HOUSES))),
+    ('Guru_Chandala', 'Guru Chandala Yoga', ('same_sign', 'Jupiter', 'Rahu')),
+    # Lakshmi: Venus strong in a kendra or trikona
+    ('Lakshmi', 'Lakshmi Yoga', ('all', ('in_houses', 'Venus', [1, 4, 5, 7, 9, 10]),
+                                 ('min_strength', 'Venus', 3.0))),
+]
 
-def detect_kuja_dosha(planets: Dict) -> bool:
-    """Detect Kuja Dosha (Manglik)"""
-    mars_house = planets['Mars']['house']
-    return mars_house in [1, 2, 4, 7, 8, 12]
+# Compiled conditions take the chart columns (signs, houses, strengths,
+# house_strengths), each indexed by graha or house - 1 and holding either
+# one chart's numbers or a whole batch's arrays; the same integer, comparison
+# and bitwise operations evaluate both.
+def _sign_mask(signs: Iterable[str]) -> int:
+    return sum(1 << RASIS.index(sign) for sign in set(signs))
 
-def detect_all_yogas(planets: Dict, houses: Dict) -> Dict[str, bool]:
-    """Detect all yogas"""
-    return {
-        'Gajakesari': detect_gajakesari_yoga(planets, houses),
-        'Budhaditya': detect_budhaditya_yoga(planets),
-        'Chandra_Mangal': detect_chandra_mangal_yoga(planets),
-        'Dhana': detect_dhana_yoga(planets, houses),
-        'Raja': detect_raja_yoga(planets, houses),
-        'Kuja_Dosha': detect_kuja_dosha(planets),
-        'Mahapurusha': len(detect_mahapurusha_yogas(planets, houses)) > 0
-    }
+def _house_mask(houses: Iterable[int]) -> int:
+    return sum(1 << house for house in set(houses))
+
+_YOGA_PRIMITIVES = {
+    'same_sign': lambda a, b: (lambda c, a=GRAHAS.index(a), b=GRAHAS.index(b): c[0][a] == c[0][b]),
+    'mutual_kendra': lambda a, b: (lambda c, a=GRAHAS.index(a), b=GRAHAS.index(b): (c[1][a] - c[1][b]) % 3 == 0),
+    'in_signs': lambda p, signs: (lambda c, p=GRAHAS.index(p), m=_sign_mask(signs): (m >> c[0][p]) & 1 == 1),
+    'in_houses': lambda p, houses: (lambda c, p=GRAHAS.index(p), m=_house_mask(houses): (m >> c[1][p]) & 1 == 1),
+    'min_strength': lambda p, value: (lambda c, p=GRAHAS.index(p): c[2][p] >= value),
+    'strong_houses': lambda houses, above, count: (
+        lambda c, hs=[h - 1 for h in houses]: sum(c[3][h] > above for h in hs) >= count),
+}
+
+def _compile_condition(condition: Tuple) -> Any:
+    """Test function for one condition tuple (see YOGA_RULES)"""
+    op, *args = condition
+    if op in ('all', 'any'):
+        tests = [_compile_condition(arg) for arg in args]
+        if op == 'all':
+            def test(c):
+                result = tests[0](c)
+                for other in tests[1:]:
+                    result = result & other(c)
+                return result
+        else:
+            def test(c):
+                result = tests[0](c)
+                for other in tests[1:]:
+                    result = result | other(c)
+                return result
+        return test
+    if op == 'not':
+        inner = _compile_condition(args[0])
+        return lambda c: inner(c) ^ True
+    if op not in _YOGA_PRIMITIVES:
+        raise ValueError(f"Unknown yoga condition: {op}")
+    return _YOGA_PRIMITIVES[op](*args)
+
+class YogaRules:
+    """Compiled yoga rules, evaluated for one chart or a batch at once.
+
+    A chart's yogas are one integer bitmask, bit i set when rule i holds;
+    ``flags``/``names`` expand a mask into either output shape.
+    """
+
+    def __init__(self, rules: Iterable[Tuple[str, str, Tuple]]):
+        rules = list(rules)
+        if len(rules) > 63:
+            raise ValueError("at most 63 yoga rules fit in a bitmask")
+        self.keys = [key for key, _, _ in rules]
+        self.names = [name for _, name, _ in rules]
+        self._tests = [_compile_condition(condition) for _, _, condition in rules]
+
+    def evaluate(self, signs: List[int], houses: List[int], strengths: List[float],
+                 house_strengths: List[float]) -> int:
+        """Yoga bitmask of one chart (per-graha signs 0-11, houses 1-12 and
+        strengths in GRAHAS order, and the twelve house strengths)"""
+        columns = (signs, houses, strengths, house_strengths)
+        mask = 0
+        for bit, test in enumerate(self._tests):
+            if test(columns):
+                mask |= 1 << bit
+        return mask
+
+    def evaluate_batch(self, signs: np.ndarray, houses: np.ndarray, strengths: np.ndarray,
+                       house_strengths: np.ndarray) -> np.ndarray:
+        """Yoga bitmasks (int64) of N charts from (N, 9) and (N, 12) arrays"""
+        columns = tuple(np.ascontiguousarray(np.asarray(values).T)
+                        for values in (signs, houses, strengths, house_strengths))
+        masks = np.zeros(len(columns[0][0]), dtype=np.int64)
+        for bit, test in enumerate(self._tests):
+            masks |= np.asarray(test(columns), dtype=np.int64) << bit
+        return masks
+
+    def flags(self, mask: int) -> Dict[str, bool]:
+        """{key: present} for every rule"""
+        return {key: bool(mask >> bit & 1) for bit, key in enumerate(self.keys)}
+
+    def present(self, mask: int) -> List[str]:
+        """Sorted keys of the rules present"""
+        return sorted(key for bit, key in enumerate(self.keys) if mask >> bit & 1)
+
+    def display_names(self, mask: int) -> List[str]:
+        """Sorted display names of the rules present"""
+        return sorted(name for bit, name in enumerate(self.names) if mask >> bit & 1)
+
+def compile_yoga_rules(rules: Iterable[Tuple[str, str, Tuple]] = YOGA_RULES) -> YogaRules:
+    """Compile (key, display name, condition) rules, as in YOGA_RULES"""
+    return YogaRules(rules)
+
+YOGAS = compile_yoga_rules()
 
 print("✅ Yoga detection loaded!")
 
@@ -358,163 +506,1012 @@ print("✅ Yoga detection loaded!")
 # =============================================================================
 
 class VedicChartCalculator:
-    """Main Vedic Chart Calculator with all modules"""
+    """Main Vedic Chart Calculator with all modules
+
+    ``output`` selects the adapter that shapes chart dicts: 'modular'
+    (whole-sign houses, ``lagna.sign``, yoga flags) or 'engine' (the legacy
+    VedicChart shape: cusp-based houses, ``lagna.rasi``, a yoga list).
+    """
     
-    def __init__(self):
+    def __init__(self, output: str = 'modular'):
+        if output not in chart_outputs():
+            raise ValueError(f"Unknown chart output: {output}")
+        self.output = output
         self.chart_data = {}
         
-    def calculate_chart(self, date: str, time: str, latitude: float, 
-                       longitude: float, timezone: float) -> Dict[str, Any]:
-        """Calculate complete Vedic birth chart"""
+    def calculate_chart(self, date: str, time: str, latitude: float, longitude: float,
+                        timezone: float, as_model: bool = False,
+                        sections: Optional[Iterable[str]] = None,
+                        ayanamsa: str = DEFAULT_AYANAMSA) -> Union[Dict[str, Any], Chart]:
+        """Calculate complete Vedic birth chart
+
+        Returns the chart dict, or the compact Chart model when ``as_model``
+        is set (its to_dict() gives the same dict). ``sections`` names the
+        parts of the dict the caller needs (e.g. {"planets", "houses"}); only
+        those are built up front and the rest are built on first access.
+        ``ayanamsa`` is 'lahiri', 'raman' or 'krishnamurti'; it is applied to
+        this chart only, so concurrent calls may use different ayanamsas.
+        """
+        ayanamsa = resolve_ayanamsa(ayanamsa)
+        init_thread_ephemeris()
         
         # Get Julian Day
         jd = get_julian_day(date, time, timezone)
-        ayanamsa = swe.get_ayanamsa(jd)
-        
-        # Calculate planets
-        planets = {}
+        snapshot = get_snapshot(jd, ayanamsa)
         
-        # Main planets
-        planet_names = ['Sun', 'Moon', 'Mercury', 'Venus', 'Mars', 'Jupiter', 'Saturn']
-        for i, name in enumerate(planet_names):
-            planets[name] = calculate_planet_position(jd, i)
-        
-        # Rahu and Ketu
-        rahu_result = swe.calc_ut(jd, swe.TRUE_NODE, swe.FLG_SIDEREAL | swe.FLG_SPEED)[0]
-        rahu_info = get_rasi_info(rahu_result[0])
-        ketu_lon = (rahu_result[0] + 180.0) % 360.0
-        ketu_info = get_rasi_info(ketu_lon)
-        
-        planets['Rahu'] = {
-            'longitude': rahu_result[0],
-            'speed': rahu_result[3],
-            'retrograde': True,
-            'rasi': rahu_info['rasi'],
-            'nakshatra': rahu_info['nakshatra'],
-            'pada': rahu_info['pada']
-        }
-        
-        planets['Ketu'] = {
-            'longitude': ketu_lon,
-            'speed': rahu_result[3],
-            'retrograde': True,
-            'rasi': ketu_info['rasi'],
-            'nakshatra': ketu_info['nakshatra'],
-            'pada': ketu_info['pada']
-        }
-        
-        # Ascendant
+        # Ascendant and house cusps
         cusps, ascmc = swe.houses_ex(jd, latitude, longitude, b'P', flags=swe.FLG_SIDEREAL)
-        asc_info = get_rasi_info(ascmc[0])
+        offset = ayanamsa_offset(jd, ayanamsa)
+        if offset:
+            cusps = [(cusp - offset) % 360.0 for cusp in cusps]
+            ascendant = (ascmc[0] - offset) % 360.0
+        else:
+            ascendant = ascmc[0]
         
-        lagna = {
-            'sign': asc_info['rasi'],
-            'degree': round(ascmc[0], 2)
+        chart = Chart.from_snapshot(self.output, date, time, latitude, longitude, timezone,
+                                    snapshot, get_ayanamsa(jd, ayanamsa), ascendant, cusps, ayanamsa)
+        return chart if as_model else chart.to_dict(sections)
+
+    def calculate_charts(self, births: Iterable[Any], as_model: bool = False,
+                         ayanamsa: str = DEFAULT_AYANAMSA) -> List[Union[Dict[str, Any], Chart]]:
+        """Calculate many Vedic birth charts in one call.
+
+        ``births`` yields birth records, either dicts with the calculate_chart
+        keyword names or (date, time, latitude, longitude, timezone) tuples.
+        Swiss Ephemeris is queried once per body per chart; everything else
+        runs as array operations over the whole batch. Returns one chart per
+        record, in input order, identical to calculate_chart's output.
+        With ``as_model`` the charts are compact Chart models; the batch
+        ephemeris path has no latitudes, so theirs are NaN. The 'engine'
+        output needs latitudes and is calculated chart by chart. The whole
+        batch uses one ``ayanamsa``.
+        """
+        ayanamsa = resolve_ayanamsa(ayanamsa)
+        init_thread_ephemeris()
+        records = [
+            (b['date'], b['time'], b['latitude'], b['longitude'], b['timezone'])
+            if isinstance(b, dict) else tuple(b)
+            for b in births
+        ]
+        if not records:
+            return []
+        if self.output != 'modular':
+            return [self.calculate_chart(*record, as_model=as_model, ayanamsa=ayanamsa)
+                    for record in records]
+        dates, times, latitudes, longitudes, timezones = (list(col) for col in zip(*records))
+        n = len(records)
+
+        # Julian Days for the whole batch
+        jds = get_julian_days(dates, times, timezones)
+
+        # Ephemeris, rasi, nakshatra, pada and whole-sign houses
+        (planet_lons, planet_speeds, asc_lons, ayanamsas, cusp_rows,
+         signs, nakshatras, padas, asc_signs, houses, retrograde) = \
+            _batch_positions(jds, latitudes, longitudes, ayanamsa)
+
+        if as_model:
+            position_rows = np.hstack([planet_lons, np.full((n, 9), np.nan), planet_speeds]).tolist()
+            code_rows = np.hstack([signs, nakshatras, padas, houses]).astype(np.uint8).tobytes()
+            return [
+                Chart('modular', dates[k], times[k], latitudes[k], longitudes[k], timezones[k],
+                      float(jds[k]), float(ayanamsas[k]), float(asc_lons[k]),
+                      array('d', position_rows[k]), code_rows[k * 36:(k + 1) * 36],
+                      array('d', cusp_rows[k][:12]), ayanamsa)
+                for k in range(n)
+            ]
+
+        # Shadbala, house strengths and yogas
+        shadbala_index, strengths, house_signs, house_strengths = \
+            _batch_strengths(signs, houses, asc_signs, planet_speeds)
+        yoga_masks = YOGAS.evaluate_batch(signs, houses, strengths, house_strengths).tolist()
+
+        # Format per chart, exactly as calculate_chart does
+        charts = []
+        lon_rows, signs_rows, house_rows = planet_lons.tolist(), signs.tolist(), houses.tolist()
+        nak_rows, pada_rows = nakshatras.tolist(), padas.tolist()
+        strength_rows, retro_rows = strengths.tolist(), retrograde.tolist()
+        index_rows, hs_rows, house_sign_rows = shadbala_index.tolist(), house_strengths.tolist(), house_signs.tolist()
+        for k in range(n):
+            formatted_planets = {}
+            house_planets = [[] for _ in range(12)]
+            aspects = {}
+            for p, name in enumerate(GRAHAS):
+                house = house_rows[k][p]
+                house_planets[house - 1].append(name)
+                if p < 7:
+                    shadbala = dict(_SHADBALA_BREAKDOWNS[index_rows[k][p]])
+                    dignity = shadbala['dignity']
+                else:
+                    shadbala = {}
+                    dignity = 'neutral'
+                formatted_planets[name] = {
+                    'sign': RASIS[signs_rows[k][p]],
+                    'house': house,
+                    'longitude': round(lon_rows[k][p], 2),
+                    'degree': round(lon_rows[k][p], 2),
+                    'strength': round(strength_rows[k][p], 2),
+                    'dignity': dignity,
+                    'retrograde': retro_rows[k][p],
+                    'nakshatra': NAKSHATRAS[nak_rows[k][p]],
+                    'pada': pada_rows[k][p],
+                    'shadbala': shadbala
+                }
+                aspects[name] = list(_ASPECT_TABLE[p][house])
+
+            houses_out = {}
+            for i in range(12):
+                sign_index = house_sign_rows[k][i]
+                sign_attrs = HOUSE_ATTRIBUTES[sign_index + 1]
+                houses_out[i + 1] = {
+                    'sign': RASIS[sign_index],
+                    'element': sign_attrs['element'],
+                    'gender': sign_attrs['gender'],
+                    'purpose': sign_attrs['purpose'],
+                    'mobility': sign_attrs['mobility'],
+                    'planets': house_planets[i],
+                    'strength': hs_rows[k][i],
+                    'kendra': sign_attrs['kendra'],
+                    'trikona': sign_attrs['trikona']
+                }
+
+            charts.append({
+                'lagna': {
+                    'sign': RASIS[int(asc_signs[k])],
+                    'degree': round(float(asc_lons[k]), 2)
+                },
+                'planets': formatted_planets,
+                'houses': houses_out,
+                'aspects': aspects,
+                'yogas': YOGAS.flags(yoga_masks[k]),
+                'birth_info': {
+                    'date': dates[k],
+                    'time': times[k],
+                    'latitude': latitudes[k],
+                    'longitude': longitudes[k],
+                    'timezone': timezones[k],
+                    'ayanamsa': round(float(ayanamsas[k]), 6),
+                    'ayanamsa_name': ayanamsa
+                }
+            })
+        return charts
+
+    def chart_timeline(self, start_date: str, start_time: str, end_date: str, end_time: str,
+                       latitude: float, longitude: float, timezone: float,
+                       step_seconds: float = 3600.0, ayanamsa: str = DEFAULT_AYANAMSA,
+                       include_unchanged: bool = False, chunk_size: int = 1024) -> Iterator[Dict[str, Any]]:
+        """Step a chart through time at one place, yielding only what changes.
+
+        The first item is {'time', 'jd', 'state'}: the lagna, each graha's
+        sign, house and retrograde flag, and the yogas present at the start.
+        Each later item is {'time', 'jd', 'changes'} for a step at which any
+        of that changed (for every step with ``include_unchanged``), e.g.
+        {'planets': {'Moon': {'sign': {'from': 'Mesha', 'to': 'Rishaba'}}}}.
+        Steps run from the start to the end time inclusive and agree with
+        calculate_chart at each instant. They are calculated ``chunk_size``
+        at a time with the batch array path, querying the grahas only every
+        few hours except around sign changes and stations, and only the
+        previous step is kept between chunks, so memory stays flat over any
+        range.
+        """
+        ayanamsa = resolve_ayanamsa(ayanamsa)
+        init_thread_ephemeris()
+        if step_seconds <= 0:
+            raise ValueError("step_seconds must be positive")
+        start, end = (local_datetime(date, time) for date, time in
+                      ((start_date, start_time), (end_date, end_time)))
+        if end < start:
+            raise ValueError("end is before start")
+        step = datetime.timedelta(seconds=step_seconds)
+        total = (end - start) // step + 1
+        stride = max(1, int(TIMELINE_KNOT_DAYS * 86400 // step_seconds))
+
+        previous = None
+        for first in range(0, total, chunk_size):
+            count = min(chunk_size, total - first)
+            jds = julian_day_steps(start_date, start_time, timezone, step_seconds, count, first)
+            planets = _timeline_positions(jds, stride, ayanamsa)
+            (_, planet_speeds, _, _, _, signs, _, _, asc_signs, houses, retrograde) = \
+                _batch_positions(jds, [latitude] * count, [longitude] * count, ayanamsa, planets)
+            _, strengths, _, house_strengths = _batch_strengths(signs, houses, asc_signs, planet_speeds)
+            yoga_masks = YOGAS.evaluate_batch(signs, houses, strengths, house_strengths)
+            codes = np.hstack([asc_signs[:, None], signs, houses, retrograde,
+                               yoga_masks[:, None]]).astype(np.int64)
+
+            # Steps whose codes differ from the step before
+            before = np.vstack([codes[:1] if previous is None else previous[None], codes[:-1]])
+            changed = (codes != before).any(axis=1) | include_unchanged
+            changed[0] |= first == 0
+            for k in np.flatnonzero(changed).tolist():
+                item = {'time': (start + step * (first + k)).strftime("%Y-%m-%d %H:%M:%S"),
+                        'jd': float(jds[k])}
+                state = _timeline_state(codes[k].tolist())
+                if first + k == 0:
+                    item['state'] = state
+                else:
+                    item['changes'] = _timeline_changes(
+                        _timeline_state(before[k].tolist()), state)
+                yield item
+            previous = codes[-1]
+
+# Lookup tables for the batch calculator
+_SHADBALA_BREAKDOWNS, _SHADBALA_STRENGTHS = build_shadbala_table()
+_SIGN_LORD_GRAHA = [GRAHAS.index(SIGN_LORDS[rasi]) for rasi in RASIS]
+_SIGN_LORD_INDEX = np.array(_SIGN_LORD_GRAHA)
+_ASPECT_TABLE = [
+    [None] + [sorted(((house - 1 + offset - 1) % 12) + 1 for offset in PLANETARY_ASPECTS[name])
+              for house in range(1, 13)]
+    for name in GRAHAS
+]
+
+def _batch_positions(jds: np.ndarray, latitudes: List[float], longitudes: List[float],
+                     ayanamsa: str, planets: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> Tuple[Any, ...]:
+    """Positions and whole-sign placements for many instants (rows of jds).
+
+    Swiss Ephemeris is queried once per body per instant (a single array
+    lookup when the precomputed table covers them), unless the default-mode
+    graha longitudes and speeds are passed as ``planets``. Returns
+    planet_lons, planet_speeds, asc_lons, ayanamsas, cusp_rows, signs,
+    nakshatras, padas, asc_signs, houses and retrograde.
+    """
+    n = len(jds)
+    planet_lons, planet_speeds = calc_sidereal_batch(jds) if planets is None else planets
+    asc_lons = np.empty(n)
+    ayanamsas = np.empty(n)
+    cusp_rows = []
+    for k, jd in enumerate(jds.tolist()):
+        cusps, ascmc = swe.houses_ex(jd, latitudes[k], longitudes[k], b'P', flags=swe.FLG_SIDEREAL)
+        cusp_rows.append(cusps)
+        asc_lons[k] = ascmc[0]
+        ayanamsas[k] = swe.get_ayanamsa(jd)
+    if ayanamsa != DEFAULT_AYANAMSA:
+        offsets = ayanamsa_offset(jds, ayanamsa)
+        planet_lons = (planet_lons - offsets[:, None]) % 360.0
+        asc_lons = (asc_lons - offsets) % 360.0
+        cusp_rows = [[(cusp - offset) % 360.0 for cusp in cusps]
+                     for cusps, offset in zip(cusp_rows, offsets.tolist())]
+        ayanamsas += offsets
+
+    signs, nakshatras, padas, _ = classify_longitudes(planet_lons)
+    asc_signs = (asc_lons // 30).astype(np.int64)
+    houses = (signs - asc_signs[:, None]) % 12 + 1
+    retrograde = planet_speeds < 0
+    retrograde[:, 7:] = True
+    return (planet_lons, planet_speeds, asc_lons, ayanamsas, cusp_rows,
+            signs, nakshatras, padas, asc_signs, houses, retrograde)
+
+# Rahu and Ketu have no shadbala: graha and house strengths count them at this
+NODE_STRENGTH = 3.5
+
+def _batch_strengths(signs: np.ndarray, houses: np.ndarray, asc_signs: np.ndarray,
+                     planet_speeds: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """Shadbala table indices, graha strengths, house signs and rounded house strengths"""
+    n = len(signs)
+
+    # Shadbala by table lookup for the seven grahas
+    is_day = (signs[:, 0] < 6).astype(np.int64)
+    shadbala_index = (((np.arange(7) * 12 + signs[:, :7]) * 12 + houses[:, :7] - 1) * 2
+                      + is_day[:, None]) * 2 + (planet_speeds[:, :7] < 0)
+    strengths = np.full((n, 9), NODE_STRENGTH)
+    strengths[:, :7] = _SHADBALA_STRENGTHS.reshape(-1)[shadbala_index]
+
+    # House strengths: occupants (in graha order) plus half the lord's strength
+    rows = np.arange(n)
+    house_strengths = np.zeros((n, 12))
+    for planet_index in range(9):
+        house_strengths[rows, houses[:, planet_index] - 1] += strengths[:, planet_index]
+    house_signs = (asc_signs[:, None] + np.arange(12)) % 12
+    lords = _SIGN_LORD_INDEX[house_signs]
+    house_strengths += np.take_along_axis(strengths, lords, axis=1) * 0.5
+    house_strengths = np.array([round(v, 2) for v in house_strengths.ravel().tolist()]).reshape(n, 12)
+    return shadbala_index, strengths, house_signs, house_strengths
+
+# Timelines query the grahas every TIMELINE_KNOT_DAYS and in between only
+# where a sign or direction can change (see _timeline_positions)
+TIMELINE_KNOT_DAYS = 0.5
+
+# Upper bound on the true node's speed, degrees per day (observed: 0.26)
+NODE_MAX_SPEED = 0.5
+
+def _timeline_positions(jds: np.ndarray, stride: int, ayanamsa: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Graha longitudes and speeds for consecutive instants, for classification only.
+
+    The grahas are queried every ``stride`` rows. Between two such knots a
+    graha in the same sign and moving the same way at both ends keeps its
+    sign and direction throughout (no graha stations twice within
+    TIMELINE_KNOT_DAYS; the true node, which can, must be further from the
+    sign's edge than it can travel), so those rows repeat the earlier knot.
+    Every other row is queried. Signs and the sign of the speed are exact
+    in every row; longitudes are only exact in queried rows.
+    """
+    n = len(jds)
+    knots = np.unique(np.append(np.arange(0, n, stride), n - 1))
+    if len(knots) == n:
+        return calc_sidereal_batch(jds)
+    knot_lons, knot_speeds = calc_sidereal_batch(jds[knots])
+    shifted = (knot_lons - ayanamsa_offset(jds[knots], ayanamsa)[:, None]) % 360.0
+    signs = shifted // 30
+    same_sign = signs[1:] == signs[:-1]
+    steady = same_sign & ((knot_speeds[1:] < 0) == (knot_speeds[:-1] < 0))
+    edge_distance = np.minimum(shifted[:-1, 7] % 30, 30 - shifted[:-1, 7] % 30)
+    steady[:, 7] = same_sign[:, 7] & (edge_distance > NODE_MAX_SPEED * (jds[knots[1:]] - jds[knots[:-1]]))
+
+    interval = np.searchsorted(knots, np.arange(n), side='right') - 1
+    longitudes, speeds = knot_lons[interval], knot_speeds[interval]
+    for j, p in zip(*np.nonzero(~steady[:, :8])):
+        for row in range(knots[j] + 1, knots[j + 1]):
+            longitudes[row, p], _, speeds[row, p] = calc_sidereal(float(jds[row]), TABLE_BODIES[p])
+    longitudes[:, 8] = (longitudes[:, 7] + 180.0) % 360.0
+    speeds[:, 8] = speeds[:, 7]
+    return longitudes, speeds
+
+def graha_signs(jds: np.ndarray, step_seconds: float, ayanamsa: str = DEFAULT_AYANAMSA) -> np.ndarray:
+    """Sign indices of the nine grahas (GRAHAS columns) at consecutive instants
+    ``step_seconds`` apart, querying only where a sign can change (see _timeline_positions)"""
+    ayanamsa = resolve_ayanamsa(ayanamsa)
+    init_thread_ephemeris()
+    stride = max(1, int(TIMELINE_KNOT_DAYS * 86400 // step_seconds))
+    longitudes, _ = _timeline_positions(jds, stride, ayanamsa)
+    if ayanamsa != DEFAULT_AYANAMSA:
+        longitudes = (longitudes - ayanamsa_offset(jds, ayanamsa)[:, None]) % 360.0
+    return (longitudes // 30).astype(np.int64)
+
+def _timeline_state(codes: List[int]) -> Dict[str, Any]:
+    """Timeline state from one row of codes: lagna, then signs, houses and
+    retrograde flags in GRAHAS order, then the yoga bitmask"""
+    return {
+        'lagna': RASIS[codes[0]],
+        'planets': {
+            name: {'sign': RASIS[codes[1 + p]], 'house': codes[10 + p], 'retrograde': bool(codes[19 + p])}
+            for p, name in enumerate(GRAHAS)
+        },
+        'yogas': YOGAS.present(codes[28])
+    }
+
+def _timeline_changes(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Any]:
+    """Fields that differ between two timeline states, as {'from', 'to'} pairs"""
+    changes = {}
+    if before['lagna'] != after['lagna']:
+        changes['lagna'] = {'from': before['lagna'], 'to': after['lagna']}
+    planets = {}
+    for name, fields in after['planets'].items():
+        planet = {field: {'from': before['planets'][name][field], 'to': value}
+                  for field, value in fields.items() if before['planets'][name][field] != value}
+        if planet:
+            planets[name] = planet
+    if planets:
+        changes['planets'] = planets
+    if before['yogas'] != after['yogas']:
+        changes['yogas'] = {'formed': [y for y in after['yogas'] if y not in before['yogas']],
+                            'dissolved': [y for y in before['yogas'] if y not in after['yogas']]}
+    return changes
+
+def chart_strengths(chart: Chart) -> Tuple[List[Dict[str, Any]], List[float]]:
+    """Shadbala breakdowns (seven grahas) and display strengths (all nine) of a chart"""
+    is_day = chart.sign(0) < 6
+    breakdowns = []
+    strengths = []
+    for p in range(7):
+        retrograde = chart.planet_speed(p) < 0
+        shadbala = _SHADBALA_BREAKDOWNS[(((p * 12 + chart.sign(p)) * 12 + chart.house(p) - 1) * 2 + is_day) * 2 + retrograde]
+        breakdowns.append(shadbala)
+        strengths.append(shadbala['total_shadbala'] * 10)  # Scale for display
+    strengths += [NODE_STRENGTH, NODE_STRENGTH]
+    return breakdowns, strengths
+
+def chart_house_strengths(chart: Chart, strengths: List[float]) -> List[float]:
+    """Rounded strengths of the twelve whole-sign houses: occupants plus half the lord's strength"""
+    return _whole_sign_house_strengths(chart.asc_sign, [chart.house(p) for p in range(9)], strengths)
+
+def _whole_sign_house_strengths(asc_sign: int, houses: List[int], strengths: List[float]) -> List[float]:
+    totals = [0.0] * 12
+    for p in range(9):
+        totals[houses[p] - 1] += strengths[p]
+    return [round(totals[i] + strengths[_SIGN_LORD_GRAHA[(asc_sign + i) % 12]] * 0.5, 2)
+            for i in range(12)]
+
+def _house_strengths(sections: ChartSections) -> List[float]:
+    strengths = sections.shared('strengths', chart_strengths)[1]
+    return sections.shared('house_strengths', lambda chart: chart_house_strengths(chart, strengths))
+
+def _yoga_mask(sections: ChartSections) -> int:
+    # One yoga bitmask for every output shape, from the whole-sign chart
+    strengths, house_strengths = sections.shared('strengths', chart_strengths)[1], _house_strengths(sections)
+    return sections.shared('yogas', lambda chart: YOGAS.evaluate(
+        [chart.sign(p) for p in range(9)], [chart.house(p) for p in range(9)], strengths, house_strengths))
+
+def _lagna_section(sections: ChartSections) -> Dict[str, Any]:
+    chart = sections.chart
+    return {
+        'sign': RASIS[chart.asc_sign],
+        'degree': round(chart.ascendant, 2)
+    }
+
+def _planets_section(sections: ChartSections) -> Dict[str, Dict[str, Any]]:
+    chart = sections.chart
+    breakdowns, strengths = sections.shared('strengths', chart_strengths)
+    planets = {}
+    for p, name in enumerate(GRAHAS):
+        longitude = chart.planet_longitude(p)
+        if p < 7:
+            shadbala = dict(breakdowns[p])
+            retrograde = chart.planet_speed(p) < 0
+        else:
+            shadbala = {}
+            retrograde = True
+        planets[name] = {
+            'sign': RASIS[chart.sign(p)],
+            'house': chart.house(p),
+            'longitude': round(longitude, 2),
+            'degree': round(longitude, 2),  # Keep both for compatibility
+            'strength': round(strengths[p], 2),
+            'dignity': shadbala.get('dignity', 'neutral'),
+            'retrograde': retrograde,
+            'nakshatra': NAKSHATRAS[chart.nakshatra(p)],
+            'pada': chart.pada(p),
+            'shadbala': shadbala
         }
-        
-        # Calculate houses for each planet
-        asc_rasi_index = int(ascmc[0] // 30)
-        
-        for planet_data in planets.values():
-            planet_rasi_index = int(planet_data['longitude'] // 30)
-            house = ((planet_rasi_index - asc_rasi_index) % 12) + 1
-            planet_data['house'] = house
-            planet_data['asc_rasi'] = asc_info['rasi']
-            
-        # Calculate Shadbala for each planet
-        for name, planet_data in planets.items():
-            if name in ['Sun', 'Moon', 'Mercury', 'Venus', 'Mars', 'Jupiter', 'Saturn']:
-                shadbala = calculate_shadbala(jd, name, planet_data)
-                planet_data['shadbala'] = shadbala
-                planet_data['strength'] = shadbala['total_shadbala'] * 10  # Scale for display
-                planet_data['dignity'] = shadbala['dignity']
-            else:
-                # For Rahu/Ketu, use basic strength calculation
-                strength = 3.5  # Base strength for nodes
-                planet_data['strength'] = strength
-                planet_data['dignity'] = 'neutral'
-        
-        # Calculate houses with their characteristics
-        houses = {}
-        # Parashara mapping: start from Lagna sign
-        lagna_sign_index = asc_rasi_index
-        for i in range(12):
-            house_num = i + 1
-            # The sign in this house (starting from Lagna)
-            sign_index = (lagna_sign_index + i) % 12
-            sign = RASIS[sign_index]
-            lord = SIGN_LORDS[sign]
-            # Map element, purpose, mobility, etc. from the sign
-            sign_attrs = HOUSE_ATTRIBUTES[sign_index + 1]
-            # Find planets in this house
-            house_planets = [name for name, planet in planets.items() if planet['house'] == house_num]
-            # Calculate house strength including lord strength
-            house_strength = sum(planets[p]['strength'] for p in house_planets)
-            if lord in planets:
-                lord_strength = planets[lord]['strength'] * 0.5
-                house_strength += lord_strength
-            houses[house_num] = {
-                'sign': sign,
-                'element': sign_attrs['element'],
-                'gender': sign_attrs['gender'],
-                'purpose': sign_attrs['purpose'],
-                'mobility': sign_attrs['mobility'],
-                'planets': house_planets,
-                'strength': round(house_strength, 2),
-                'kendra': sign_attrs['kendra'],
-                'trikona': sign_attrs['trikona']
-            }
-        
-        # Calculate aspects
-        aspects = {}
-        for name, planet in planets.items():
-            if name in PLANETARY_ASPECTS:
-                planet_house = planet['house']
-                aspect_houses = []
-                for offset in PLANETARY_ASPECTS[name]:
-                    target_house = ((planet_house - 1 + offset - 1) % 12) + 1
-                    aspect_houses.append(target_house)
-                aspects[name] = sorted(aspect_houses)
-        
-        # Detect yogas
-        yogas = detect_all_yogas(planets, houses)
-        
-        # Format planets for JSON output
-        formatted_planets = {}
-        for name, planet in planets.items():
-            formatted_planets[name] = {
-                'sign': planet['rasi'],
-                'house': planet['house'],
-                'longitude': round(planet['longitude'], 2),
-                'degree': round(planet['longitude'], 2),  # Keep both for compatibility
-                'strength': round(planet['strength'], 2),
-                'dignity': planet['dignity'],
-                'retrograde': planet['retrograde'],
-                'nakshatra': planet['nakshatra'],
-                'pada': planet['pada'],
-                'shadbala': planet.get('shadbala', {})
+    return planets
+
+def _houses_section(sections: ChartSections) -> Dict[int, Dict[str, Any]]:
+    # Houses from the Lagna sign, strength = occupants plus half the lord's strength
+    chart = sections.chart
+    house_strengths = _house_strengths(sections)
+    planet_houses = chart.houses
+    asc_sign = chart.asc_sign
+    houses = {}
+    for i in range(12):
+        house_num = i + 1
+        sign_index = (asc_sign + i) % 12
+        sign = RASIS[sign_index]
+        sign_attrs = HOUSE_ATTRIBUTES[sign_index + 1]
+        occupants = [p for p in range(9) if planet_houses[p] == house_num]
+        houses[house_num] = {
+            'sign': sign,
+            'element': sign_attrs['element'],
+            'gender': sign_attrs['gender'],
+            'purpose': sign_attrs['purpose'],
+            'mobility': sign_attrs['mobility'],
+            'planets': [GRAHAS[p] for p in occupants],
+            'strength': house_strengths[i],
+            'kendra': sign_attrs['kendra'],
+            'trikona': sign_attrs['trikona']
+        }
+    return houses
+
+def _aspects_section(sections: ChartSections) -> Dict[str, List[int]]:
+    chart = sections.chart
+    return {name: list(_ASPECT_TABLE[p][chart.house(p)]) for p, name in enumerate(GRAHAS)}
+
+def _yogas_section(sections: ChartSections) -> Dict[str, bool]:
+    return YOGAS.flags(_yoga_mask(sections))
+
+def _birth_info_section(sections: ChartSections) -> Dict[str, Any]:
+    chart = sections.chart
+    return {
+        'date': chart.date,
+        'time': chart.time,
+        'latitude': chart.latitude,
+        'longitude': chart.longitude,
+        'timezone': chart.timezone,
+        'ayanamsa': round(chart.ayanamsa, 6),
+        'ayanamsa_name': chart.ayanamsa_name
+    }
+
+register_sections('modular', {
+    'lagna': _lagna_section,
+    'planets': _planets_section,
+    'houses': _houses_section,
+    'aspects': _aspects_section,
+    'yogas': _yogas_section,
+    'birth_info': _birth_info_section
+})
+
+# Legacy VedicChart shape: cusp-based houses, lagna.rasi, full planet data, yoga list
+_CUSP_HOUSE_ATTRIBUTES = {
+    house: {key: value for key, value in attrs.items() if key != 'mobility'}
+    for house, attrs in HOUSE_ATTRIBUTES.items()
+}
+
+def _engine_lagna_section(sections: ChartSections) -> Dict[str, Any]:
+    chart = sections.chart
+    rasi_index, nakshatra_index, pada = classify_longitude(chart.ascendant)
+    return {
+        'longitude': chart.ascendant,
+        'rasi': RASIS[rasi_index],
+        'nakshatra': NAKSHATRAS[nakshatra_index],
+        'pada': pada
+    }
+
+def _engine_planets_section(sections: ChartSections) -> Dict[str, Dict[str, Any]]:
+    chart = sections.chart
+    breakdowns = sections.shared('strengths', chart_strengths)[0]
+    asc_rasi = RASIS[chart.asc_sign]
+    planets = {}
+    for p, name in enumerate(GRAHAS):
+        longitude = chart.planet_longitude(p)
+        rasi = RASIS[chart.sign(p)]
+        house = chart.house(p)
+        if p < 7:
+            speed = chart.planet_speed(p)
+            shadbala = dict(breakdowns[p])
+            planets[name] = {
+                'longitude': longitude,
+                'latitude': chart.planet_latitude(p),
+                'speed': speed,
+                'retrograde': speed < 0,
+                'rasi': rasi,
+                'nakshatra': NAKSHATRAS[chart.nakshatra(p)],
+                'pada': chart.pada(p),
+                'degrees_in_rasi': longitude % 30,
+                'house': house,
+                'asc_rasi': asc_rasi,
+                'shadbala': shadbala,
+                'strength': shadbala['total_shadbala'] * 10,  # Scale for display
+                'dignity': shadbala['dignity']
             }
-        
-        return {
-            'lagna': lagna,
-            'planets': formatted_planets,
-            'houses': houses,
-            'aspects': aspects,
-            'yogas': yogas,
-            'birth_info': {
-                'date': date,
-                'time': time,
-                'latitude': latitude,
+        else:
+            # Rahu/Ketu use the basic strength calculation
+            strength, dignity = get_planetary_strength(name, rasi, house)
+            planets[name] = {
                 'longitude': longitude,
-                'timezone': timezone,
-                'ayanamsa': round(ayanamsa, 6)
+                'speed': chart.planet_speed(p),
+                'retrograde': True,
+                'rasi': rasi,
+                'nakshatra': NAKSHATRAS[chart.nakshatra(p)],
+                'pada': chart.pada(p),
+                'house': house,
+                'asc_rasi': asc_rasi,
+                'strength': strength,
+                'dignity': dignity
             }
+    return planets
+
+def _engine_houses_section(sections: ChartSections) -> Dict[int, Dict[str, Any]]:
+    chart = sections.chart
+    planets = sections['planets']
+    houses = {}
+    for i in range(12):
+        house_num = i + 1
+        cusp_longitude = chart.cusps[i]
+        sign = RASIS[int(cusp_longitude // 30)]
+        lord = SIGN_LORDS[sign]
+        house_planets = [name for name, planet in planets.items() if planet['house'] == house_num]
+        house_strength = sum(planets[p]['strength'] for p in house_planets)
+        house_strength += planets[lord]['strength'] * 0.5
+        houses[house_num] = {
+            'cusp_longitude': cusp_longitude,
+            'sign': sign,
+            'lord': lord,
+            'planets': house_planets,
+            'strength': round(house_strength, 2),
+            **_CUSP_HOUSE_ATTRIBUTES[house_num]
         }
+    return houses
+
+def _engine_yogas_section(sections: ChartSections) -> List[str]:
+    return YOGAS.display_names(_yoga_mask(sections))
+
+register_sections('engine', {
+    'birth_info': _birth_info_section,
+    'lagna': _engine_lagna_section,
+    'planets': _engine_planets_section,
+    'houses': _engine_houses_section,
+    'aspects': _aspects_section,
+    'yogas': _engine_yogas_section
+})
+
+class VedicChart(VedicChartCalculator):
+    """Chart calculator producing the legacy VedicChart shape"""
+    
+    def __init__(self):
+        super().__init__(output='engine')
+    
+    def _detect_yogas(self, planets: Dict, houses: Dict) -> List[str]:
+        """Detect classical yogas (display names) from chart dicts.
+
+        Like the 'yogas' section, the rules see the whole-sign chart: shadbala
+        strengths with the nodes at NODE_STRENGTH, and whole-sign house
+        strengths rather than those of the cusp ``houses`` (kept for the
+        signature).
+        """
+        signs = [RASIS.index(planets[name]['rasi']) for name in GRAHAS]
+        house_numbers = [planets[name]['house'] for name in GRAHAS]
+        strengths = [planets[name]['strength'] for name in GRAHAS[:7]] + [NODE_STRENGTH, NODE_STRENGTH]
+        asc_sign = RASIS.index(planets['Sun']['asc_rasi'])
+        return YOGAS.display_names(YOGAS.evaluate(
+            signs, house_numbers, strengths, _whole_sign_house_strengths(asc_sign, house_numbers, strengths)))
 
 print("✅ Main chart calculator loaded!")
 
 # =============================================================================
-# MODULE 5: DISPLAY AND UTILITIES
+# MODULE 5: DASHAS
+# =============================================================================
+
+def calculate_birth_nakshatra(moon_longitude: float) -> Dict[str, Any]:
+    nakshatra_span = 360 / 27
+    nakshatra_index = int(moon_longitude // nakshatra_span)
+    lord = NAKSHATRA_LORDS[nakshatra_index]
+    nakshatra_name = NAKSHATRAS[nakshatra_index]
+    progress = (moon_longitude % nakshatra_span) / nakshatra_span
+    return {
+        'index': nakshatra_index,
+        'nakshatra': nakshatra_name,
+        'lord': lord,
+        'progress': progress,
+        'remaining': 1 - progress
+    }
+
+# Dasha years are converted to days at this rate
+DAYS_PER_YEAR = 365.25
+
+@dataclass(frozen=True)
+class DashaSystem:
+    """A nakshatra dasha system, as data.
+
+    ``lords`` rule in this cyclic order for ``years`` each.
+    ``nakshatra_lords`` names the lord whose dasha runs through each of the
+    27 nakshatras. When consecutive nakshatras share a lord (cyclically),
+    they share one dasha, and the balance at birth is the part of that run
+    the Moon has not yet crossed. Mahadashas run through the sequence
+    ``cycles`` times, starting at the birth lord. Every lower level divides
+    its parent in proportion to ``years``, starting from the parent's lord.
+    """
+
+    name: str
+    lords: Tuple[str, ...]
+    years: Tuple[float, ...]
+    nakshatra_lords: Tuple[str, ...]
+    cycles: int = 1
+    _order: Dict[str, int] = field(init=False, repr=False, compare=False)
+    _runs: Tuple[Tuple[int, int, int], ...] = field(init=False, repr=False, compare=False)
+    _total: float = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        if len(self.lords) != len(self.years) or len(self.nakshatra_lords) != 27:
+            raise ValueError(f"{self.name}: expected one period per lord and 27 nakshatra lords")
+        order = {lord: k for k, lord in enumerate(self.lords)}
+        # (lord index, nakshatras of its run already behind, run length) per nakshatra
+        runs = []
+        for k, lord in enumerate(self.nakshatra_lords):
+            behind = next(b for b in range(27) if self.nakshatra_lords[(k - b - 1) % 27] != lord)
+            ahead = next(a for a in range(27) if self.nakshatra_lords[(k + a + 1) % 27] != lord)
+            runs.append((order[lord], behind, behind + ahead + 1))
+        object.__setattr__(self, '_order', order)
+        object.__setattr__(self, '_runs', tuple(runs))
+        object.__setattr__(self, '_total', sum(self.years))
+
+    def _rotation(self, first: int, count: int) -> List[int]:
+        return [(first + i) % len(self.lords) for i in range(count)]
+
+    def timeline(self, birth_nakshatra: Dict[str, Any], birth_jd: float) -> 'DashaTimeline':
+        """Mahadashas from birth: the balance of the birth lord's dasha, then the rest of the cycles"""
+        first, behind, length = self._runs[birth_nakshatra['index']]
+        order = self._rotation(first, len(self.lords) * self.cycles)
+        years = [self.years[k] for k in order]
+        years[0] *= 1 - (behind + birth_nakshatra['progress']) / length
+        return DashaTimeline([self.lords[k] for k in order], years, birth_jd, self)
+
+    def subperiods(self, lord: str, years: float, start_jd: float) -> 'DashaTimeline':
+        """The periods dividing ``years`` of ``lord``'s dasha, each lord's share in dasha order"""
+        if lord not in self._order:
+            raise ValueError(f"Unknown {self.name} dasha lord: {lord}")
+        order = self._rotation(self._order[lord], len(self.lords))
+        return DashaTimeline([self.lords[k] for k in order],
+                             [self.years[k] * years / self._total for k in order], start_jd, self)
+
+class DashaTimeline:
+    """Consecutive dasha periods with numeric boundaries.
+
+    Period i is ruled by ``lords[i]`` for ``years[i]`` years, from
+    ``boundaries[i]`` up to (not including) ``boundaries[i + 1]``, in Julian
+    Days. Boundaries accumulate the exact fractional years from ``start_jd``;
+    dates are only formatted by period() and to_periods(), where a period
+    runs from the date its start falls on to the date its end falls on.
+    ``system`` is the DashaSystem that divides the periods further.
+    """
+
+    __slots__ = ('lords', 'years', 'boundaries', 'system', '_bounds')
+
+    def __init__(self, lords: List[str], years: Iterable[float], start_jd: float, system: DashaSystem):
+        self.lords = list(lords)
+        self.years = np.asarray(list(years), dtype=float)
+        self.boundaries = start_jd + np.concatenate([[0.0], np.cumsum(self.years)]) * DAYS_PER_YEAR
+        self.system = system
+        self._bounds = self.boundaries.tolist()
+
+    def __len__(self) -> int:
+        return len(self.lords)
+
+    def index_at(self, jd: float) -> Optional[int]:
+        """The period in force at ``jd``, or None outside the timeline"""
+        index = bisect.bisect_right(self._bounds, jd) - 1
+        return index if 0 <= index < len(self.lords) else None
+
+    def indices_at(self, jds: np.ndarray) -> np.ndarray:
+        """index_at for an array of Julian Days, with -1 outside the timeline"""
+        indices = np.searchsorted(self.boundaries, jds, side='right') - 1
+        return np.where(indices < len(self.lords), indices, -1)
+
+    def subperiods(self, index: int) -> 'DashaTimeline':
+        """The subperiods (antardashas of a mahadasha) of period ``index``"""
+        return self.system.subperiods(self.lords[index], float(self.years[index]), self._bounds[index])
+
+    def period(self, index: int) -> Dict[str, Any]:
+        """One period in the JSON shape"""
+        return {
+            'dasha': self.lords[index],
+            'start_date': date_from_julian_day(self._bounds[index]),
+            'end_date': date_from_julian_day(self._bounds[index + 1]),
+            'years': round(float(self.years[index]), 2)
+        }
+
+    def to_periods(self) -> List[Dict[str, Any]]:
+        """Every period in the JSON shape"""
+        dates = dates_from_julian_days(self.boundaries).tolist()
+        return [{'dasha': lord, 'start_date': dates[k], 'end_date': dates[k + 1], 'years': round(years, 2)}
+                for k, (lord, years) in enumerate(zip(self.lords, self.years.tolist()))]
+
+VIMSHOTTARI = DashaSystem('vimshottari', tuple(VIMSHOTTARI_PERIODS), tuple(VIMSHOTTARI_PERIODS.values()),
+                          tuple(NAKSHATRA_LORDS))
+VIMSHOTTARI_LORDS = list(VIMSHOTTARI.lords)
+VIMSHOTTARI_YEARS = sum(VIMSHOTTARI.years)
+
+# Yogini dasha: eight yoginis of 1-8 years (36 in all), each ruled by a graha.
+# The birth yogini is (nakshatra number + 3) mod 8, counted from Mangala.
+YOGINI_PERIODS = {
+    'Mangala': 1, 'Pingala': 2, 'Dhanya': 3, 'Bhramari': 4,
+    'Bhadrika': 5, 'Ulka': 6, 'Siddha': 7, 'Sankata': 8
+}
+YOGINI_RULERS = {
+    'Mangala': 'Moon', 'Pingala': 'Sun', 'Dhanya': 'Jupiter', 'Bhramari': 'Mars',
+    'Bhadrika': 'Mercury', 'Ulka': 'Saturn', 'Siddha': 'Venus', 'Sankata': 'Rahu'
+}
+YOGINI = DashaSystem('yogini', tuple(YOGINI_PERIODS), tuple(YOGINI_PERIODS.values()),
+                     tuple(list(YOGINI_PERIODS)[(k + 3) % 8] for k in range(27)), cycles=4)
+
+# Ashtottari dasha: 108 years over eight grahas, each ruling a run of three or
+# four nakshatras counted from Ardra (Sun) round to Bharani (Rahu). Abhijit is
+# not one of the 27, so Saturn's run is Purva Ashadha to Shravana.
+ASHTOTTARI_PERIODS = {
+    'Sun': 6, 'Moon': 15, 'Mars': 8, 'Mercury': 17,
+    'Saturn': 10, 'Jupiter': 19, 'Rahu': 12, 'Venus': 21
+}
+ASHTOTTARI = DashaSystem('ashtottari', tuple(ASHTOTTARI_PERIODS), tuple(ASHTOTTARI_PERIODS.values()),
+                         tuple(['Rahu'] * 2 + ['Venus'] * 3 + ['Sun'] * 4 + ['Moon'] * 3 + ['Mars'] * 4
+                               + ['Mercury'] * 3 + ['Saturn'] * 3 + ['Jupiter'] * 3 + ['Rahu'] * 2))
+
+DASHA_SYSTEMS = {system.name: system for system in (VIMSHOTTARI, YOGINI, ASHTOTTARI)}
+DEFAULT_DASHA_SYSTEM = 'vimshottari'
+
+def resolve_dasha_system(system: Optional[str]) -> str:
+    """Normalize a dasha system name (None = the default), rejecting unknown ones"""
+    if system is None:
+        return DEFAULT_DASHA_SYSTEM
+    name = system.lower()
+    if name not in DASHA_SYSTEMS:
+        raise ValueError(f"Unknown dasha system: {system} (expected one of {', '.join(DASHA_SYSTEMS)})")
+    return name
+
+def dasha_timeline(moon_longitude: float, birth_date: str, system: str = DEFAULT_DASHA_SYSTEM) -> DashaTimeline:
+    """The mahadashas of ``system`` from the natal Moon and birth date"""
+    return DASHA_SYSTEMS[resolve_dasha_system(system)].timeline(
+        calculate_birth_nakshatra(moon_longitude), date_julian_day(birth_date))
+
+def vimshottari_timeline(birth_nakshatra: Dict[str, Any], birth_jd: float) -> DashaTimeline:
+    """Mahadashas from birth: the balance of the birth nakshatra lord's dasha, then the eight others"""
+    return VIMSHOTTARI.timeline(birth_nakshatra, birth_jd)
+
+def antardasha_timeline(mahadasha_lord: str, mahadasha_years: float, start_jd: float) -> DashaTimeline:
+    """Antardashas (Bhuktis) of a mahadasha, each lord's share of its years in dasha order"""
+    return VIMSHOTTARI.subperiods(mahadasha_lord, mahadasha_years, start_jd)
+
+def calculate_mahadasha_periods(birth_nakshatra: Dict, birth_date: datetime.date) -> List[Dict]:
+    return vimshottari_timeline(birth_nakshatra, date_julian_day(birth_date.isoformat())).to_periods()
+
+def get_current_mahadasha(mahadasha_periods: List[Dict], date: datetime.date) -> Optional[Dict]:
+    # ISO dates sort as strings, so the periods can be searched without parsing
+    day = date.isoformat()
+    index = bisect.bisect_left([period['end_date'] for period in mahadasha_periods], day)
+    if index < len(mahadasha_periods) and mahadasha_periods[index]['start_date'] <= day:
+        return mahadasha_periods[index]
+    return None
+
+def calculate_antardasha_periods(mahadasha_lord: str, mahadasha_years: float, mahadasha_start: datetime.date) -> List[Dict]:
+    """Calculate Antardasha (Bhukti) periods within a Mahadasha"""
+    return antardasha_timeline(mahadasha_lord, mahadasha_years,
+                               date_julian_day(mahadasha_start.isoformat())).to_periods()
+
+def get_dasha_info(moon_longitude: float, birth_date: str, current_date: Optional[str] = None,
+                   ayanamsa: str = DEFAULT_AYANAMSA, system: str = DEFAULT_DASHA_SYSTEM) -> Dict[str, Any]:
+    """Dasha periods from the natal Moon (Vimshottari unless ``system`` names another of DASHA_SYSTEMS).
+
+    ``moon_longitude`` is the sidereal Moon in the ``ayanamsa`` frame (pass the
+    chart's own ayanamsa); the ayanamsa and system names are recorded with the result.
+    """
+    try:
+        ayanamsa = resolve_ayanamsa(ayanamsa)
+        system = resolve_dasha_system(system)
+        birth_jd = date_julian_day(birth_date)
+        current_jd = date_julian_day(current_date or datetime.date.today().isoformat())
+
+        birth_nakshatra = calculate_birth_nakshatra(moon_longitude)
+        timeline = DASHA_SYSTEMS[system].timeline(birth_nakshatra, birth_jd)
+        mahadasha_periods = timeline.to_periods()
+        index = timeline.index_at(current_jd)
+
+        # Antardashas of the current mahadasha
+        current_mahadasha = None
+        antardasha_periods = []
+        current_antardasha = None
+        if index is not None:
+            current_mahadasha = mahadasha_periods[index]
+            antardashas = timeline.subperiods(index)
+            antardasha_periods = antardashas.to_periods()
+            current_antardasha = antardasha_periods[antardashas.index_at(current_jd)]
+
+        return {
+            'birth_nakshatra': birth_nakshatra,
+            'mahadasha_periods': mahadasha_periods,
+            'current_mahadasha': current_mahadasha,
+            'antardasha_periods': antardasha_periods,
+            'current_antardasha': current_antardasha,
+            'current_antardasha_list': antardasha_periods,  # For compatibility with template
+            'ayanamsa': ayanamsa,
+            'system': system
+        }
+    except Exception as e:
+        print(f"Error in get_dasha_info: {str(e)}")
+        raise
+
+def get_active_dashas(moon_longitude: float, birth_date: str, dates: Iterable[str],
+                      system: str = DEFAULT_DASHA_SYSTEM) -> List[Dict[str, Any]]:
+    """The mahadasha and antardasha in force on each of many dates.
+
+    Returns one {'date', 'mahadasha', 'antardasha'} per date, in order; both
+    are None for dates before birth or after the last mahadasha.
+    """
+    dates = list(dates)
+    jds = date_julian_days(dates)
+    timeline = dasha_timeline(moon_longitude, birth_date, system)
+    mahadasha_indices = timeline.indices_at(jds)
+    antardasha_indices = np.full(len(dates), -1)
+    mahadashas, antardashas = timeline.to_periods(), {}
+    for index in np.unique(mahadasha_indices[mahadasha_indices >= 0]).tolist():
+        subperiods = timeline.subperiods(index)
+        inside = mahadasha_indices == index
+        antardasha_indices[inside] = subperiods.indices_at(jds[inside])
+        antardashas[index] = subperiods.to_periods()
+    return [{'date': date,
+             'mahadasha': mahadashas[m] if m >= 0 else None,
+             'antardasha': antardashas[m][a] if m >= 0 else None}
+            for date, m, a in zip(dates, mahadasha_indices.tolist(), antardasha_indices.tolist())]
+
+# Dasha levels, from the mahadasha down
+DASHA_LEVELS = ('mahadasha', 'antardasha', 'pratyantardasha', 'sookshma', 'prana')
+
+# Expanded periods each DashaTree keeps (every one holds eight or nine subperiods)
+DASHA_TREE_CACHE_SIZE = 2048
+
+class DashaTree:
+    """Dasha periods down to prana dasha, expanded on demand.
+
+    A path names a period by its lord at each level from the mahadasha
+    down: ['Jupiter', 'Sun'] is the Sun antardasha of the Jupiter
+    mahadasha. Where a system repeats mahadasha lords (Yogini runs its
+    cycle several times in a lifetime), mahadashas are named by their
+    index instead: [9, 'Pingala']. Each level divides its parent in proportion to the dasha
+    system's years, as antardashas divide a mahadasha. Subperiods are
+    only calculated for the periods asked about, and the most recently
+    used DASHA_TREE_CACHE_SIZE expansions are kept. Nodes are period dicts
+    with the mahadasha keys plus 'level', 'path', 'start_jd' and 'end_jd'.
+    """
+
+    def __init__(self, timeline: DashaTimeline):
+        self.timeline = timeline
+        self._mahadasha_steps = [lord if timeline.lords.count(lord) == 1 else k
+                                 for k, lord in enumerate(timeline.lords)]
+        self._subperiods = functools.lru_cache(maxsize=DASHA_TREE_CACHE_SIZE)(self._expand)
+
+    def _expand(self, indices: Tuple[int, ...]) -> DashaTimeline:
+        """The subperiods of the period at ``indices`` (one index per level); the mahadashas for ()"""
+        if not indices:
+            return self.timeline
+        return self._subperiods(indices[:-1]).subperiods(indices[-1])
+
+    def _step(self, indices: Tuple[int, ...], index: int) -> Union[str, int]:
+        """The path step naming period ``index`` below ``indices``"""
+        return self._subperiods(indices).lords[index] if indices else self._mahadasha_steps[index]
+
+    def _indices(self, path: Iterable[Union[str, int]]) -> Tuple[int, ...]:
+        indices: Tuple[int, ...] = ()
+        for step in path:
+            if len(indices) == len(DASHA_LEVELS):
+                raise ValueError(f"Dasha paths have at most {len(DASHA_LEVELS)} levels")
+            steps = self._subperiods(indices).lords if indices else self._mahadasha_steps
+            if step not in steps or isinstance(step, bool):
+                raise ValueError(f"Unknown dasha lord: {step}")
+            indices += (steps.index(step),)
+        return indices
+
+    def _node(self, indices: Tuple[int, ...], path: List[str]) -> Dict[str, Any]:
+        timeline, index = self._subperiods(indices[:-1]), indices[-1]
+        node = timeline.period(index)
+        node.update(level=DASHA_LEVELS[len(indices) - 1], path=path,
+                    start_jd=timeline.boundaries[index].item(), end_jd=timeline.boundaries[index + 1].item())
+        return node
+
+    def period(self, path: Iterable[Union[str, int]]) -> Dict[str, Any]:
+        """The period at ``path``"""
+        path = list(path)
+        if not path:
+            raise ValueError("A dasha path names at least the mahadasha")
+        return self._node(self._indices(path), path)
+
+    def children(self, path: Iterable[Union[str, int]] = ()) -> List[Dict[str, Any]]:
+        """The subperiods of the period at ``path``; the mahadashas for an empty path"""
+        path = list(path)
+        indices = self._indices(path)
+        if len(indices) == len(DASHA_LEVELS):
+            raise ValueError("Prana dashas are not divided further")
+        return [self._node(indices + (k,), path + [self._step(indices, k)])
+                for k in range(len(self._subperiods(indices)))]
+
+    def active(self, jd: float, depth: int = len(DASHA_LEVELS)) -> List[Dict[str, Any]]:
+        """The periods in force at ``jd``, from the mahadasha down ``depth`` levels
+        (empty outside the mahadashas)"""
+        indices: Tuple[int, ...] = ()
+        path: List[Union[str, int]] = []
+        nodes = []
+        for _ in range(depth):
+            timeline = self._subperiods(indices)
+            index = timeline.index_at(jd)
+            if index is None:
+                break
+            path = path + [self._step(indices, index)]
+            indices += (index,)
+            nodes.append(self._node(indices, path))
+        return nodes
+
+    def iter_level(self, level: Union[int, str], start_jd: float, end_jd: float) -> Iterator[Dict[str, Any]]:
+        """The periods of one level that overlap [start_jd, end_jd), in order.
+
+        ``level`` is an index or name from DASHA_LEVELS. Only periods that
+        overlap the range are expanded, so a short range at a deep level
+        touches a handful of periods per level.
+        """
+        depth = DASHA_LEVELS.index(level) if isinstance(level, str) else level
+        if not 0 <= depth < len(DASHA_LEVELS):
+            raise ValueError(f"Unknown dasha level: {level}")
+
+        def walk(indices: Tuple[int, ...], path: List[Union[str, int]]) -> Iterator[Dict[str, Any]]:
+            timeline = self._subperiods(indices)
+            bounds = timeline.boundaries.tolist()
+            for index in range(max(bisect.bisect_right(bounds, start_jd) - 1, 0), len(timeline)):
+                if bounds[index] >= end_jd:
+                    break
+                if bounds[index + 1] <= start_jd:
+                    continue
+                child = path + [self._step(indices, index)]
+                if len(indices) == depth:
+                    yield self._node(indices + (index,), child)
+                else:
+                    yield from walk(indices + (index,), child)
+
+        return walk((), [])
+
+def get_dasha_tree(moon_longitude: float, birth_date: str, system: str = DEFAULT_DASHA_SYSTEM) -> DashaTree:
+    """The dasha tree of a natal Moon and birth date (shared, so repeated
+    queries for one chart reuse its expanded periods)"""
+    return _dasha_tree(moon_longitude, birth_date, resolve_dasha_system(system))
+
+@functools.lru_cache(maxsize=256)
+def _dasha_tree(moon_longitude: float, birth_date: str, system: str) -> DashaTree:
+    return DashaTree(dasha_timeline(moon_longitude, birth_date, system))
+
+print("✅ Dasha calculations loaded!")
+
+# =============================================================================
+# MODULE 6: DISPLAY AND UTILITIES
 # =============================================================================
 
 def display_chart_analysis(chart_data: Dict[str, Any]):